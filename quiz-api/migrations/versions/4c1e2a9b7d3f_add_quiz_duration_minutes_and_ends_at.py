@@ -0,0 +1,65 @@
+"""
+Add quiz duration_minutes and indexed ends_at
+
+Revision ID: 4c1e2a9b7d3f
+Revises:
+Create Date: 2026-10-17 18:30:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4c1e2a9b7d3f'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+quizzes = sa.table(
+    "quizzes",
+    sa.column("id", sa.Integer),
+    sa.column("date_of_quiz", sa.DateTime),
+    sa.column("time_duration", sa.String),
+    sa.column("duration_minutes", sa.Integer),
+    sa.column("ends_at", sa.DateTime),
+)
+
+
+def upgrade():
+    # Databases created with `db.create_all()` may already have the new columns
+    existing_columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("quizzes")}
+    if "ends_at" in existing_columns:
+        return
+
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("duration_minutes", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("ends_at", sa.DateTime(), nullable=True))
+
+    # Backfill from the 'hh:mm' duration
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(quizzes.c.id, quizzes.c.date_of_quiz, quizzes.c.time_duration)).fetchall()
+    for quiz_id, stored_date_of_quiz, time_duration in rows:
+        date_of_quiz = stored_date_of_quiz
+        if isinstance(date_of_quiz, str):
+            date_of_quiz = datetime.fromisoformat(date_of_quiz)
+        hours, minutes = map(int, time_duration.split(":"))
+        duration_minutes = hours * 60 + minutes
+        connection.execute(
+            quizzes.update()
+            .where(quizzes.c.id == quiz_id)
+            .values(duration_minutes=duration_minutes, ends_at=date_of_quiz + timedelta(minutes=duration_minutes))
+        )
+
+    # The columns stay nullable at the database level: tightening them would make SQLite
+    # recreate the table and drop the FTS triggers defined on it
+    op.create_index(op.f("ix_quizzes_ends_at"), "quizzes", ["ends_at"], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_quizzes_ends_at"), table_name="quizzes")
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.drop_column("ends_at")
+        batch_op.drop_column("duration_minutes")
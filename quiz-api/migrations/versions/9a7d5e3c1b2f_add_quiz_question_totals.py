@@ -0,0 +1,42 @@
+"""
+Add denormalized question_count and total_points to quizzes
+
+Revision ID: 9a7d5e3c1b2f
+Revises: 4c1e2a9b7d3f
+Create Date: 2026-10-17 19:10:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9a7d5e3c1b2f'
+down_revision = '4c1e2a9b7d3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing_columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("quizzes")}
+    if "question_count" in existing_columns:
+        return
+
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("question_count", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("total_points", sa.Integer(), nullable=False, server_default="0"))
+
+    # Backfill from the existing questions
+    op.execute(
+        """
+        UPDATE quizzes SET
+            question_count = (SELECT COUNT(*) FROM questions WHERE questions.quiz_id = quizzes.id),
+            total_points = (SELECT COALESCE(SUM(points), 0) FROM questions WHERE questions.quiz_id = quizzes.id)
+        """
+    )
+    op.create_index(op.f("ix_questions_quiz_id"), "questions", ["quiz_id"], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.drop_column("total_points")
+        batch_op.drop_column("question_count")
@@ -0,0 +1,63 @@
+"""
+Add leaderboard_entries, the best score of each user per quiz, backfilled from scores
+
+Revision ID: a8e4c2f6d0b3
+Revises: f7a3d9b5c1e8
+Create Date: 2026-10-17 22:05:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a8e4c2f6d0b3'
+down_revision = 'f7a3d9b5c1e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created with `db.create_all()` already have the table, empty
+    if not sa.inspect(op.get_bind()).has_table("leaderboard_entries"):
+        op.create_table(
+            "leaderboard_entries",
+            sa.Column("quiz_id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("user_score", sa.Integer(), nullable=False),
+            sa.Column("timestamp", sa.DateTime(), nullable=False),
+            sa.Column("score_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["quiz_id"], ["quizzes.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["score_id"], ["scores.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("quiz_id", "user_id"),
+        )
+        op.create_index(
+            "ix_leaderboard_entries_ranking",
+            "leaderboard_entries",
+            ["quiz_id", sa.text("user_score DESC"), "timestamp", "user_id"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_leaderboard_entries_quiz_id_score_id", "leaderboard_entries", ["quiz_id", "score_id"], unique=False
+        )
+
+    # Backfill with the best and earliest score of each user in each quiz
+    op.execute("DELETE FROM leaderboard_entries")
+    op.execute(
+        """
+        INSERT INTO leaderboard_entries (quiz_id, user_id, user_score, timestamp, score_id)
+        SELECT quiz_id, user_id, user_score, timestamp, id FROM (
+            SELECT quiz_id, user_id, user_score, timestamp, id, ROW_NUMBER() OVER (
+                PARTITION BY quiz_id, user_id ORDER BY user_score DESC, timestamp, id
+            ) AS attempt_rank
+            FROM scores
+        ) AS best_scores
+        WHERE attempt_rank = 1
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("ix_leaderboard_entries_quiz_id_score_id", table_name="leaderboard_entries")
+    op.drop_index("ix_leaderboard_entries_ranking", table_name="leaderboard_entries")
+    op.drop_table("leaderboard_entries")
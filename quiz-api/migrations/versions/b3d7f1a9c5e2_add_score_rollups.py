@@ -0,0 +1,82 @@
+"""
+Add quiz, chapter and subject score rollups for the admin summary, backfilled from scores
+
+Revision ID: b3d7f1a9c5e2
+Revises: a8e4c2f6d0b3
+Create Date: 2026-10-17 23:10:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b3d7f1a9c5e2'
+down_revision = 'a8e4c2f6d0b3'
+branch_labels = None
+depends_on = None
+
+# Default of `PASS_MARK_PERCENT`; run `flask rebuild-score-rollups` to count passes against another pass mark
+PASS_MARK_PERCENT = 50
+
+ROLLUPS = (
+    ("quiz_score_rollups", "quiz_id", "quizzes"),
+    ("chapter_score_rollups", "chapter_id", "chapters"),
+    ("subject_score_rollups", "subject_id", "subjects"),
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table_name, key, parent_table in ROLLUPS:
+        if inspector.has_table(table_name):
+            continue
+        op.create_table(
+            table_name,
+            sa.Column(key, sa.Integer(), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("score_sum", sa.Integer(), nullable=False),
+            sa.Column("score_sum_of_squares", sa.Integer(), nullable=False),
+            sa.Column("max_score", sa.Integer(), nullable=False),
+            sa.Column("passes", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint([key], [f"{parent_table}.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint(key),
+        )
+
+    op.execute("DELETE FROM subject_score_rollups")
+    op.execute("DELETE FROM chapter_score_rollups")
+    op.execute("DELETE FROM quiz_score_rollups")
+    op.execute(
+        f"""
+        INSERT INTO quiz_score_rollups (quiz_id, attempts, score_sum, score_sum_of_squares, max_score, passes)
+        SELECT scores.quiz_id, COUNT(scores.id), SUM(scores.user_score), SUM(scores.user_score * scores.user_score),
+               MAX(scores.user_score),
+               SUM(CASE WHEN quizzes.total_points > 0
+                         AND scores.user_score * 100 >= {PASS_MARK_PERCENT} * quizzes.total_points
+                        THEN 1 ELSE 0 END)
+        FROM scores JOIN quizzes ON quizzes.id = scores.quiz_id
+        GROUP BY scores.quiz_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO chapter_score_rollups (chapter_id, attempts, score_sum, score_sum_of_squares, max_score, passes)
+        SELECT quizzes.chapter_id, SUM(attempts), SUM(score_sum), SUM(score_sum_of_squares), MAX(max_score),
+               SUM(passes)
+        FROM quiz_score_rollups JOIN quizzes ON quizzes.id = quiz_score_rollups.quiz_id
+        GROUP BY quizzes.chapter_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO subject_score_rollups (subject_id, attempts, score_sum, score_sum_of_squares, max_score, passes)
+        SELECT chapters.subject_id, SUM(attempts), SUM(score_sum), SUM(score_sum_of_squares), MAX(max_score),
+               SUM(passes)
+        FROM chapter_score_rollups JOIN chapters ON chapters.id = chapter_score_rollups.chapter_id
+        GROUP BY chapters.subject_id
+        """
+    )
+
+
+def downgrade():
+    for table_name, _, _ in reversed(ROLLUPS):
+        op.drop_table(table_name)
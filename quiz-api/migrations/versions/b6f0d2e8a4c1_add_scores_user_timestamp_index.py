@@ -0,0 +1,23 @@
+"""
+Add a (user_id, timestamp) index on scores for attempt history paging
+
+Revision ID: b6f0d2e8a4c1
+Revises: 9a7d5e3c1b2f
+Create Date: 2026-10-17 19:40:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b6f0d2e8a4c1'
+down_revision = '9a7d5e3c1b2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_scores_user_id_timestamp", "scores", ["user_id", "timestamp"], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index("ix_scores_user_id_timestamp", table_name="scores")
@@ -0,0 +1,45 @@
+"""
+Add leaderboard versions to quizzes and leaderboard_entries, so cached rankings catch up by version, not score ID
+
+Revision ID: c1f5a3e7b9d2
+Revises: f2b8d4a0c6e1
+Create Date: 2026-10-18 02:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c1f5a3e7b9d2'
+down_revision = 'f2b8d4a0c6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    quiz_columns = {column["name"] for column in inspector.get_columns("quizzes")}
+    if "leaderboard_version" not in quiz_columns:
+        with op.batch_alter_table("quizzes", schema=None) as batch_op:
+            batch_op.add_column(sa.Column("leaderboard_version", sa.Integer(), nullable=False, server_default="0"))
+            batch_op.add_column(
+                sa.Column("leaderboard_reset_version", sa.Integer(), nullable=False, server_default="0")
+            )
+
+    entry_columns = {column["name"] for column in inspector.get_columns("leaderboard_entries")}
+    if "version" not in entry_columns:
+        with op.batch_alter_table("leaderboard_entries", schema=None) as batch_op:
+            batch_op.drop_index("ix_leaderboard_entries_quiz_id_score_id")
+            batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+            batch_op.create_index("ix_leaderboard_entries_quiz_id_version", ["quiz_id", "version"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("leaderboard_entries", schema=None) as batch_op:
+        batch_op.drop_index("ix_leaderboard_entries_quiz_id_version")
+        batch_op.drop_column("version")
+        batch_op.create_index("ix_leaderboard_entries_quiz_id_score_id", ["quiz_id", "score_id"], unique=False)
+
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.drop_column("leaderboard_reset_version")
+        batch_op.drop_column("leaderboard_version")
@@ -0,0 +1,62 @@
+"""
+Add per-user and subject stats for the users' summaries, backfilled from scores
+
+Revision ID: c6a2e8d4f1b7
+Revises: b3d7f1a9c5e2
+Create Date: 2026-10-17 23:40:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c6a2e8d4f1b7'
+down_revision = 'b3d7f1a9c5e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("user_stats"):
+        op.create_table(
+            "user_stats",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("subject_id", sa.Integer(), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("score_sum", sa.Integer(), nullable=False),
+            sa.Column("percentage_sum", sa.Float(), nullable=False),
+            sa.Column("best_percentage", sa.Float(), nullable=False),
+            sa.Column("latest_quiz_id", sa.Integer(), nullable=True),
+            sa.Column("latest_percentage", sa.Float(), nullable=False),
+            sa.Column("latest_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["subject_id"], ["subjects.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["latest_quiz_id"], ["quizzes.id"], ondelete="SET NULL"),
+            sa.PrimaryKeyConstraint("user_id", "subject_id"),
+        )
+
+    op.execute("DELETE FROM user_stats")
+    op.execute(
+        """
+        INSERT INTO user_stats (user_id, subject_id, attempts, score_sum, percentage_sum, best_percentage,
+                                latest_quiz_id, latest_percentage, latest_at)
+        SELECT user_id, subject_id, COUNT(*), SUM(user_score), SUM(percentage), MAX(percentage),
+               MAX(CASE WHEN recency = 1 THEN quiz_id END), MAX(CASE WHEN recency = 1 THEN percentage END),
+               MAX(CASE WHEN recency = 1 THEN timestamp END)
+        FROM (
+            SELECT scores.user_id, chapters.subject_id, scores.quiz_id, scores.user_score, scores.timestamp,
+                   CASE WHEN quizzes.total_points > 0 THEN scores.user_score * 100.0 / quizzes.total_points
+                        ELSE 0.0 END AS percentage,
+                   ROW_NUMBER() OVER (PARTITION BY scores.user_id, chapters.subject_id
+                                      ORDER BY scores.timestamp DESC, scores.id DESC) AS recency
+            FROM scores
+            JOIN quizzes ON quizzes.id = scores.quiz_id
+            JOIN chapters ON chapters.id = quizzes.chapter_id
+        ) AS ranked_scores
+        GROUP BY user_id, subject_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("user_stats")
@@ -0,0 +1,30 @@
+"""
+Add a (chapter_id, date_of_quiz) index on quizzes for cursor pagination
+
+Revision ID: d2a8c4f6e0b9
+Revises: b6f0d2e8a4c1
+Create Date: 2026-10-17 20:30:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'd2a8c4f6e0b9'
+down_revision = 'b6f0d2e8a4c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_quizzes_chapter_id_date_of_quiz",
+        "quizzes",
+        ["chapter_id", "date_of_quiz"],
+        unique=False,
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_quizzes_chapter_id_date_of_quiz", table_name="quizzes")
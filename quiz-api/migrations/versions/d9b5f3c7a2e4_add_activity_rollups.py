@@ -0,0 +1,157 @@
+"""
+Add hourly and daily activity rollups for the admin metrics, backfilled from scores and signups
+
+Revision ID: d9b5f3c7a2e4
+Revises: c6a2e8d4f1b7
+Create Date: 2026-10-18 00:20:00.000000
+
+"""
+from collections import Counter, defaultdict
+from datetime import timezone
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'd9b5f3c7a2e4'
+down_revision = 'c6a2e8d4f1b7'
+branch_labels = None
+depends_on = None
+
+
+def _bucket_columns():
+    return [
+        sa.Column("granularity", sa.String(length=4), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+    ]
+
+
+def _counter_columns():
+    return [
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("answers", sa.Integer(), nullable=False),
+        sa.Column("signups", sa.Integer(), nullable=False),
+    ]
+
+
+def _bucket_start(timestamp, granularity):
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    timestamp = timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0) if granularity == "day" else timestamp
+
+
+def _table(name, *columns):
+    return sa.table(
+        name,
+        sa.column("granularity"),
+        sa.column("bucket_start", sa.DateTime()),
+        *(sa.column(column) for column in columns),
+    )
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("site_activity_rollups"):
+        op.create_table(
+            "site_activity_rollups",
+            sa.Column("active_users", sa.Integer(), nullable=False),
+            *_bucket_columns(),
+            *_counter_columns(),
+            sa.PrimaryKeyConstraint("granularity", "bucket_start"),
+        )
+    if not inspector.has_table("quiz_activity_rollups"):
+        op.create_table(
+            "quiz_activity_rollups",
+            sa.Column("quiz_id", sa.Integer(), nullable=False),
+            *_bucket_columns(),
+            *_counter_columns(),
+            sa.ForeignKeyConstraint(["quiz_id"], ["quizzes.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("quiz_id", "granularity", "bucket_start"),
+        )
+    if not inspector.has_table("active_user_buckets"):
+        op.create_table(
+            "active_user_buckets",
+            *_bucket_columns(),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("granularity", "bucket_start", "user_id"),
+        )
+
+    # Bucketed in Python, as truncating timestamps to the hour differs between databases
+    connection = op.get_bind()
+    site = defaultdict(Counter)
+    quizzes = defaultdict(Counter)
+    active = defaultdict(set)
+    events = [
+        (quiz_id, user_id, timestamp, {"attempts": 1, "answers": answers})
+        for quiz_id, user_id, timestamp, answers in connection.execute(
+            sa.text(
+                "SELECT scores.quiz_id, scores.user_id, scores.timestamp, COUNT(question_attempts.id) "
+                "FROM scores LEFT JOIN question_attempts ON question_attempts.score_id = scores.id "
+                "GROUP BY scores.id"
+            ).columns(sa.column("quiz_id"), sa.column("user_id"), sa.column("timestamp", sa.DateTime()))
+        )
+    ]
+    events += [
+        (quiz_id, user_id, timestamp, {"signups": 1})
+        for quiz_id, user_id, timestamp in connection.execute(
+            sa.text("SELECT quiz_id, user_id, signup_time FROM quiz_signups").columns(
+                sa.column("quiz_id"), sa.column("user_id"), sa.column("signup_time", sa.DateTime())
+            )
+        )
+    ]
+    for quiz_id, user_id, timestamp, counts in events:
+        for granularity in ("hour", "day"):
+            bucket = (granularity, _bucket_start(timestamp, granularity))
+            site[bucket].update(counts)
+            quizzes[(quiz_id, *bucket)].update(counts)
+            active[bucket].add(user_id)
+
+    op.execute("DELETE FROM active_user_buckets")
+    op.execute("DELETE FROM quiz_activity_rollups")
+    op.execute("DELETE FROM site_activity_rollups")
+    if not site:
+        return
+    op.bulk_insert(
+        _table("site_activity_rollups", "attempts", "answers", "signups", "active_users"),
+        [
+            {
+                "granularity": granularity,
+                "bucket_start": start,
+                "attempts": counts["attempts"],
+                "answers": counts["answers"],
+                "signups": counts["signups"],
+                "active_users": len(active[(granularity, start)]),
+            }
+            for (granularity, start), counts in site.items()
+        ],
+    )
+    op.bulk_insert(
+        _table("quiz_activity_rollups", "quiz_id", "attempts", "answers", "signups"),
+        [
+            {
+                "quiz_id": quiz_id,
+                "granularity": granularity,
+                "bucket_start": start,
+                "attempts": counts["attempts"],
+                "answers": counts["answers"],
+                "signups": counts["signups"],
+            }
+            for (quiz_id, granularity, start), counts in quizzes.items()
+        ],
+    )
+    op.bulk_insert(
+        _table("active_user_buckets", "user_id"),
+        [
+            {"granularity": granularity, "bucket_start": start, "user_id": user_id}
+            for (granularity, start), user_ids in active.items()
+            for user_id in user_ids
+        ],
+    )
+
+
+def downgrade():
+    op.drop_table("active_user_buckets")
+    op.drop_table("quiz_activity_rollups")
+    op.drop_table("site_activity_rollups")
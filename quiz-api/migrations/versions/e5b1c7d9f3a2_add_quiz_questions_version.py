@@ -0,0 +1,30 @@
+"""
+Add questions_version to quizzes
+
+Revision ID: e5b1c7d9f3a2
+Revises: d2a8c4f6e0b9
+Create Date: 2026-10-17 19:20:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e5b1c7d9f3a2'
+down_revision = 'd2a8c4f6e0b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing_columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("quizzes")}
+    if "questions_version" in existing_columns:
+        return
+
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("questions_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.drop_column("questions_version")
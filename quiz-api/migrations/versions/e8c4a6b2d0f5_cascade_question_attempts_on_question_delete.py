@@ -0,0 +1,50 @@
+"""
+Delete the attempts of a question with it, now that SQLite enforces foreign keys
+
+Revision ID: e8c4a6b2d0f5
+Revises: d9b5f3c7a2e4
+Create Date: 2026-10-18 00:40:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e8c4a6b2d0f5'
+down_revision = 'd9b5f3c7a2e4'
+branch_labels = None
+depends_on = None
+
+# Name given to the constraint when SQLite reflects it without one
+FOREIGN_KEY_NAME = "fk_question_attempts_question_id_questions"
+
+
+def _question_foreign_key():
+    for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys("question_attempts"):
+        if foreign_key["constrained_columns"] == ["question_id"]:
+            return foreign_key
+    return None
+
+
+def _replace_question_foreign_key(ondelete):
+    foreign_key = _question_foreign_key()
+    name = (foreign_key and foreign_key["name"]) or FOREIGN_KEY_NAME
+    with op.batch_alter_table(
+        "question_attempts",
+        naming_convention={"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"},
+    ) as batch_op:
+        if foreign_key is not None:
+            batch_op.drop_constraint(name, type_="foreignkey")
+        batch_op.create_foreign_key(name, "questions", ["question_id"], ["id"], ondelete=ondelete)
+
+
+def upgrade():
+    # Databases created with `db.create_all()` may already have the rule
+    foreign_key = _question_foreign_key()
+    if foreign_key is not None and foreign_key["options"].get("ondelete", "").upper() == "CASCADE":
+        return
+    _replace_question_foreign_key("CASCADE")
+
+
+def downgrade():
+    _replace_question_foreign_key(None)
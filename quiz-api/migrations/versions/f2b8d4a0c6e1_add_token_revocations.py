@@ -0,0 +1,30 @@
+"""
+Add token_revocations, so that revoking a user's tokens holds in every worker and across restarts
+
+Revision ID: f2b8d4a0c6e1
+Revises: e8c4a6b2d0f5
+Create Date: 2026-10-18 01:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4a0c6e1'
+down_revision = 'e8c4a6b2d0f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("token_revocations"):
+        op.create_table(
+            "token_revocations",
+            sa.Column("user_id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("revoked_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("user_id"),
+        )
+
+
+def downgrade():
+    op.drop_table("token_revocations")
@@ -0,0 +1,51 @@
+"""
+Add the submissions table, the queue of asynchronously graded submissions
+
+Revision ID: f7a3d9b5c1e8
+Revises: e5b1c7d9f3a2
+Create Date: 2026-10-17 21:10:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f7a3d9b5c1e8'
+down_revision = 'e5b1c7d9f3a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("submissions"):
+        return
+
+    op.create_table(
+        "submissions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("public_id", sa.String(length=32), nullable=False),
+        sa.Column("quiz_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("idempotency_key", sa.String(length=64), nullable=True),
+        sa.Column("answers", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=10), nullable=False),
+        sa.Column("score_id", sa.Integer(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("submitted_at", sa.DateTime(), nullable=False),
+        sa.Column("graded_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["quiz_id"], ["quizzes.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["score_id"], ["scores.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("public_id"),
+        sa.UniqueConstraint("score_id"),
+        sa.UniqueConstraint("user_id", "quiz_id", "idempotency_key", name="uq_submissions_idempotency_key"),
+    )
+    op.create_index("ix_submissions_quiz_id", "submissions", ["quiz_id"], unique=False)
+    op.create_index("ix_submissions_status_id", "submissions", ["status", "id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_submissions_status_id", table_name="submissions")
+    op.drop_index("ix_submissions_quiz_id", table_name="submissions")
+    op.drop_table("submissions")
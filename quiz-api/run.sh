@@ -64,6 +64,11 @@ function test:quick {
     run-tests -m "not slow" ${@:-"$THIS_DIR/tests/"}
 }
 
+# run the benchmarks, which are marked as `slow`, and print their results
+function benchmark {
+    uv run pytest -m slow -s ${@:-"$THIS_DIR/tests/benchmarks/"}
+}
+
 # execute tests against the installed package; assumes the wheel is already installed
 function test:ci {
     INSTALLED_PKG_DIR="$(python -c 'import quiz_api;\
@@ -0,0 +1,88 @@
+"""Flask CLI commands for maintaining the Quiz API database."""
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+from quiz_api.models.database import db
+from quiz_api.utils.activity import rebuild_activity_rollups
+from quiz_api.utils.leaderboard import rebuild_leaderboards
+from quiz_api.utils.question_totals import refresh_question_totals
+from quiz_api.utils.score_rollups import rebuild_score_rollups
+from quiz_api.utils.submissions import drain_submissions
+
+
+@click.command("recompute-question-totals")
+@click.option(
+    "--quiz-id", "quiz_ids", type=int, multiple=True, help="Quiz to recompute (repeatable). Defaults to all."
+)
+@with_appcontext
+def recompute_question_totals_command(quiz_ids: tuple[int, ...]) -> None:
+    """Recompute the stored question count and total points of quizzes from their questions."""
+    try:
+        refreshed = refresh_question_totals(*quiz_ids)
+        db.session.commit()
+        click.echo(f"Recomputed question totals for {refreshed} quiz(zes)")
+    finally:
+        db.session.close()
+
+
+@click.command("grade-submissions")
+@click.option("--batch-size", type=int, default=None, help="Submissions per transaction. Defaults to the config.")
+@with_appcontext
+def grade_submissions_command(batch_size: int | None) -> None:
+    """Grade every queued submission, e.g. those left over while no worker was running."""
+    batch_size = batch_size or current_app.config["SUBMISSION_BATCH_SIZE"]
+    try:
+        graded = 0
+        while processed := drain_submissions(batch_size):
+            graded += processed
+        click.echo(f"Graded {graded} submission(s)")
+    finally:
+        db.session.close()
+
+
+@click.command("rebuild-leaderboards")
+@click.option("--quiz-id", "quiz_ids", type=int, multiple=True, help="Quiz to rebuild (repeatable). Defaults to all.")
+@with_appcontext
+def rebuild_leaderboards_command(quiz_ids: tuple[int, ...]) -> None:
+    """Rebuild quiz leaderboards from the recorded scores."""
+    try:
+        entries = rebuild_leaderboards(*quiz_ids)
+        db.session.commit()
+        click.echo(f"Rebuilt leaderboards with {entries} entry(ies)")
+    finally:
+        db.session.close()
+
+
+@click.command("rebuild-score-rollups")
+@with_appcontext
+def rebuild_score_rollups_command() -> None:
+    """Rebuild the score rollups of the admin summary and the users' stats from the recorded scores."""
+    try:
+        quizzes = rebuild_score_rollups()
+        db.session.commit()
+        click.echo(f"Rebuilt score rollups of {quizzes} quiz(zes)")
+    finally:
+        db.session.close()
+
+
+@click.command("rebuild-activity-rollups")
+@with_appcontext
+def rebuild_activity_rollups_command() -> None:
+    """Rebuild the hourly and daily activity rollups of the admin metrics from the recorded scores and signups."""
+    try:
+        buckets = rebuild_activity_rollups()
+        db.session.commit()
+        click.echo(f"Rebuilt activity rollups of {buckets} bucket(s)")
+    finally:
+        db.session.close()
+
+
+def register_commands(app: Flask) -> None:
+    """Register the CLI commands with the app, e.g. `flask recompute-question-totals`."""
+    app.cli.add_command(recompute_question_totals_command)
+    app.cli.add_command(grade_submissions_command)
+    app.cli.add_command(rebuild_leaderboards_command)
+    app.cli.add_command(rebuild_score_rollups_command)
+    app.cli.add_command(rebuild_activity_rollups_command)
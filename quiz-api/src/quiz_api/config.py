@@ -1,11 +1,13 @@
 """Flask App Configuration."""
 
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 from typing import Any, Dict
 
 from dotenv import load_dotenv
+from sqlalchemy.pool import QueuePool
 
 # Load .env file at the start
 load_dotenv()
@@ -30,18 +32,85 @@ class Config:
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read-only engine for GET requests: a replica, or the same SQLite file (opened with query_only)
+    SQLALCHEMY_READ_DATABASE_URI = os.getenv("SQLALCHEMY_READ_DATABASE_URI")
+    # Connection pool of every engine, a process-local pool per worker
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "poolclass": QueuePool,
+        "pool_size": int(os.getenv("SQLALCHEMY_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("SQLALCHEMY_MAX_OVERFLOW", "10")),
+        "pool_timeout": 30,  # Seconds to wait for a free connection
+    }
+    # Applied in order as PRAGMAs on every new connection of a SQLite engine
+    SQLITE_PRAGMAS = {
+        "busy_timeout": 5000,  # Wait 5 seconds on busy before failing
+        "journal_mode": "WAL",  # Write-Ahead Logging, so readers do not block the writer
+        "synchronous": "NORMAL",  # Safe with WAL, and no fsync on every commit
+        "foreign_keys": "ON",  # Enforce referential integrity
+        "cache_size": -20000,  # Page cache of 20 MB (negative values are KiB)
+        "mmap_size": 268435456,  # Read through a 256 MB memory map
+        "temp_store": "MEMORY",  # Keep temporary tables and indices in memory
+    }
 
     # JWT settings
     JWT_SECRET_KEY = os.environ["JWT_SECRET_KEY"]
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_BLACKLIST_ENABLED = True  # Enable token blacklist
     JWT_BLACKLIST_TOKEN_CHECKS = ["access"]
+    # Seconds before a worker reads the token revocations again, so the longest a revocation takes in other workers
+    TOKEN_REVOCATION_CACHE_MAX_AGE = 5.0
 
     # Admin user settings
     ADMIN_USERNAME = os.environ["ADMIN_USERNAME"]
     ADMIN_EMAIL = os.environ["ADMIN_EMAIL"]
     ADMIN_PASSWORD = os.environ["ADMIN_PASSWORD"]
 
+    # Grading settings
+    ANSWER_KEY_CACHE_SIZE = 1024  # Cached quiz answer keys per worker, cleared when full
+    PAYLOAD_CACHE_SIZE = 256  # Cached serialized responses per cache and worker, cleared when full
+
+    # Leaderboard settings
+    LEADERBOARD_CACHE_SIZE = 64  # Cached quiz rankings per worker, cleared when full
+    LEADERBOARD_CACHE_MAX_AGE = 60.0  # Seconds before a cached ranking is rebuilt instead of updated
+
+    # Admin summary settings
+    PASS_MARK_PERCENT = 50  # Percentage of a quiz's points an attempt needs to pass
+
+    # Activity metrics settings
+    ACTIVITY_MAX_BUCKETS = 10_000  # Most hours or days one activity request may span, over a year of hours
+    ACTIVITY_DEFAULT_DAYS = 30  # Days shown when an activity request has no `from`
+
+    # Request coalescing settings
+    # Lock files that let one worker compute an expensive response while the others wait for it; unset to only
+    # coalesce the requests of each worker
+    SINGLE_FLIGHT_DIR = os.getenv("SINGLE_FLIGHT_DIR", str(Path(tempfile.gettempdir()) / "quiz-api-single-flight"))
+    SINGLE_FLIGHT_WAIT_TIMEOUT = 10.0  # Seconds to wait on another worker before computing the response anyway
+
+    # Submission settings
+    # Queue submissions and answer 202 Accepted, grading them in background threads instead of in the request
+    ASYNC_SUBMISSIONS = os.getenv("ASYNC_SUBMISSIONS", "false").lower() in ("1", "true", "yes")
+    SUBMISSION_GRADER_THREADS = 2  # Grader threads per worker, started by its first queued submission
+    SUBMISSION_BATCH_SIZE = 100  # Submissions graded per transaction
+    SUBMISSION_POLL_INTERVAL = 1.0  # Seconds between checks for submissions queued by other workers
+
+    # Group commit settings
+    # Apply the small writes of signups, submissions and profile updates from one writer thread per worker,
+    # committing the writes of concurrent requests together instead of one transaction per request
+    GROUP_COMMIT = os.getenv("GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+    GROUP_COMMIT_MAX_DELAY_MS = 5  # Milliseconds to collect more writes after the first one of a transaction
+    GROUP_COMMIT_MAX_BATCH = 64  # Writes per transaction
+
+    # Question import settings
+    QUESTION_IMPORT_BATCH_SIZE = 500  # Rows per INSERT of `/quizzes/<id>/questions/import`
+
+    # Attempt export settings
+    ATTEMPT_EXPORT_BATCH_SIZE = 1000  # Rows fetched and sent per chunk of `/quiz/attempts/export`
+
+    # Search settings
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND")  # "fts5", "postgres" or "memory"; defaults to the database's own
+    SEARCH_COUNT_CACHE_SIZE = 1024  # Cached match counts per app, cleared when full
+    SEARCH_APPROXIMATE_COUNT_CAP = 1000  # Stop counting matches here when an approximate total is requested
+
 
 class TestConfig(Config):
     """Test configuration."""
@@ -49,9 +118,13 @@ class TestConfig(Config):
     TESTING = True
     # Use a shared in-memory database
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"  # "sqlite:///:memory:?cache=shared&uri=true"
+    # The in-memory database lives in a single connection, which Flask-SQLAlchemy keeps in a StaticPool
+    SQLALCHEMY_ENGINE_OPTIONS: Dict[str, Any] = {}
     SECRET_KEY = "test-secret-key"
     JWT_SECRET_KEY = "test-jwt-secret-key"
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=1)  # Short expiry for tests
+    SINGLE_FLIGHT_DIR = None  # Coalesce within the test process only
+    SUBMISSION_GRADER_THREADS = 0  # Tests drain the submission queue themselves
 
 
 class DevelopmentConfig(Config):
@@ -59,15 +132,8 @@ class DevelopmentConfig(Config):
 
     DEBUG = True
     SQLITE_DB_DIR = str(ROOT_DIR / "database" / "quiz_master.db")
-    # SQLALCHEMY_DATABASE_URI = f"sqlite:///{SQLITE_DB_DIR}"
-    SQLALCHEMY_DATABASE_URI = (
-        f"sqlite:///{SQLITE_DB_DIR}"
-        f"?journal_mode=WAL"          # Write-Ahead Logging for better concurrency
-        f"&synchronous=NORMAL"        # Balance between safety and performance
-        f"&foreign_keys=ON"           # Enforce referential integrity
-        f"&locking_mode=NORMAL"       # Standard locking
-        f"&busy_timeout=5000"         # Wait 5 seconds on busy before failing
-    )
+    # The pysqlite driver ignores PRAGMAs in the URL, they are set from `SQLITE_PRAGMAS` on connect
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{SQLITE_DB_DIR}"
     SQLALCHEMY_ECHO = False  # Set True to Log SQL queries
 
 
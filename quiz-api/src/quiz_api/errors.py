@@ -7,6 +7,8 @@ from flask import Flask, current_app, jsonify
 from pydantic import ValidationError
 
 from quiz_api.models.database import db
+from quiz_api.utils.grading import InvalidAnswersError
+from quiz_api.utils.pagination import InvalidCursorError
 
 
 def register_error_handlers(app: Flask):
@@ -25,6 +27,16 @@ def register_error_handlers(app: Flask):
         current_app.logger.error(f"Pydantic validation error: {content}")
         return jsonify(content), HTTPStatus.BAD_REQUEST
 
+    @app.errorhandler(InvalidCursorError)
+    def handle_invalid_cursor(exc: InvalidCursorError):
+        current_app.logger.error(f"Invalid pagination cursor: {exc}")
+        return jsonify({"message": "Invalid cursor"}), HTTPStatus.BAD_REQUEST
+
+    @app.errorhandler(InvalidAnswersError)
+    def handle_invalid_answers(exc: InvalidAnswersError):
+        current_app.logger.error(f"Invalid quiz answers: {exc}")
+        return jsonify({"message": str(exc)}), HTTPStatus.BAD_REQUEST
+
     @app.errorhandler(HTTPStatus.NOT_FOUND)
     def handle_not_found(exc: Exception):
         current_app.logger.error(f"Resource not found: {exc}")
@@ -8,19 +8,22 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 
+from quiz_api.cli import register_commands
 from quiz_api.config import config
 from quiz_api.errors import register_error_handlers
-from quiz_api.models.database import db
+from quiz_api.models.database import db, init_db
 from quiz_api.routes.admin import admin_bp
 from quiz_api.routes.auth import auth_bp
 from quiz_api.routes.chapters import chapters_bp
+from quiz_api.routes.diagnostics import diagnostics_bp
 from quiz_api.routes.questions import questions_bp
 from quiz_api.routes.quiz_attempts import quiz_attempts_bp
 from quiz_api.routes.quiz_registration import user_quiz_bp
 from quiz_api.routes.quizzes import quiz_bp
+from quiz_api.routes.reports import reports_bp
 from quiz_api.routes.subjects import subjects_bp
-from quiz_api.utils.auth import init_admin, init_jwt
-from quiz_api.utils.fts import setup_fts
+from quiz_api.utils.auth import init_admin, init_jwt, init_token_revocations
+from quiz_api.utils.search_backends import init_search, setup_search
 
 
 def create_app(test_config: Optional[dict | object] = None) -> Flask:
@@ -46,8 +49,11 @@ def create_app(test_config: Optional[dict | object] = None) -> Flask:
     else:
         app.config.from_object(config[flask_env])
 
-    # Initialize the database
-    db.init_app(app)
+    # Initialize the database with a session per request, routing GET requests to the read engine if configured
+    init_db(app)
+
+    # Select the full-text search backend, from `SEARCH_BACKEND` or the database dialect
+    init_search(app)
 
     # Initialize Flask-Migrate for database migrations
     migrate = Migrate(app, db)
@@ -55,16 +61,22 @@ def create_app(test_config: Optional[dict | object] = None) -> Flask:
     # Initialize JWT Manager
     jwt = JWTManager(app)
     init_jwt(jwt)  # Initialize JWT blacklist
+    init_token_revocations(app)
 
     # Register error handlers
     register_error_handlers(app)
 
+    # Register CLI commands
+    register_commands(app)
+
     # Register CORS
     CORS(app, resources={r"/*": {"origins": "*"}})
 
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(diagnostics_bp)
+    app.register_blueprint(reports_bp)
     app.register_blueprint(subjects_bp)
     app.register_blueprint(chapters_bp)
     app.register_blueprint(quiz_bp)
@@ -82,7 +94,7 @@ app = create_app()
 with app.app_context():
     db.create_all()
     init_admin()  # Initialize admin user
-    setup_fts()  # Set up Full-Text Search
+    setup_search()  # Set up Full-Text Search
 
 
 if __name__ == "__main__":
@@ -1,6 +1,12 @@
 """Initialize the database."""
 
+from typing import Any, Callable
+
+from flask import Flask, has_app_context, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
 
 # from sqlalchemy.orm import DeclarativeBase
 
@@ -12,5 +18,91 @@ from flask_sqlalchemy import SQLAlchemy
 # # Initialize SQLAlchemy with the custom base class
 # db: "SQLAlchemy" = SQLAlchemy(model_class=Base)
 
+# Bind key of the optional read-only engine, configured with `SQLALCHEMY_READ_DATABASE_URI`
+READ_BIND_KEY = "read"
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the queries of read-only requests to the read engine, and everything else to the primary.
+
+    Once a session has written, it stays on the primary so that it reads its own writes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._has_written = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        """Select the read engine for queries of GET requests, otherwise defer to the bind key lookup."""
+        if bind is None and self._use_read_engine(clause):
+            return self._db.engines[READ_BIND_KEY]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_read_engine(self, clause) -> bool:
+        if self._flushing or isinstance(clause, UpdateBase):
+            self._has_written = True
+        if self._has_written or READ_BIND_KEY not in self._db.engines:
+            return False
+        return has_request_context() and request.method in READ_ONLY_METHODS
+
+
 # Initialize SQLAlchemy without a model class
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def _set_query_only(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def _sqlite_pragmas_listener(pragmas: dict[str, Any]) -> Callable[..., None]:
+    """Create a `connect` listener that applies the SQLite PRAGMAs to each new connection."""
+
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    return set_pragmas
+
+
+def init_db(app: Flask) -> None:
+    """
+    Initialize the database engines and a session per request.
+
+    Every new connection of a SQLite engine is tuned with the PRAGMAs of `SQLITE_PRAGMAS`.
+    If `SQLALCHEMY_READ_DATABASE_URI` is set, GET requests read through a separate engine: a replica, or the
+    primary SQLite file opened with `PRAGMA query_only` so readers never take the write lock.
+
+    Args:
+        app: The Flask application
+
+    """
+    read_uri = app.config.get("SQLALCHEMY_READ_DATABASE_URI")
+    if read_uri:
+        app.config["SQLALCHEMY_BINDS"] = {**(app.config.get("SQLALCHEMY_BINDS") or {}), READ_BIND_KEY: read_uri}
+
+    db.init_app(app)
+
+    # No models belong to the read bind, so `create_all` and migrations must not target it
+    db.metadatas.pop(READ_BIND_KEY, None)
+
+    set_pragmas = _sqlite_pragmas_listener(app.config.get("SQLITE_PRAGMAS") or {})
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != "sqlite":
+                continue
+            event.listen(engine, "connect", set_pragmas)
+            if bind_key == READ_BIND_KEY:
+                event.listen(engine, "connect", _set_query_only)
+
+    @app.teardown_request
+    def remove_session(exc: BaseException | None) -> None:
+        """End the request's session, discarding anything it did not commit."""
+        # A test client can tear down a preserved request after its app context is gone
+        if has_app_context():
+            db.session.remove()
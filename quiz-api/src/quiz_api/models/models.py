@@ -3,13 +3,19 @@
 from datetime import date, datetime, timedelta, timezone
 from typing import List
 
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, Index, PrimaryKeyConstraint, String, Text, UniqueConstraint, and_, text
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from quiz_api.models.database import db
 
 
+def duration_to_minutes(time_duration: str) -> int:
+    """Convert a 'hh:mm' duration to a number of minutes."""
+    hours, minutes = map(int, time_duration.split(":"))
+    return hours * 60 + minutes
+
+
 class User(db.Model):
     """User database model."""
 
@@ -27,6 +33,7 @@ class User(db.Model):
     # Relationships
     scores: Mapped[List["Score"]] = relationship(back_populates="user", cascade="all, delete-orphan")
     quiz_signups: Mapped[List["QuizSignup"]] = relationship(back_populates="user", cascade="all, delete-orphan")
+    stats: Mapped[List["UserStat"]] = relationship(cascade="all, delete-orphan", passive_deletes=True)
 
     # Helper property to access quizzes directly
     @hybrid_property
@@ -36,8 +43,8 @@ class User(db.Model):
 
     @hybrid_property
     def total_score_across_all_quizzes(self) -> int:
-        """Calculate the total score of the user across all quizzes."""
-        return sum(score.user_score for score in self.scores)
+        """Calculate the total score of the user across all quizzes, from their stats per subject."""
+        return sum(stat.score_sum for stat in self.stats)
 
 
 class Subject(db.Model):
@@ -78,12 +85,26 @@ class Quiz(db.Model):
     """Quiz database model."""
 
     __tablename__ = "quizzes"
+    # Serves keyset pages of a chapter's quizzes ordered by (date_of_quiz, id)
+    __table_args__ = (Index("ix_quizzes_chapter_id_date_of_quiz", "chapter_id", "date_of_quiz"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     chapter_id: Mapped[int] = mapped_column(ForeignKey("chapters.id"), nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
     date_of_quiz: Mapped[datetime] = mapped_column(nullable=False, index=True)
-    time_duration: Mapped[str] = mapped_column(String(10), nullable=False)  # 'hh:mm'
+    time_duration: Mapped[str] = mapped_column(String(10), nullable=False)  # 'hh:mm', kept for API compatibility
+    # Derived from date_of_quiz and time_duration whenever either is set, so status windows are index range scans
+    duration_minutes: Mapped[int] = mapped_column(nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
+    # Denormalized question totals, maintained by `quiz_api.utils.question_totals` on every question write
+    question_count: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    total_points: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    # Bumped along with the totals, so caches of a quiz's questions (e.g. answer keys) can tell they are stale
+    questions_version: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    # Bumped by every write to the quiz's leaderboard, whose entries are stamped with the version that wrote them
+    leaderboard_version: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    # The leaderboard version at which entries were last removed, so rankings cached before it are rebuilt
+    leaderboard_reset_version: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
     remarks: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.now(timezone.utc))
     updated_at: Mapped[datetime | None] = mapped_column(default=None, onupdate=datetime.now(timezone.utc))
@@ -100,25 +121,49 @@ class Quiz(db.Model):
         """Get users signed up for this quiz."""
         return [signup.user for signup in self.user_signups]
 
+    @validates("date_of_quiz", "time_duration")
+    def _sync_schedule(self, key: str, value):
+        """Keep `duration_minutes` and `ends_at` in sync with the start date and 'hh:mm' duration."""
+        date_of_quiz = value if key == "date_of_quiz" else self.date_of_quiz
+        time_duration = value if key == "time_duration" else self.time_duration
+        if time_duration:
+            self.duration_minutes = duration_to_minutes(time_duration)
+        if date_of_quiz is not None and self.duration_minutes is not None:
+            self.ends_at = date_of_quiz + timedelta(minutes=self.duration_minutes)
+        return value
+
     @hybrid_property
     def end_time(self) -> datetime:
         """Calculate the end datetime of the quiz."""
-        # Since date_of_quiz and time_duration is always needed, we don't need to check if it's None
-        # if self.time_duration and self.date_of_quiz:
-        hours, minutes = map(int, self.time_duration.split(":"))
-        end_time = self.date_of_quiz + timedelta(hours=hours, minutes=minutes)
-        return end_time.replace(tzinfo=timezone.utc)
-        # return None
+        return self.ends_at.replace(tzinfo=timezone.utc)
+
+    @end_time.inplace.expression
+    @classmethod
+    def _end_time_expression(cls):
+        """SQL expression for the end datetime of the quiz."""
+        return cls.ends_at
 
     @hybrid_property
     def total_quiz_score(self) -> int:
-        """Calculate the total score of the quiz."""
-        return sum(question.points for question in self.questions)
+        """Total points of the quiz's questions."""
+        return self.total_points
+
+    @total_quiz_score.inplace.expression
+    @classmethod
+    def _total_quiz_score_expression(cls):
+        """SQL expression for `total_quiz_score`."""
+        return cls.total_points.label("total_quiz_score")
 
     @hybrid_property
     def number_of_questions(self) -> int:
-        """Calculate the number of questions in the quiz."""
-        return len(self.questions)
+        """Number of questions in the quiz."""
+        return self.question_count
+
+    @number_of_questions.inplace.expression
+    @classmethod
+    def _number_of_questions_expression(cls):
+        """SQL expression for `number_of_questions`."""
+        return cls.question_count.label("number_of_questions")
 
     @hybrid_property
     def is_upcoming(self) -> bool:
@@ -131,6 +176,12 @@ class Quiz(db.Model):
         # Get current time in UTC
         return quiz_start > datetime.now(timezone.utc)
 
+    @is_upcoming.inplace.expression
+    @classmethod
+    def _is_upcoming_expression(cls):
+        """SQL expression for `is_upcoming`."""
+        return cls.date_of_quiz > datetime.now(timezone.utc)
+
     @hybrid_property
     def is_active(self) -> bool:
         """Check if the quiz is active."""
@@ -144,6 +195,13 @@ class Quiz(db.Model):
         # Get end time with timezone info
         return quiz_start <= datetime.now(timezone.utc) <= self.end_time
 
+    @is_active.inplace.expression
+    @classmethod
+    def _is_active_expression(cls):
+        """SQL expression for `is_active`."""
+        now = datetime.now(timezone.utc)
+        return and_(cls.date_of_quiz <= now, cls.end_time >= now)
+
 
 class Question(db.Model):
     """Question database model."""
@@ -151,7 +209,7 @@ class Question(db.Model):
     __tablename__ = "questions"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"), nullable=False)
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"), nullable=False, index=True)
     question_statement: Mapped[str] = mapped_column(Text, nullable=False)
     option1: Mapped[str] = mapped_column(Text, nullable=False)
     option2: Mapped[str] = mapped_column(Text, nullable=False)
@@ -168,12 +226,13 @@ class Score(db.Model):
     """Score database model."""
 
     __tablename__ = "scores"
+    __table_args__ = (Index("ix_scores_user_id_timestamp", "user_id", "timestamp"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"), nullable=False, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
     # timestamp <-- The time at which the score was recorded
-    timestamp: Mapped[datetime] = mapped_column(default=datetime.now(timezone.utc), index=False)
+    timestamp: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc), index=False)
     user_score: Mapped[int] = mapped_column(nullable=False)
     number_of_correct_answers: Mapped[int] = mapped_column(nullable=False)
 
@@ -192,7 +251,7 @@ class QuizSignup(db.Model):
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
     quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"), primary_key=True)
-    signup_time: Mapped[datetime] = mapped_column(default=datetime.now(timezone.utc))
+    signup_time: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
 
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="quiz_signups")
@@ -206,10 +265,155 @@ class QuestionAttempt(db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     score_id: Mapped[int] = mapped_column(ForeignKey("scores.id"), nullable=False, index=True)
-    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"), nullable=False)
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
     selected_option: Mapped[int | None] = mapped_column(nullable=True)  # 1-4 representing user's choice
     is_correct: Mapped[bool] = mapped_column(nullable=False)  # Whether the selected answer was correct
 
     # Relationships
     score: Mapped["Score"] = relationship(back_populates="question_attempts")
     question: Mapped["Question"] = relationship("Question")
+
+
+class LeaderboardEntry(db.Model):
+    """Best score of each user in a quiz, maintained by every graded submission and rebuildable from `scores`."""
+
+    __tablename__ = "leaderboard_entries"
+    __table_args__ = (
+        # Covers the top of a leaderboard: ranked by score, then by who reached it first
+        Index("ix_leaderboard_entries_ranking", "quiz_id", text("user_score DESC"), "timestamp", "user_id"),
+        # Entries changed since a leaderboard version, for refreshing the cached rankings
+        Index("ix_leaderboard_entries_quiz_id_version", "quiz_id", "version"),
+    )
+
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    user_score: Mapped[int] = mapped_column(nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(nullable=False)  # When the user first reached the score
+    score_id: Mapped[int] = mapped_column(ForeignKey("scores.id", ondelete="CASCADE"), nullable=False)
+    # The quiz's `leaderboard_version` when the entry was last written
+    version: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+
+
+class ScoreRollup:
+    """Running totals of the scores of a quiz, chapter or subject, from which the summary statistics are derived."""
+
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    score_sum: Mapped[int] = mapped_column(nullable=False, default=0)
+    score_sum_of_squares: Mapped[int] = mapped_column(nullable=False, default=0)
+    max_score: Mapped[int] = mapped_column(nullable=False, default=0)
+    passes: Mapped[int] = mapped_column(nullable=False, default=0)  # Attempts reaching `PASS_MARK_PERCENT`
+
+
+class QuizScoreRollup(ScoreRollup, db.Model):
+    """Score totals of a quiz, updated by every graded submission and rebuildable from `scores`."""
+
+    __tablename__ = "quiz_score_rollups"
+
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True)
+
+
+class ChapterScoreRollup(ScoreRollup, db.Model):
+    """Score totals of the quizzes of a chapter."""
+
+    __tablename__ = "chapter_score_rollups"
+
+    chapter_id: Mapped[int] = mapped_column(ForeignKey("chapters.id", ondelete="CASCADE"), primary_key=True)
+
+
+class SubjectScoreRollup(ScoreRollup, db.Model):
+    """Score totals of the quizzes of a subject."""
+
+    __tablename__ = "subject_score_rollups"
+
+    subject_id: Mapped[int] = mapped_column(ForeignKey("subjects.id", ondelete="CASCADE"), primary_key=True)
+
+
+class UserStat(db.Model):
+    """Score totals of a user in the quizzes of a subject, updated by every graded submission."""
+
+    __tablename__ = "user_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    subject_id: Mapped[int] = mapped_column(ForeignKey("subjects.id", ondelete="CASCADE"), primary_key=True)
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    score_sum: Mapped[int] = mapped_column(nullable=False, default=0)
+    # Scores as percentages of their quiz's points, summed for the average
+    percentage_sum: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    best_percentage: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    latest_quiz_id: Mapped[int | None] = mapped_column(ForeignKey("quizzes.id", ondelete="SET NULL"), nullable=True)
+    latest_percentage: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    latest_at: Mapped[datetime] = mapped_column(nullable=False)  # When the latest attempt was submitted
+
+
+class ActivityRollup:
+    """Activity counts of an hour or a day, from which the admin trend charts are drawn."""
+
+    granularity: Mapped[str] = mapped_column(String(4), primary_key=True)  # 'hour' or 'day'
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)  # Start of the hour or day, in UTC
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    answers: Mapped[int] = mapped_column(nullable=False, default=0)  # Question attempts of the graded submissions
+    signups: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class SiteActivityRollup(ActivityRollup, db.Model):
+    """Activity counts of all quizzes, updated by every signup and graded submission."""
+
+    __tablename__ = "site_activity_rollups"
+
+    # Users who signed up or submitted, counted once per bucket through `active_user_buckets`
+    active_users: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class QuizActivityRollup(ActivityRollup, db.Model):
+    """Activity counts of a quiz."""
+
+    __tablename__ = "quiz_activity_rollups"
+    # The quiz first, for the ranges of one quiz
+    __table_args__ = (PrimaryKeyConstraint("quiz_id", "granularity", "bucket_start"),)
+
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True)
+
+
+class ActiveUserBucket(db.Model):
+    """A user who was active in an hour or a day, so that they are counted once in its `active_users`."""
+
+    __tablename__ = "active_user_buckets"
+
+    granularity: Mapped[str] = mapped_column(String(4), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+
+class Submission(db.Model):
+    """A quiz submission queued for grading, when submissions are graded asynchronously."""
+
+    __tablename__ = "submissions"
+    __table_args__ = (
+        Index("ix_submissions_status_id", "status", "id"),
+        UniqueConstraint("user_id", "quiz_id", "idempotency_key", name="uq_submissions_idempotency_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Public ID of the submission, so that IDs do not reveal the number of submissions
+    public_id: Mapped[str] = mapped_column(String(32), unique=True, nullable=False)
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # `Idempotency-Key` header of the request, so that retries of a submission are queued once
+    idempotency_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    answers: Mapped[str] = mapped_column(Text, nullable=False)  # The validated `QuizAttemptSchema` as JSON
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="queued")  # queued, graded or failed
+    # The score recorded for the submission; unique, so that a submission is never applied twice
+    score_id: Mapped[int | None] = mapped_column(ForeignKey("scores.id", ondelete="SET NULL"), unique=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    submitted_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc), nullable=False)
+    graded_at: Mapped[datetime | None] = mapped_column(nullable=True)
+
+
+class TokenRevocation(db.Model):
+    """When the tokens issued to a user until then were revoked, shared by every worker and kept across restarts."""
+
+    __tablename__ = "token_revocations"
+
+    # No foreign key, so that the revocation outlives a deleted user
+    user_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    revoked_at: Mapped[datetime] = mapped_column(nullable=False)
@@ -19,7 +19,7 @@ the user's timezone or the server's timezone.
 """
 
 from datetime import date, datetime, timedelta, timezone
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
@@ -32,6 +32,101 @@ class SearchSchema(BaseModel):
     q: str = Field("", description="Search query string")
     limit: int = Field(10, ge=1, le=100, description="Maximum number of results to return")
     offset: int = Field(0, ge=0, description="Number of results to skip")
+    cursor: str | None = Field(
+        None, description="Opaque cursor from `next_cursor`; send it empty to page by cursor instead of offset"
+    )
+    approximate_total: bool = Field(False, description="Stop counting matches at a cap, for very broad prefix queries")
+
+    @field_validator("q", mode="after")
+    @classmethod
+    def normalize_query(cls, q: str) -> str:
+        """Collapse whitespace in the search query."""
+        return " ".join(q.split())
+
+
+class CursorPaginationSchema(BaseModel):
+    """Schema for opt-in cursor pagination of list endpoints that otherwise return every row."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    cursor: str | None = Field(None, description="Opaque cursor returned as `next_cursor` by the previous page")
+    limit: int | None = Field(None, ge=1, le=100, description="Maximum number of results to return")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the client asked for a page instead of the full list."""
+        return self.cursor is not None or self.limit is not None
+
+    @property
+    def page_size(self) -> int:
+        """Number of results per page in cursor mode."""
+        return self.limit or 20
+
+
+class PaginationSchema(BaseModel):
+    """Schema for optional pagination of list endpoints."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    limit: int | None = Field(None, ge=1, le=100, description="Maximum number of results to return")
+    offset: int = Field(0, ge=0, description="Number of results to skip")
+
+
+class QuizListingSchema(PaginationSchema):
+    """Schema for filtering the upcoming, ongoing and past quiz listings."""
+
+    starts_within_hours: int | None = Field(None, ge=1, description="Only quizzes starting within this many hours")
+    ended_since: datetime | None = Field(None, description="Only quizzes that ended at or after this time")
+
+    @field_validator("ended_since", mode="after")
+    @classmethod
+    def convert_to_utc(cls, dt: datetime | None) -> datetime | None:
+        """Convert a datetime to UTC with explicit timezone information."""
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc)
+
+
+class AttemptHistorySchema(BaseModel):
+    """Schema for paging through a user's quiz attempt history."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    cursor: str | None = Field(None, description="Opaque cursor returned as `next_cursor` by the previous page")
+    limit: int = Field(20, ge=1, le=100, description="Maximum number of results to return")
+    from_date: datetime | None = Field(None, description="Only attempts made at or after this time")
+    to_date: datetime | None = Field(None, description="Only attempts made before this time")
+
+    @field_validator("from_date", "to_date", mode="after")
+    @classmethod
+    def convert_to_utc(cls, dt: datetime | None) -> datetime | None:
+        """Convert a datetime to UTC with explicit timezone information."""
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc)
+
+
+class AttemptExportSchema(BaseModel):
+    """Schema for the query parameters of a user's attempt export."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    from_date: datetime | None = Field(None, description="Only attempts made at or after this time")
+    to_date: datetime | None = Field(None, description="Only attempts made before this time")
+
+    @field_validator("from_date", "to_date", mode="after")
+    @classmethod
+    def convert_to_utc(cls, dt: datetime | None) -> datetime | None:
+        """Convert a datetime to UTC with explicit timezone information."""
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc)
 
 
 class UserSchema(BaseModel):
@@ -85,6 +180,12 @@ class UserUpdateSchema(BaseModel):
             raise ValueError("Invalid date format. Use DD/MM/YYYY or DD-MM-YYYY or YYYY-MM-DD or YYYY/MM/DD")  # pylint: disable=raise-missing-from # noqa: B904
 
 
+class AdminUserUpdateSchema(UserUpdateSchema):
+    """Schema for an admin updating a user, which may also change their role."""
+
+    role: Optional[str] = Field(None, pattern="^(admin|user)$")
+
+
 class SubjectSchema(BaseModel):
     """Schema for subject data validation."""
 
@@ -245,6 +346,52 @@ class QuizAttemptSchema(BaseModel):
 
     answers: list[QuizAnswerSchema]
 
+    @field_validator("answers", mode="after")
+    @classmethod
+    def answer_each_question_once(cls, answers: list[QuizAnswerSchema]) -> list[QuizAnswerSchema]:
+        """Reject answering a question more than once, which would score it more than once."""
+        question_ids = [answer.question_id for answer in answers]
+        if len(set(question_ids)) != len(question_ids):
+            raise ValueError("Each question can only be answered once")
+        return answers
+
+
+class LeaderboardSchema(BaseModel):
+    """Schema for the query parameters of a quiz leaderboard."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    limit: int = Field(10, ge=1, le=100, description="Number of top entries to return")
+
+
+class AdminSummarySchema(BaseModel):
+    """Schema for the query parameters of the admin summary."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    subject_id: Optional[int] = Field(None, gt=0, description="Only summarize this subject")
+
+
+class ActivityMetricsSchema(BaseModel):
+    """Schema for the query parameters of the admin activity metrics."""
+
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+    from_date: datetime | None = Field(None, alias="from", description="Time in the first bucket")
+    to_date: datetime | None = Field(None, alias="to", description="Time in the last bucket, defaults to now")
+    granularity: Literal["hour", "day"] = Field("day", description="Size of the buckets")
+    quiz_id: Optional[int] = Field(None, gt=0, description="Only count the activity of this quiz")
+
+    @field_validator("from_date", "to_date", mode="after")
+    @classmethod
+    def convert_to_utc(cls, dt: datetime | None) -> datetime | None:
+        """Convert a datetime to UTC with explicit timezone information."""
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc)
+
 
 class QuizSignupSchema(BaseModel):
     """Schema for quiz signup."""
@@ -4,116 +4,120 @@ from http import HTTPMethod, HTTPStatus
 
 from flask import Blueprint, jsonify, request
 from flask.typing import ResponseReturnValue
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import select
 
 from quiz_api.models.database import db
-from quiz_api.models.models import User
-from quiz_api.models.schemas import SearchSchema, UserSchema, UserUpdateSchema
-from quiz_api.utils.search import search_users
+from quiz_api.models.models import Chapter, Quiz, Score, User
+from quiz_api.models.schemas import AdminUserUpdateSchema, CursorPaginationSchema, SearchSchema, UserSchema
+from quiz_api.utils import admin_required, revoke_user_tokens
+from quiz_api.utils.leaderboard import reset_leaderboard_versions
+from quiz_api.utils.pagination import paginate_by_keyset
+from quiz_api.utils.score_rollups import (
+    refresh_chapter_rollups,
+    refresh_quiz_rollups,
+    refresh_subject_rollups,
+    user_stat_summary,
+    user_stat_totals,
+)
+from quiz_api.utils.search import count_search_matches, paginate_search, search_users
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin/users")
+NO_STATS = user_stat_summary(None, None, None, None, None)
 
 
 @admin_bp.route("", methods=[HTTPMethod.GET])
-@jwt_required()
+@admin_required()
 def get_all_users() -> ResponseReturnValue:
-    """Get all users (Admin only)."""
-    try:
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
+    """Get all users, or one page of them when `cursor` or `limit` is given (Admin only)."""
+    pagination = CursorPaginationSchema(**request.args)
+    if pagination.enabled:
+        users, next_cursor = paginate_by_keyset(User.query, (User.id,), pagination.page_size, cursor=pagination.cursor)
+    else:
         users = User.query.all()
-        return (
-            jsonify(
-                [
-                    {
-                        "id": user.id,
-                        "username": user.username,
-                        "email": user.email,
-                        "full_name": user.full_name,
-                        "role": user.role,
-                        "dob": user.dob.strftime("%d/%m/%Y") if user.dob else None,
-                        "joined_at": user.joined_at.isoformat(),
-                    }
-                    for user in users
-                ]
-            ),
-            HTTPStatus.OK,
-        )
-    finally:
-        db.session.close()
+    # Totals of the listed users from their precomputed stats, rather than from their scores
+    stats = user_stat_totals(user.id for user in users) if pagination.enabled else user_stat_totals()
+    users_list = [
+        {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "full_name": user.full_name,
+            "role": user.role,
+            "dob": user.dob.strftime("%d/%m/%Y") if user.dob else None,
+            "joined_at": user.joined_at.isoformat(),
+            "stats": stats.get(user.id, NO_STATS),
+        }
+        for user in users
+    ]
+
+    if pagination.enabled:
+        return jsonify({"items": users_list, "next_cursor": next_cursor, "limit": pagination.page_size}), HTTPStatus.OK
+    return jsonify(users_list), HTTPStatus.OK
 
 
 @admin_bp.route("/<int:user_id>", methods=[HTTPMethod.GET])
-@jwt_required()
+@admin_required()
 def get_user(user_id: int) -> ResponseReturnValue:
     """Get a specific user's details (Admin only)."""
-    try:
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
-        user: User | None = db.session.get(User, user_id)
-        if not user:
-            return jsonify({"message": "User not found"}), HTTPStatus.NOT_FOUND
-
-        return (
-            jsonify(
-                {
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email,
-                    "full_name": user.full_name,
-                    "role": user.role,
-                    "dob": user.dob.strftime("%d/%m/%Y") if user.dob else None,
-                    "joined_at": user.joined_at.isoformat(),
-                }
-            ),
-            HTTPStatus.OK,
-        )
-    finally:
-        db.session.close()
+    user: User | None = db.session.get(User, user_id)
+    if not user:
+        return jsonify({"message": "User not found"}), HTTPStatus.NOT_FOUND
+
+    return (
+        jsonify(
+            {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "full_name": user.full_name,
+                "role": user.role,
+                "dob": user.dob.strftime("%d/%m/%Y") if user.dob else None,
+                "joined_at": user.joined_at.isoformat(),
+            }
+        ),
+        HTTPStatus.OK,
+    )
 
 
 @admin_bp.route("/<int:user_id>", methods=[HTTPMethod.DELETE])
-@jwt_required()
+@admin_required()
 def delete_user(user_id: int) -> ResponseReturnValue:
     """Delete a user (Admin only)."""
-    try:
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
-        user: User | None = db.session.get(User, user_id)
-        if not user:
-            return jsonify({"message": "User not found"}), HTTPStatus.NOT_FOUND
-
-        db.session.delete(user)
-        db.session.commit()
-        return jsonify({"message": "User deleted successfully"}), HTTPStatus.OK
-    finally:
-        db.session.close()
+    user: User | None = db.session.get(User, user_id)
+    if not user:
+        return jsonify({"message": "User not found"}), HTTPStatus.NOT_FOUND
+
+    attempted = db.session.execute(
+        select(Quiz.id, Quiz.chapter_id, Chapter.subject_id)
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .where(Quiz.id.in_(select(Score.quiz_id).where(Score.user_id == user_id)))
+    ).all()
+    db.session.delete(user)
+    db.session.flush()
+    # The user's scores are deleted with them, so the rollups of the quizzes they attempted are computed again.
+    # Their own stats and leaderboard entries are deleted by the database, and cached rankings rebuilt without them.
+    if attempted:
+        quiz_ids, chapter_ids, subject_ids = (set(ids) for ids in zip(*attempted))
+        reset_leaderboard_versions(*quiz_ids)
+        refresh_quiz_rollups(*quiz_ids)
+        refresh_chapter_rollups(*chapter_ids)
+        refresh_subject_rollups(*subject_ids)
+    # Tokens are authorized from their claims, so a deleted user's tokens must stop working explicitly
+    revoke_user_tokens(user_id)
+    db.session.commit()
+    return jsonify({"message": "User deleted successfully"}), HTTPStatus.OK
 
 
 @admin_bp.route("/<int:user_id>", methods=[HTTPMethod.PATCH])
-@jwt_required()
+@admin_required()
 def update_user(user_id: int) -> ResponseReturnValue:
     """Update a user's details (Admin only)."""
     try:
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
         user: User | None = db.session.get(User, user_id)
         if not user:
             return jsonify({"message": "User not found"}), HTTPStatus.NOT_FOUND
 
-        update_data = UserUpdateSchema(**request.get_json())
+        update_data = AdminUserUpdateSchema(**request.get_json())
 
         # Check username uniqueness if it's being updated
         if update_data.username and update_data.username != user.username:
@@ -127,71 +131,80 @@ def update_user(user_id: int) -> ResponseReturnValue:
             user.full_name = update_data.full_name
         if update_data.dob:
             user.dob = update_data.dob
+        if update_data.role is not None and update_data.role != user.role:
+            user.role = update_data.role
+            # Outstanding tokens carry the old role in their claims
+            revoke_user_tokens(user_id)
 
         db.session.commit()
         return jsonify({"message": "User updated successfully"}), HTTPStatus.OK
 
     except ValueError as e:
         return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
-    finally:
-        db.session.close()
 
 
 @admin_bp.route("/search", methods=[HTTPMethod.GET])
-@jwt_required()
+@admin_required()
 def search_users_endpoint():
     """Search users (Admin only)."""
-    try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
-        search_params = SearchSchema(**request.args)
-        query = search_params.q
-
-        if not query:
-            # Return all users if no query
+    search_params = SearchSchema(**request.args)
+    query = search_params.q
+
+    next_cursor = None
+    if not query:
+        # Return all users if no query
+        total, total_is_approximate = User.query.count(), False
+        if search_params.cursor is None:
             users = User.query.limit(search_params.limit).offset(search_params.offset).all()
-            users_list = [
-                {
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email,
-                    "full_name": user.full_name,
-                    "role": user.role,
-                    "dob": user.dob.strftime("%d/%m/%Y") if user.dob else None,
-                    "joined_at": user.joined_at.isoformat(),
-                }
-                for user in users
-            ]
         else:
-            # Use FTS to search
-            results = search_users(query, limit=search_params.limit, offset=search_params.offset)
-
-            # Format results
-            users_list = [
-                {
-                    "id": row[0],
-                    "username": row[1],
-                    "full_name": row[3],  # idx 2 is password, idx 3 is full name
-                    "dob": row[4] if isinstance(row[4], str) else row[4].strftime("%d/%m/%Y") if row[4] else None,
-                    "email": row[5],
-                    "role": row[6],
-                    "joined_at": row[7] if isinstance(row[7], str) else row[7].isoformat() if row[7] else None,
-                }
-                for row in results
-            ]
-
-        # Return with metadata
-        response = {
-            "items": users_list,
-            "total": len(users_list),
-            "limit": search_params.limit,
-            "offset": search_params.offset,
-        }
-
-        return jsonify(response), HTTPStatus.OK
-    finally:
-        db.session.close()
+            users, next_cursor = paginate_by_keyset(
+                User.query, (User.id,), search_params.limit, cursor=search_params.cursor
+            )
+        users_list = [
+            {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "full_name": user.full_name,
+                "role": user.role,
+                "dob": user.dob.strftime("%d/%m/%Y") if user.dob else None,
+                "joined_at": user.joined_at.isoformat(),
+            }
+            for user in users
+        ]
+    else:
+        # Use FTS to search
+        results, next_cursor = paginate_search(
+            search_users,
+            query,
+            limit=search_params.limit,
+            offset=search_params.offset,
+            cursor=search_params.cursor,
+        )
+        total, total_is_approximate = count_search_matches("users", query, approximate=search_params.approximate_total)
+
+        # Format results
+        users_list = [
+            {
+                "id": row[0],
+                "username": row[1],
+                "full_name": row[3],  # idx 2 is password, idx 3 is full name
+                "dob": row[4] if isinstance(row[4], str) else row[4].strftime("%d/%m/%Y") if row[4] else None,
+                "email": row[5],
+                "role": row[6],
+                "joined_at": row[7] if isinstance(row[7], str) else row[7].isoformat() if row[7] else None,
+            }
+            for row in results
+        ]
+
+    # Return with metadata
+    response = {
+        "items": users_list,
+        "total": total,
+        "total_is_approximate": total_is_approximate,
+        "limit": search_params.limit,
+        "offset": search_params.offset,
+        "next_cursor": next_cursor,
+    }
+
+    return jsonify(response), HTTPStatus.OK
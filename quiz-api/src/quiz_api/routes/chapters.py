@@ -10,39 +10,32 @@ from flask import (
     jsonify,
     request,
 )
-from flask_jwt_extended import (
-    get_jwt_identity,
-    jwt_required,
-)
 
 from quiz_api.models.database import db
 from quiz_api.models.models import (
     Chapter,
     Subject,
-    User,
 )
 from quiz_api.models.schemas import (
     ChapterSchema,
     ChapterUpdateSchema,
+    CursorPaginationSchema,
     SearchSchema,
 )
-from quiz_api.utils.search import search_chapters
+from quiz_api.utils import admin_required
+from quiz_api.utils.pagination import paginate_by_keyset
+from quiz_api.utils.score_rollups import refresh_subject_rollups, refresh_user_stats
+from quiz_api.utils.search import count_search_matches, paginate_search, search_chapters
 
 # Define Blueprint
 chapters_bp = Blueprint("chapters", __name__)
 
 
 @chapters_bp.route("/subjects/<int:subject_id>/chapters", methods=[HTTPMethod.POST])
-@jwt_required()
+@admin_required()
 def create_chapter(subject_id: int):
     """Create a new chapter (Admin only)."""
     try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
         # Check if subject exists
         subject: Subject | None = db.session.get(Subject, subject_id)
         if not subject:
@@ -76,20 +69,26 @@ def create_chapter(subject_id: int):
         return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         raise
-    finally:
-        db.session.close()
 
 
 @chapters_bp.route("/subjects/<int:subject_id>/chapters", methods=[HTTPMethod.GET])
 def get_subject_chapters(subject_id: int):
-    """Get all chapters under a subject."""
+    """Get all chapters under a subject, or one page of them when `cursor` or `limit` is given."""
     try:
+        pagination = CursorPaginationSchema(**request.args)
+
         # Check if subject exists
         subject: Subject | None = db.session.get(Subject, subject_id)
         if not subject:
             return jsonify({"message": "Subject not found"}), HTTPStatus.NOT_FOUND
 
-        chapters = Chapter.query.filter_by(subject_id=subject_id).all()
+        query = Chapter.query.filter_by(subject_id=subject_id)
+        if pagination.enabled:
+            chapters, next_cursor = paginate_by_keyset(
+                query, (Chapter.id,), pagination.page_size, cursor=pagination.cursor
+            )
+        else:
+            chapters = query.all()
         chapters_list = [
             {
                 "id": chapter.id,
@@ -102,11 +101,13 @@ def get_subject_chapters(subject_id: int):
             for chapter in chapters
         ]
 
+        if pagination.enabled:
+            return jsonify(
+                {"items": chapters_list, "next_cursor": next_cursor, "limit": pagination.page_size}
+            ), HTTPStatus.OK
         return jsonify(chapters_list), HTTPStatus.OK
     except Exception as e:
         raise
-    finally:
-        db.session.close()
 
 
 @chapters_bp.route("/chapters/<int:chapter_id>", methods=[HTTPMethod.GET])
@@ -128,21 +129,13 @@ def get_chapter(chapter_id: int):
         return jsonify(response), HTTPStatus.OK
     except Exception as e:
         raise
-    finally:
-        db.session.close()
 
 
 @chapters_bp.route("/chapters/<int:chapter_id>", methods=[HTTPMethod.PATCH])
-@jwt_required()
+@admin_required()
 def update_chapter(chapter_id: int):
     """Update a chapter's details (Admin only)."""
     try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
         chapter: Chapter | None = db.session.get(Chapter, chapter_id)
         if not chapter:
             return jsonify({"message": "Chapter not found"}), HTTPStatus.NOT_FOUND
@@ -162,32 +155,27 @@ def update_chapter(chapter_id: int):
         return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         raise
-    finally:
-        db.session.close()
 
 
 @chapters_bp.route("/chapters/<int:chapter_id>", methods=[HTTPMethod.DELETE])
-@jwt_required()
+@admin_required()
 def delete_chapter(chapter_id: int):
     """Delete a chapter (Admin only)."""
     try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
         chapter: Chapter | None = db.session.get(Chapter, chapter_id)
         if not chapter:
             return jsonify({"message": "Chapter not found"}), HTTPStatus.NOT_FOUND
 
+        subject_id = chapter.subject_id
         db.session.delete(chapter)
+        db.session.flush()
+        # The chapter's rollup is deleted with it, so the totals of its subject are combined again
+        refresh_subject_rollups(subject_id)
+        refresh_user_stats(subject_id)
         db.session.commit()
         return jsonify({"message": "Chapter deleted successfully"}), HTTPStatus.OK
     except Exception as e:
         raise
-    finally:
-        db.session.close()
 
 
 @chapters_bp.route("/subjects/<int:subject_id>/chapters/search", methods=[HTTPMethod.GET])
@@ -202,14 +190,17 @@ def search_subject_chapters(subject_id: int):
         if not subject:
             return jsonify({"message": "Subject not found"}), HTTPStatus.NOT_FOUND
 
+        next_cursor = None
         if not query:
             # Return all chapters for this subject if no query
-            chapters = (
-                Chapter.query.filter_by(subject_id=subject_id)
-                .limit(search_params.limit)
-                .offset(search_params.offset)
-                .all()
-            )
+            chapters_query = Chapter.query.filter_by(subject_id=subject_id)
+            total, total_is_approximate = chapters_query.count(), False
+            if search_params.cursor is None:
+                chapters = chapters_query.limit(search_params.limit).offset(search_params.offset).all()
+            else:
+                chapters, next_cursor = paginate_by_keyset(
+                    chapters_query, (Chapter.id,), search_params.limit, cursor=search_params.cursor
+                )
             chapters_list = [
                 {
                     "id": chapter.id,
@@ -222,10 +213,19 @@ def search_subject_chapters(subject_id: int):
                 for chapter in chapters
             ]
         else:
-            # Use FTS to search chapters
-            results = search_chapters(query, limit=search_params.limit, offset=search_params.offset)
+            # Use FTS to search chapters of this subject
+            results, next_cursor = paginate_search(
+                search_chapters,
+                query,
+                limit=search_params.limit,
+                offset=search_params.offset,
+                cursor=search_params.cursor,
+                subject_id=subject_id,
+            )
+            total, total_is_approximate = count_search_matches(
+                "chapters", query, approximate=search_params.approximate_total, subject_id=subject_id
+            )
 
-            # Filter results to only include chapters from this subject
             chapters_list = [
                 {
                     "id": row[0],
@@ -236,19 +236,18 @@ def search_subject_chapters(subject_id: int):
                     "updated_at": row[5] if isinstance(row[5], str) else row[5].isoformat() if row[5] else None,
                 }
                 for row in results
-                if row[3] == subject_id
             ]
 
         # Return with metadata
         response = {
             "items": chapters_list,
-            "total": len(chapters_list),
+            "total": total,
+            "total_is_approximate": total_is_approximate,
             "limit": search_params.limit,
             "offset": search_params.offset,
+            "next_cursor": next_cursor,
         }
 
         return jsonify(response), HTTPStatus.OK
     except Exception as e:
         raise
-    finally:
-        db.session.close()
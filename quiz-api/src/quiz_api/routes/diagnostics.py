@@ -0,0 +1,53 @@
+"""Admin Diagnostics Routes."""
+
+import os
+from http import HTTPMethod, HTTPStatus
+
+from flask import Blueprint, current_app, jsonify
+from flask.typing import ResponseReturnValue
+
+from quiz_api.models.database import db
+from quiz_api.utils import admin_required
+from quiz_api.utils.diagnostics import engine_diagnostics
+from quiz_api.utils.grading import get_answer_key_cache
+from quiz_api.utils.group_commit import get_group_commit_writer
+from quiz_api.utils.leaderboard import get_leaderboard_cache
+from quiz_api.utils.serialized_payloads import get_payload_cache
+from quiz_api.utils.single_flight import get_single_flight
+
+diagnostics_bp = Blueprint("diagnostics", __name__, url_prefix="/admin/diagnostics")
+
+
+@diagnostics_bp.route("/database", methods=[HTTPMethod.GET])
+@admin_required()
+def get_database_diagnostics() -> ResponseReturnValue:
+    """
+    Get the effective SQLite PRAGMAs and connection pool stats of each engine, and the group commit stats (Admin only).
+
+    Pools and connections are per process, so the report is for the worker that served the request.
+    """
+    pragma_names = [*current_app.config.get("SQLITE_PRAGMAS", {}), "query_only"]
+    engines = {
+        bind_key or "default": engine_diagnostics(engine, pragma_names) for bind_key, engine in db.engines.items()
+    }
+    group_commit = get_group_commit_writer().stats() if current_app.config["GROUP_COMMIT"] else None
+    return jsonify({"worker": {"pid": os.getpid()}, "engines": engines, "group_commit": group_commit}), HTTPStatus.OK
+
+
+@diagnostics_bp.route("/caches", methods=[HTTPMethod.GET])
+@admin_required()
+def get_cache_metrics() -> ResponseReturnValue:
+    """
+    Get the size and hit rate of the in-process caches, and the counts of coalesced requests (Admin only).
+
+    Caches are per process, so the metrics are for the worker that served the request.
+    """
+    caches = {
+        "answer_keys": get_answer_key_cache().stats(),
+        "quiz_attempt_payloads": get_payload_cache("quiz_attempts").stats(),
+        "leaderboards": get_leaderboard_cache().stats(),
+    }
+    return (
+        jsonify({"worker": {"pid": os.getpid()}, "caches": caches, "single_flight": get_single_flight().stats()}),
+        HTTPStatus.OK,
+    )
@@ -2,185 +2,224 @@
 
 from http import HTTPMethod, HTTPStatus
 
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy import delete
 
 from quiz_api.models.database import db
-from quiz_api.models.models import Question, Quiz, User
-from quiz_api.models.schemas import MultipleQuestionsSchema, QuestionSchema, QuestionUpdateSchema
+from quiz_api.models.models import Question, QuestionAttempt, Quiz
+from quiz_api.models.schemas import (
+    CursorPaginationSchema,
+    MultipleQuestionsSchema,
+    QuestionSchema,
+    QuestionUpdateSchema,
+)
+from quiz_api.utils import admin_required, get_current_role
+from quiz_api.utils.pagination import paginate_by_keyset
+from quiz_api.utils.question_import import detect_import_format, import_questions
+from quiz_api.utils.question_totals import refresh_question_totals
+from quiz_api.utils.single_flight import get_single_flight
 
 questions_bp: Blueprint = Blueprint("questions", __name__)
 
 
 @questions_bp.route("/quizzes/<int:quiz_id>/questions", methods=[HTTPMethod.POST])
-@jwt_required()
+@admin_required()
 def create_question(quiz_id: int):
     """Create one or more new questions under a quiz. (Admin only)"""
-    try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
-        # Verify quiz exists
-        quiz: Quiz | None = db.session.get(Quiz, quiz_id)
-        if not quiz:
-            return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
-
-        # Validate request data - always expect a list of questions
-        data = MultipleQuestionsSchema(**request.get_json())
-        created_questions = []
-
-        for question_data in data.questions:
-            question = Question(
-                quiz_id=quiz_id,
-                question_statement=question_data.question_statement,
-                option1=question_data.option1,
-                option2=question_data.option2,
-                option3=question_data.option3,
-                option4=question_data.option4,
-                correct_option=question_data.correct_option,
-                points=question_data.points,
-            )
-            db.session.add(question)
-            created_questions.append(question)
-
-        db.session.commit()
-
-        return (
-            jsonify({"message": "Question(s) created successfully"}),
-            HTTPStatus.CREATED,
+    # Verify quiz exists
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    # Validate request data - always expect a list of questions
+    data = MultipleQuestionsSchema(**request.get_json())
+    created_questions = []
+
+    for question_data in data.questions:
+        question = Question(
+            quiz_id=quiz_id,
+            question_statement=question_data.question_statement,
+            option1=question_data.option1,
+            option2=question_data.option2,
+            option3=question_data.option3,
+            option4=question_data.option4,
+            correct_option=question_data.correct_option,
+            points=question_data.points,
         )
-    finally:
-        db.session.close()
-
+        db.session.add(question)
+        created_questions.append(question)
+
+    refresh_question_totals(quiz_id)
+    db.session.commit()
+
+    return (
+        jsonify({"message": "Question(s) created successfully"}),
+        HTTPStatus.CREATED,
+    )
+
+
+@questions_bp.route("/quizzes/<int:quiz_id>/questions/import", methods=[HTTPMethod.POST])
+@admin_required()
+def import_quiz_questions(quiz_id: int):
+    """
+    Import questions under a quiz from a CSV or NDJSON upload. (Admin only)
+
+    The upload is either a multipart `file` field or the raw request body. Its format comes from the `format`
+    argument, else the file extension or MIME type. Columns or keys are the fields of `QuestionSchema`, and
+    questions whose statement is already in the quiz are skipped.
+    """
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("file")
+        if upload is None:
+            return jsonify({"message": "No file uploaded"}), HTTPStatus.BAD_REQUEST
+        stream, filename, mimetype = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, mimetype = request.stream, None, request.mimetype
+
+    import_format = detect_import_format(request.args.get("format"), filename, mimetype)
+    if import_format is None:
+        return jsonify({"message": "Upload a CSV or NDJSON file"}), HTTPStatus.BAD_REQUEST
 
-@questions_bp.route("/quizzes/<int:quiz_id>/questions", methods=[HTTPMethod.GET])
-@jwt_required()
-def get_quiz_questions(quiz_id: int):
-    """Get all questions under a quiz."""
     try:
-        # Get current user
-        current_user_id = int(get_jwt_identity())
-        current_user: User = db.session.get(User, current_user_id)
+        report = import_questions(quiz_id, stream, import_format, current_app.config["QUESTION_IMPORT_BATCH_SIZE"])
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({"message": "Upload must be UTF-8 encoded"}), HTTPStatus.BAD_REQUEST
+    db.session.commit()
 
-        # Verify quiz exists
-        quiz: Quiz | None = db.session.get(Quiz, quiz_id)
-        if not quiz:
-            return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+    status = HTTPStatus.CREATED if report["imported"] else HTTPStatus.OK
+    return jsonify({"message": "Questions imported", **report}), status
 
-        # Only past quiz questions are allowed to be seen by a normal user via this endpoint
-        if current_user.role == "user" and quiz.is_active:
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
 
-        questions = Question.query.filter_by(quiz_id=quiz_id).all()
-        question_dict = [
-            {
-                "id": question.id,
-                "question_statement": question.question_statement,
-                "option1": question.option1,
-                "option2": question.option2,
-                "option3": question.option3,
-                "option4": question.option4,
-                "correct_option": question.correct_option,
-                "points": question.points,
-            }
-            for question in questions
-        ]
-        response = {
-            "questions": question_dict,
-            "quiz_id": quiz_id,
-            "quiz_name": quiz.name,
-            "total_quiz_score": quiz.total_quiz_score,
-            "number_of_questions": quiz.number_of_questions,
-            "chapter_id": quiz.chapter_id,
-            "chapter_name": quiz.chapter.name,
-            "subject_id": quiz.chapter.subject_id,
-            "subject_name": quiz.chapter.subject.name,
+@questions_bp.route("/quizzes/<int:quiz_id>/questions", methods=[HTTPMethod.GET])
+@jwt_required()
+def get_quiz_questions(quiz_id: int):
+    """Get all questions under a quiz, or one page of them when `cursor` or `limit` is given."""
+    pagination = CursorPaginationSchema(**request.args)
+
+    # Verify quiz exists
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    # Only past quiz questions are allowed to be seen by a normal user via this endpoint
+    if get_current_role() == "user" and quiz.is_active:
+        return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
+
+    # Concurrent requests for the same page, e.g. when results are released, share one query
+    body = get_single_flight().do(
+        f"quiz-questions:{quiz_id}:{pagination.model_dump_json()}",
+        lambda: current_app.json.dumps(_quiz_questions_payload(quiz, pagination)).encode(),
+    )
+    return current_app.response_class(body, mimetype="application/json"), HTTPStatus.OK
+
+
+def _quiz_questions_payload(quiz: Quiz, pagination: CursorPaginationSchema) -> dict:
+    """Build the questions of a quiz, with their correct options, and the quiz's chapter and subject."""
+    query = Question.query.filter_by(quiz_id=quiz.id)
+    if pagination.enabled:
+        questions, next_cursor = paginate_by_keyset(
+            query, (Question.id,), pagination.page_size, cursor=pagination.cursor
+        )
+    else:
+        questions = query.all()
+    question_dict = [
+        {
+            "id": question.id,
+            "question_statement": question.question_statement,
+            "option1": question.option1,
+            "option2": question.option2,
+            "option3": question.option3,
+            "option4": question.option4,
+            "correct_option": question.correct_option,
+            "points": question.points,
         }
-        return jsonify(response), HTTPStatus.OK
-    finally:
-        db.session.close()
+        for question in questions
+    ]
+    response = {
+        "questions": question_dict,
+        "quiz_id": quiz.id,
+        "quiz_name": quiz.name,
+        "total_quiz_score": quiz.total_quiz_score,
+        "number_of_questions": quiz.number_of_questions,
+        "chapter_id": quiz.chapter_id,
+        "chapter_name": quiz.chapter.name,
+        "subject_id": quiz.chapter.subject_id,
+        "subject_name": quiz.chapter.subject.name,
+    }
+    if pagination.enabled:
+        response.update(next_cursor=next_cursor, limit=pagination.page_size)
+    return response
 
 
 @questions_bp.route("/questions/<int:question_id>", methods=[HTTPMethod.GET])
 @jwt_required()
 def get_question(question_id: int):
     """Get details of a specific question."""
-    try:
-        question: Question | None = db.session.get(Question, question_id)
-        if not question:
-            return jsonify({"message": "Question not found"}), HTTPStatus.NOT_FOUND
+    question: Question | None = db.session.get(Question, question_id)
+    if not question:
+        return jsonify({"message": "Question not found"}), HTTPStatus.NOT_FOUND
 
-        return jsonify(QuestionSchema.model_validate(question).model_dump()), HTTPStatus.OK
-    finally:
-        db.session.close()
+    return jsonify(QuestionSchema.model_validate(question).model_dump()), HTTPStatus.OK
 
 
 @questions_bp.route("/questions/<int:question_id>", methods=[HTTPMethod.PATCH])
-@jwt_required()
+@admin_required()
 def update_question(question_id: int):
     """Update a question. (Admin only)"""
-    try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
-        question: Question | None = db.session.get(Question, question_id)
-        if not question:
-            return jsonify({"message": "Question not found"}), HTTPStatus.NOT_FOUND
-
-        data = QuestionUpdateSchema(**request.get_json())
-
-        if data.question_statement:
-            question.question_statement = data.question_statement
-        if data.option1:
-            question.option1 = data.option1
-        if data.option2:
-            question.option2 = data.option2
-        if data.option3:
-            question.option3 = data.option3
-        if data.option4:
-            question.option4 = data.option4
-        if data.correct_option:
-            question.correct_option = data.correct_option
-
-        db.session.commit()
-
-        return (
-            jsonify(
-                {
-                    "message": "Question updated successfully",
-                    "question": QuestionSchema.model_validate(question).model_dump(),
-                }
-            ),
-            HTTPStatus.OK,
-        )
-    finally:
-        db.session.close()
+    question: Question | None = db.session.get(Question, question_id)
+    if not question:
+        return jsonify({"message": "Question not found"}), HTTPStatus.NOT_FOUND
+
+    data = QuestionUpdateSchema(**request.get_json())
+
+    if data.question_statement:
+        question.question_statement = data.question_statement
+    if data.option1:
+        question.option1 = data.option1
+    if data.option2:
+        question.option2 = data.option2
+    if data.option3:
+        question.option3 = data.option3
+    if data.option4:
+        question.option4 = data.option4
+    if data.correct_option:
+        question.correct_option = data.correct_option
+    if data.points:
+        question.points = data.points
+
+    refresh_question_totals(question.quiz_id)
+    db.session.commit()
+
+    return (
+        jsonify(
+            {
+                "message": "Question updated successfully",
+                "question": QuestionSchema.model_validate(question).model_dump(),
+            }
+        ),
+        HTTPStatus.OK,
+    )
 
 
 @questions_bp.route("/questions/<int:question_id>", methods=[HTTPMethod.DELETE])
-@jwt_required()
+@admin_required()
 def delete_question(question_id: int):
     """Delete a question. (Admin only)"""
-    try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
-        question: Question | None = db.session.get(Question, question_id)
-        if not question:
-            return jsonify({"message": "Question not found"}), HTTPStatus.NOT_FOUND
-
-        db.session.delete(question)
-        db.session.commit()
-
-        return jsonify({"message": "Question deleted successfully"}), HTTPStatus.OK
-    finally:
-        db.session.close()
+    question: Question | None = db.session.get(Question, question_id)
+    if not question:
+        return jsonify({"message": "Question not found"}), HTTPStatus.NOT_FOUND
+
+    quiz_id = question.quiz_id
+    # The answers given to the question go with it, the scores they were graded into are kept
+    db.session.execute(delete(QuestionAttempt).where(QuestionAttempt.question_id == question_id))
+    db.session.delete(question)
+    refresh_question_totals(quiz_id)
+    db.session.commit()
+
+    return jsonify({"message": "Question deleted successfully"}), HTTPStatus.OK
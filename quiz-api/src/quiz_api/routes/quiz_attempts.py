@@ -1,249 +1,335 @@
 """User Management Routes."""
 
 from http import HTTPMethod, HTTPStatus
-from typing import List
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import select
 
 from quiz_api.models.database import db
-from quiz_api.models.models import Question, QuestionAttempt, Quiz, QuizSignup, Score, User
-from quiz_api.models.schemas import QuizAttemptSchema, ScoreSchema
+from quiz_api.models.models import Question, QuestionAttempt, Quiz, QuizSignup, Score, Submission
+from quiz_api.models.schemas import AttemptExportSchema, AttemptHistorySchema, QuizAttemptSchema, ScoreSchema
+from quiz_api.utils import user_required
+from quiz_api.utils.attempt_export import iter_attempts_csv
+from quiz_api.utils.grading import check_answers, get_answer_key_cache, grade_answers, record_grade
+from quiz_api.utils.group_commit import commit_write
+from quiz_api.utils.pagination import paginate_by_keyset
+from quiz_api.utils.serialized_payloads import cached_json_response, get_payload_cache
+from quiz_api.utils.submissions import enqueue_submission, get_submission_graders
 
 quiz_attempts_bp: Blueprint = Blueprint("quiz_attempts", __name__, url_prefix="/quiz")
 
+# Length limit of the `Idempotency-Key` header of asynchronous submissions
+MAX_IDEMPOTENCY_KEY_LENGTH = 64
+
 
 @quiz_attempts_bp.route("/<int:quiz_id>/attempt", methods=[HTTPMethod.GET])
 @jwt_required()
 def start_quiz_attempt(quiz_id: int):
     """Start a quiz attempt."""
-    try:
-        current_user_id = int(get_jwt_identity())
-
-        # Verify quiz exists
-        quiz: Quiz | None = db.session.get(Quiz, quiz_id)
-        if not quiz:
-            return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
-
-        # If user hasn't signed up for the quiz, return error
-        quiz_signup: QuizSignup | None = QuizSignup.query.filter_by(user_id=current_user_id, quiz_id=quiz_id).first()
-        if not quiz_signup:
-            return jsonify({"message": "User has not signed up for this quiz"}), HTTPStatus.FORBIDDEN
-
-        # If quiz is not active, return error
-        if not quiz.is_active:
-            return jsonify({"message": "Quiz is not active"}), HTTPStatus.FORBIDDEN
-
-        # TODO: Later only allow user to take the quiz once to avoid multiple attempts
-
-        # Get questions for the quiz
-        # questions = Question.query.filter_by(quiz_id=quiz_id).all()
-        # Return list of questions without correct answers
-        questions_list = [
-            {
-                "id": q.id,
-                "question_statement": q.question_statement,
-                "option1": q.option1,
-                "option2": q.option2,
-                "option3": q.option3,
-                "option4": q.option4,
-                "points": q.points,
-            }
-            for q in quiz.questions
-        ]
-        response = {
-            "name": quiz.name,
-            "date_of_quiz": quiz.date_of_quiz.isoformat(),
-            "end_time": quiz.end_time.isoformat(),
-            "time_duration": quiz.time_duration,
-            "total_questions": quiz.number_of_questions,
-            "total_quiz_score": quiz.total_quiz_score,
-            "questions": questions_list,
-        }
-        return jsonify(response), HTTPStatus.OK
-    finally:
-        db.session.close()
+    current_user_id = int(get_jwt_identity())
+
+    # Verify quiz exists
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    # If user hasn't signed up for the quiz, return error
+    quiz_signup: QuizSignup | None = QuizSignup.query.filter_by(user_id=current_user_id, quiz_id=quiz_id).first()
+    if not quiz_signup:
+        return jsonify({"message": "User has not signed up for this quiz"}), HTTPStatus.FORBIDDEN
+
+    # If quiz is not active, return error
+    if not quiz.is_active:
+        return jsonify({"message": "Quiz is not active"}), HTTPStatus.FORBIDDEN
+
+    # TODO: Later only allow user to take the quiz once to avoid multiple attempts
+
+    # The payload is the same for every participant, so it is serialized once per version of the quiz
+    fingerprint = (
+        quiz.questions_version,
+        quiz.name,
+        quiz.date_of_quiz,
+        quiz.ends_at,
+        quiz.time_duration,
+        quiz.question_count,
+        quiz.total_points,
+    )
+    payload = get_payload_cache("quiz_attempts").get(quiz_id, fingerprint, lambda: _attempt_payload(quiz))
+    return cached_json_response(payload)
+
+
+def _attempt_payload(quiz: Quiz) -> dict:
+    """Build the attempt payload of a quiz: its schedule and its questions without the correct answers."""
+    questions = db.session.execute(
+        select(
+            Question.id,
+            Question.question_statement,
+            Question.option1,
+            Question.option2,
+            Question.option3,
+            Question.option4,
+            Question.points,
+        )
+        .where(Question.quiz_id == quiz.id)
+        .order_by(Question.id)
+    ).mappings()
+    return {
+        "name": quiz.name,
+        "date_of_quiz": quiz.date_of_quiz.isoformat(),
+        "end_time": quiz.end_time.isoformat(),
+        "time_duration": quiz.time_duration,
+        "total_questions": quiz.number_of_questions,
+        "total_quiz_score": quiz.total_quiz_score,
+        "questions": [dict(question) for question in questions],
+    }
 
 
 @quiz_attempts_bp.route("/<int:quiz_id>/submit", methods=[HTTPMethod.POST])
-@jwt_required()
+@user_required()
 def submit_quiz(quiz_id: int):
     """Submit quiz answers and get results."""
-    try:
-        # Verify quiz exists
-        quiz: Quiz | None = db.session.get(Quiz, quiz_id)
-        if not quiz:
-            return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
-
-        # Get current user
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "user":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.UNAUTHORIZED
-
-        # Validate submission data
-        data = QuizAttemptSchema(**request.get_json())
-
-        # Prepare to calculate score and create question attempts
-        user_score = 0  # Total points scored by the user
-        num_correct_answers = 0  # Number of correct answers
-        questions = Question.query.filter_by(quiz_id=quiz_id).all()
-        question_map = {q.id: q for q in questions}
-        question_attempts = []  # List to store question attempt records
-
-        for answer in data.answers:
-            question = question_map[answer.question_id]
-            is_correct = False
-
-            # Check if answer is correct and update score
-            if answer.selected_option and question.correct_option == answer.selected_option:
-                is_correct = True
-                user_score += question.points
-                num_correct_answers += 1
-
-            # Prepare question attempt record
-            question_attempts.append(
-                QuestionAttempt(
-                    question_id=question.id,
-                    # selected_option=answer.selected_option,
-                    # Use 0 as a sentinel value for unanswered questions, since valid answers are 1-4
-                    selected_option=answer.selected_option if answer.selected_option is not None else 0,
-                    is_correct=is_correct,
-                )
-            )
-
-        # Record score
-        score = Score(
-            quiz_id=quiz_id,
-            user_id=current_user_id,
-            user_score=user_score,
-            number_of_correct_answers=num_correct_answers,
-        )
-        db.session.add(score)
-        db.session.flush()  # This ensures score gets an ID without committing the transaction
-
-        # Set score_id for all question attempts and add to session
-        for question_attempt in question_attempts:
-            question_attempt.score_id = score.id
-            db.session.add(question_attempt)
-
-        db.session.commit()
-        return jsonify({"message": "Quiz submitted successfully"}), HTTPStatus.OK
-    finally:
-        db.session.close()
+    # Verify quiz exists
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    # Get current user
+    current_user_id = int(get_jwt_identity())
+
+    # Only participants may submit, and only while the quiz runs: once it ends its answers are public
+    if db.session.get(QuizSignup, (current_user_id, quiz_id)) is None:
+        return jsonify({"message": "User has not signed up for this quiz"}), HTTPStatus.FORBIDDEN
+    if not quiz.is_active:
+        return jsonify({"message": "Quiz is not active"}), HTTPStatus.FORBIDDEN
+
+    # Validate submission data, and that it only answers questions of this quiz
+    data = QuizAttemptSchema(**request.get_json())
+    answer_key = get_answer_key_cache().get(quiz)
+    check_answers(answer_key, data.answers)
+
+    if current_app.config["ASYNC_SUBMISSIONS"]:
+        # Queue the submission and let the graders apply it, so that a submission storm does not hold the workers
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({"message": "Invalid Idempotency-Key header"}), HTTPStatus.BAD_REQUEST
+
+        submission, _ = enqueue_submission(quiz_id, current_user_id, data, idempotency_key)
+        get_submission_graders().wake()
+        return jsonify(
+            {
+                "message": "Quiz submission queued",
+                "submission_id": submission.public_id,
+                "status": submission.status,
+                "status_url": url_for(
+                    "quiz_attempts.get_submission_status", quiz_id=quiz_id, submission_id=submission.public_id
+                ),
+            }
+        ), HTTPStatus.ACCEPTED
+
+    # Grade in memory against the cached answer key, then insert the score and its attempts in two statements
+    grade = grade_answers(answer_key, data.answers)
+    commit_write(lambda: record_grade(quiz_id, current_user_id, grade))
+    return jsonify({"message": "Quiz submitted successfully"}), HTTPStatus.OK
+
+
+@quiz_attempts_bp.route("/<int:quiz_id>/submissions/<submission_id>", methods=[HTTPMethod.GET])
+@user_required()
+def get_submission_status(quiz_id: int, submission_id: str):
+    """Get the grading status of one of the user's queued submissions."""
+    current_user_id = int(get_jwt_identity())
+
+    submission: Submission | None = Submission.query.filter_by(
+        public_id=submission_id, quiz_id=quiz_id, user_id=current_user_id
+    ).first()
+    if not submission:
+        return jsonify({"message": "Submission not found"}), HTTPStatus.NOT_FOUND
+
+    # The score is not part of the status, results are only shown once the quiz is over
+    response = {
+        "submission_id": submission.public_id,
+        "quiz_id": submission.quiz_id,
+        "status": submission.status,
+        "submitted_at": submission.submitted_at.isoformat(),
+        "graded_at": submission.graded_at.isoformat() if submission.graded_at else None,
+    }
+    if submission.error:
+        response["error"] = submission.error
+    return jsonify(response), HTTPStatus.OK
 
 
 @quiz_attempts_bp.route("/<int:quiz_id>/results", methods=[HTTPMethod.GET])
-@jwt_required()
+@user_required()
 def get_user_quiz_attempt_results(quiz_id: int):
     """Get details of a user's quiz attempt with correctanswers and score."""
-    try:
-        # Get current user
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "user":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.UNAUTHORIZED
-
-        # Verify if user has signed up and attempted the quiz
-        quiz_signup: QuizSignup | None = QuizSignup.query.filter_by(quiz_id=quiz_id, user_id=current_user_id).first()
-        if not quiz_signup:
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
-        # If the quiz is active then don't allow the user to see the results
-        if quiz_signup.quiz.is_active:
-            return jsonify({"message": "Quiz is still active"}), HTTPStatus.FORBIDDEN
-
-        # Get score, correct answers and questions
-        score: Score | None = (
-            Score.query.filter_by(quiz_id=quiz_id, user_id=current_user_id).order_by(Score.timestamp.desc()).first()
+    # Get current user
+    current_user_id = int(get_jwt_identity())
+
+    # Verify if user has signed up for the quiz
+    quiz: Quiz | None = (
+        db.session.query(Quiz)
+        .join(QuizSignup, QuizSignup.quiz_id == Quiz.id)
+        .filter(Quiz.id == quiz_id, QuizSignup.user_id == current_user_id)
+        .first()
+    )
+    if not quiz:
+        return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
+
+    # If the quiz is active then don't allow the user to see the results
+    if quiz.is_active:
+        return jsonify({"message": "Quiz is still active"}), HTTPStatus.FORBIDDEN
+
+    # Get score, correct answers and questions
+    score: Score | None = (
+        Score.query.filter_by(quiz_id=quiz_id, user_id=current_user_id)
+        .order_by(Score.timestamp.desc(), Score.id.desc())
+        .first()
+    )
+    if not score:
+        return jsonify({"message": "Quiz not attempted or User did not sign up for the quiz"}), HTTPStatus.NOT_FOUND
+
+    # Get questions with correct answers and user's selected answers in one joined query
+    question_attempts = (
+        db.session.query(
+            QuestionAttempt.selected_option,
+            QuestionAttempt.is_correct,
+            Question.question_statement,
+            Question.correct_option,
+            Question.points,
+            Question.option1,
+            Question.option2,
+            Question.option3,
+            Question.option4,
         )
-        if not score:
-            return jsonify({"message": "Quiz not attempted or User did not sign up for the quiz"}), HTTPStatus.NOT_FOUND
-
-        # Get questions with correct answers and user's selected answers
-        question_attempts: List[QuestionAttempt] = QuestionAttempt.query.filter_by(score_id=score.id).all()
-        question_attempts_list = [
-            {
-                "question_statement": qa.question.question_statement,
-                "correct_option": qa.question.correct_option,
-                # "user_answer": qa.selected_option,
-                "user_answer": qa.selected_option if qa.selected_option != 0 else None,
-                "is_correct": qa.is_correct,
-                "points": qa.question.points,
-                "option1": qa.question.option1,
-                "option2": qa.question.option2,
-                "option3": qa.question.option3,
-                "option4": qa.question.option4,
-            }
-            for qa in question_attempts
-        ]
-        response = {
-            "total_quiz_score": quiz_signup.quiz.total_quiz_score,
-            "user_score": score.user_score,
-            "questions": question_attempts_list,
+        .join(Question, QuestionAttempt.question_id == Question.id)
+        .filter(QuestionAttempt.score_id == score.id)
+        .order_by(QuestionAttempt.id)
+    )
+    question_attempts_list = [
+        {
+            "question_statement": qa.question_statement,
+            "correct_option": qa.correct_option,
+            # "user_answer": qa.selected_option,
+            "user_answer": qa.selected_option if qa.selected_option != 0 else None,
+            "is_correct": qa.is_correct,
+            "points": qa.points,
+            "option1": qa.option1,
+            "option2": qa.option2,
+            "option3": qa.option3,
+            "option4": qa.option4,
         }
-        return jsonify(response), HTTPStatus.OK
-    finally:
-        db.session.close()
+        for qa in question_attempts
+    ]
+    response = {
+        "total_quiz_score": quiz.total_quiz_score,
+        "user_score": score.user_score,
+        "questions": question_attempts_list,
+    }
+    return jsonify(response), HTTPStatus.OK
 
 
 @quiz_attempts_bp.route("/<int:quiz_id>/score", methods=[HTTPMethod.GET])
 @jwt_required()
 def get_user_quiz_score_details(quiz_id: int):
     """Get details of a specific quiz attempt by the user."""
-    try:
-        # Only allow users to view their own scores (except admin)
-        current_user_id = int(get_jwt_identity())
-
-        # Verify user has attempted the quiz
-        # Get the latest score for the quiz, sort by timestamp in descending order
-        # TODO: Later only allow user to take the quiz once to avoid multiple attempts
-        score: Score | None = (
-            Score.query.filter_by(quiz_id=quiz_id, user_id=current_user_id).order_by(Score.timestamp.desc()).first()
-        )
-        if not score:
-            return jsonify({"message": "Quiz not attempted or User did not sign up for the quiz"}), HTTPStatus.NOT_FOUND
-
-        # get quiz name, total quiz score, total user score, time duration, date of quiz
-        response = {
-            "quiz_name": score.quiz.name,
-            "date_of_quiz": score.quiz.date_of_quiz.isoformat(),
-            "time_duration": score.quiz.time_duration,
-            "user_score": score.user_score,
-            "total_quiz_score": score.quiz.total_quiz_score,
-            "number_of_correct_answers": score.number_of_correct_answers,
-            "total_questions": score.quiz.number_of_questions,
-        }
-        return jsonify(response), HTTPStatus.OK
-    finally:
-        db.session.close()
+    # Only allow users to view their own scores (except admin)
+    current_user_id = int(get_jwt_identity())
+
+    # Verify user has attempted the quiz
+    # Get the latest score for the quiz, sort by timestamp in descending order
+    # TODO: Later only allow user to take the quiz once to avoid multiple attempts
+    score: Score | None = (
+        Score.query.filter_by(quiz_id=quiz_id, user_id=current_user_id).order_by(Score.timestamp.desc()).first()
+    )
+    if not score:
+        return jsonify({"message": "Quiz not attempted or User did not sign up for the quiz"}), HTTPStatus.NOT_FOUND
+
+    # get quiz name, total quiz score, total user score, time duration, date of quiz
+    response = {
+        "quiz_name": score.quiz.name,
+        "date_of_quiz": score.quiz.date_of_quiz.isoformat(),
+        "time_duration": score.quiz.time_duration,
+        "user_score": score.user_score,
+        "total_quiz_score": score.quiz.total_quiz_score,
+        "number_of_correct_answers": score.number_of_correct_answers,
+        "total_questions": score.quiz.number_of_questions,
+    }
+    return jsonify(response), HTTPStatus.OK
 
 
 @quiz_attempts_bp.route("/attempts/history", methods=[HTTPMethod.GET])
 @jwt_required()
 def get_user_quiz_attempts_history():
-    """Get all quiz attempts history for a user."""
-    try:
-        # Only allow admin or a user to view their own scores
-        current_user_id = int(get_jwt_identity())
+    """Get the quiz attempts history for a user, newest first, one page at a time."""
+    # Only allow admin or a user to view their own scores
+    current_user_id = int(get_jwt_identity())
+    params = AttemptHistorySchema(**request.args)
+
+    query = (
+        db.session.query(
+            Score.id,
+            Score.timestamp,
+            Score.user_score,
+            Score.number_of_correct_answers,
+            Quiz.id.label("quiz_id"),
+            Quiz.name.label("quiz_name"),
+            Quiz.date_of_quiz,
+            Quiz.time_duration,
+            Quiz.total_quiz_score,
+            Quiz.number_of_questions,
+        )
+        .join(Quiz, Score.quiz_id == Quiz.id)
+        .filter(Score.user_id == current_user_id)
+    )
+    if params.from_date:
+        query = query.filter(Score.timestamp >= params.from_date)
+    if params.to_date:
+        query = query.filter(Score.timestamp < params.to_date)
+    page, next_cursor = paginate_by_keyset(
+        query, (Score.timestamp, Score.id), params.limit, cursor=params.cursor, descending=True
+    )
+    if not page and not params.cursor:
+        return jsonify({"message": "No quiz attempts history found"}), HTTPStatus.NOT_FOUND
+
+    items = [
+        {
+            "id": row.id,
+            "quiz_id": row.quiz_id,
+            "quiz_name": row.quiz_name,
+            "date_of_quiz": row.date_of_quiz.isoformat(),
+            "time_duration": row.time_duration,
+            "timestamp": row.timestamp.isoformat(),
+            "user_score": row.user_score,
+            "total_quiz_score": row.total_quiz_score,
+            "number_of_correct_answers": row.number_of_correct_answers,
+            "total_questions": row.number_of_questions,
+        }
+        for row in page
+    ]
+    return jsonify({"items": items, "next_cursor": next_cursor, "limit": params.limit}), HTTPStatus.OK
 
-        # Get all quiz attempts history for the user
-        scores = Score.query.filter_by(user_id=current_user_id).all()
-        if not scores:
-            return jsonify({"message": "No quiz attempts history found"}), HTTPStatus.NOT_FOUND
 
-        response = [
-            {
-                "quiz_name": score.quiz.name,
-                "date_of_quiz": score.quiz.date_of_quiz,
-                "time_duration": score.quiz.time_duration,
-                "user_score": score.user_score,
-                "total_quiz_score": score.quiz.total_quiz_score,
-                "number_of_correct_answers": score.number_of_correct_answers,
-                "total_questions": score.quiz.number_of_questions,
-            }
-            for score in scores
-        ]
-        return jsonify(response), HTTPStatus.OK
-    finally:
-        db.session.close()
+@quiz_attempts_bp.route("/attempts/export", methods=[HTTPMethod.GET])
+@jwt_required()
+def export_user_quiz_attempts():
+    """
+    Download the current user's quiz attempts as CSV, oldest first.
+
+    The rows are streamed as they are read, so the download starts at once and memory stays the same however many
+    attempts the user has.
+    """
+    current_user_id = int(get_jwt_identity())
+    params = AttemptExportSchema(**request.args)
+
+    # The request context, and with it the session, is kept until the last row is sent
+    rows = iter_attempts_csv(
+        current_user_id,
+        current_app.config["ATTEMPT_EXPORT_BATCH_SIZE"],
+        from_date=params.from_date,
+        to_date=params.to_date,
+    )
+    return Response(
+        stream_with_context(rows),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=quiz_attempts.csv"},
+    )
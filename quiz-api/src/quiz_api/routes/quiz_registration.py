@@ -5,135 +5,222 @@ from http import HTTPMethod, HTTPStatus
 
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import and_, func, select
+from sqlalchemy.exc import IntegrityError
 
 from quiz_api.models.database import db
-from quiz_api.models.models import Question, Quiz, QuizSignup, Score, User
-from quiz_api.models.schemas import QuizAttemptSchema, ScoreSchema
+from quiz_api.models.models import Chapter, Question, Quiz, QuizSignup, Score, Subject, UserStat
+from quiz_api.models.schemas import PaginationSchema, QuizAttemptSchema, ScoreSchema
+from quiz_api.utils import user_required
+from quiz_api.utils.activity import record_activity
+from quiz_api.utils.group_commit import commit_write
+from quiz_api.utils.score_rollups import user_stat_summary
 
 user_quiz_bp: Blueprint = Blueprint("user_quiz", __name__)
 
 
 @user_quiz_bp.route("/quiz-registration/<int:quiz_id>/signup", methods=[HTTPMethod.POST])
-@jwt_required()
+@user_required()
 def quiz_signup(quiz_id: int):
     """Sign up a user for a upcoming quiz."""
-    try:
-        # Get current user
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role == "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.UNAUTHORIZED
-
-        # Verify quiz exists
-        quiz: Quiz | None = db.session.get(Quiz, quiz_id)
-        if not quiz:
-            return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
-
-        # Check if quiz is upcoming
-        if not quiz.is_upcoming or quiz.is_active:
-            return jsonify({"message": "Date of registration is over"}), HTTPStatus.BAD_REQUEST
+    # Get current user
+    current_user_id = int(get_jwt_identity())
+
+    # Verify quiz exists
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    # Check if quiz is upcoming
+    if not quiz.is_upcoming or quiz.is_active:
+        return jsonify({"message": "Date of registration is over"}), HTTPStatus.BAD_REQUEST
+
+    # Check if user is already signed up for the quiz
+    existing_signup = QuizSignup.query.filter_by(user_id=current_user_id, quiz_id=quiz_id).first()
+    if existing_signup:
+        return jsonify({"message": "User already signed up for this quiz"}), HTTPStatus.BAD_REQUEST
+
+    # If quiz has no questions, cannot sign up
+    if quiz.number_of_questions == 0:
+        return jsonify({"message": "No questions found for this quiz"}), HTTPStatus.NOT_FOUND
+
+    # Create new signup; a concurrent signup of the same user fails on the primary key
+    def sign_up() -> None:
+        signup_time = datetime.now(timezone.utc)
+        db.session.add(QuizSignup(user_id=current_user_id, quiz_id=quiz_id, signup_time=signup_time))
+        # Flushed first, so that a duplicate signup fails here rather than in the activity savepoints
+        db.session.flush()
+        record_activity(quiz_id, current_user_id, signup_time, signups=1)
 
-        # Check if user is already signed up for the quiz
-        existing_signup = QuizSignup.query.filter_by(user_id=current_user_id, quiz_id=quiz_id).first()
-        if existing_signup:
-            return jsonify({"message": "User already signed up for this quiz"}), HTTPStatus.BAD_REQUEST
-
-        # If quiz has no questions, cannot sign up
-        if quiz.number_of_questions == 0:
-            return jsonify({"message": "No questions found for this quiz"}), HTTPStatus.NOT_FOUND
-
-        # Create new signup
-        new_signup = QuizSignup(user_id=current_user_id, quiz_id=quiz_id)
-        db.session.add(new_signup)
-        db.session.commit()
+    try:
+        commit_write(sign_up)
+    except IntegrityError:
+        return jsonify({"message": "User already signed up for this quiz"}), HTTPStatus.BAD_REQUEST
 
-        return jsonify({"message": "User signed up for quiz successfully"}), HTTPStatus.CREATED
-    finally:
-        db.session.close()
+    return jsonify({"message": "User signed up for quiz successfully"}), HTTPStatus.CREATED
 
 
 @user_quiz_bp.route("/quiz-registration/<int:quiz_id>/cancel", methods=[HTTPMethod.DELETE])
-@jwt_required()
+@user_required()
 def cancel_quiz_registration(quiz_id: int):
     """Cancel a user's registration for a upcoming quiz."""
-    try:
-        # Get current user
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.UNAUTHORIZED
+    # Get current user
+    current_user_id = int(get_jwt_identity())
 
-        # Verify quiz exists and is upcoming
-        quiz: Quiz | None = db.session.get(Quiz, quiz_id)
-        if not quiz:
-            return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+    # Verify quiz exists and is upcoming
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
 
-        # Check if user is signed up for the quiz
-        existing_signup = QuizSignup.query.filter_by(user_id=current_user_id, quiz_id=quiz_id).first()
-        if not existing_signup:
-            return jsonify({"message": "User is not signed up for this quiz"}), HTTPStatus.BAD_REQUEST
+    # Check if user is signed up for the quiz
+    existing_signup = QuizSignup.query.filter_by(user_id=current_user_id, quiz_id=quiz_id).first()
+    if not existing_signup:
+        return jsonify({"message": "User is not signed up for this quiz"}), HTTPStatus.BAD_REQUEST
 
-        # If quiz is over, cannot cancel
-        if not quiz.is_upcoming:
-            return jsonify({"message": "Past quizzes cannot be cancelled"}), HTTPStatus.BAD_REQUEST
+    # If quiz is over, cannot cancel
+    if not quiz.is_upcoming:
+        return jsonify({"message": "Past quizzes cannot be cancelled"}), HTTPStatus.BAD_REQUEST
 
-        # Cannot cancel a quiz that is ongoing
-        if quiz.is_active:
-            return jsonify({"message": "Cannot cancel a quiz that is ongoing"}), HTTPStatus.BAD_REQUEST
+    # Cannot cancel a quiz that is ongoing
+    if quiz.is_active:
+        return jsonify({"message": "Cannot cancel a quiz that is ongoing"}), HTTPStatus.BAD_REQUEST
 
-        # Delete the signup
-        db.session.delete(existing_signup)
-        db.session.commit()
+    # Delete the signup
+    db.session.delete(existing_signup)
+    db.session.commit()
 
-        return jsonify({"message": "Quiz registration cancelled successfully"}), HTTPStatus.OK
-    finally:
-        db.session.close()
+    return jsonify({"message": "Quiz registration cancelled successfully"}), HTTPStatus.OK
 
 
 @user_quiz_bp.route("/users/quizzes/signups", methods=[HTTPMethod.GET])
 @jwt_required()
 def get_user_quizzes():
-    """Get all quizzes that the current user has ."""
-    try:
-        current_user_id = int(get_jwt_identity())
-        # Get quiz signups for the user
-        signups = QuizSignup.query.filter_by(user_id=current_user_id).all()
-
-        # Format response with quiz details
-        result = []
-        for signup in signups:
-            quiz = signup.quiz
-            status = "upcoming" if quiz.is_upcoming else "active" if quiz.is_active else "completed"
-
-            # Get the latest score for the quiz, sort by timestamp in descending order
-            # TODO: Later only allow user to take the quiz once to avoid multiple attempts
-            user_score = (
-                Score.query.filter_by(user_id=current_user_id, quiz_id=quiz.id)
-                .order_by(Score.timestamp.desc())
-                .first()
-            )
-            user_score_value = user_score.user_score if user_score else "?"
-            user_number_of_correct_answers = user_score.number_of_correct_answers if user_score else "?"
-
-            quiz_data = {
-                "id": quiz.id,
-                "name": quiz.name,
-                "date_of_quiz": quiz.date_of_quiz.isoformat(),
-                "time_duration": quiz.time_duration,
-                "chapter_name": quiz.chapter.name,
-                "subject_name": quiz.chapter.subject.name,
+    """Get all quizzes that the current user has signed up for, with their latest score."""
+    current_user_id = int(get_jwt_identity())
+    pagination = PaginationSchema(**request.args)
+
+    # Rank the user's attempts per quiz so the latest one can be joined in the same query
+    # TODO: Later only allow user to take the quiz once to avoid multiple attempts
+    latest_scores = (
+        select(
+            Score.quiz_id,
+            Score.user_score,
+            Score.number_of_correct_answers,
+            func.row_number()
+            .over(partition_by=Score.quiz_id, order_by=(Score.timestamp.desc(), Score.id.desc()))
+            .label("attempt_rank"),
+        )
+        .where(Score.user_id == current_user_id)
+        .subquery()
+    )
+
+    query = (
+        db.session.query(
+            Quiz.id,
+            Quiz.name,
+            Quiz.date_of_quiz,
+            Quiz.end_time,
+            Quiz.time_duration,
+            Chapter.name.label("chapter_name"),
+            Subject.name.label("subject_name"),
+            Quiz.total_quiz_score,
+            Quiz.number_of_questions,
+            latest_scores.c.user_score,
+            latest_scores.c.number_of_correct_answers,
+        )
+        .select_from(QuizSignup)
+        .join(Quiz, QuizSignup.quiz_id == Quiz.id)
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+        .outerjoin(latest_scores, and_(latest_scores.c.quiz_id == Quiz.id, latest_scores.c.attempt_rank == 1))
+        .filter(QuizSignup.user_id == current_user_id)
+        .order_by(Quiz.date_of_quiz.desc(), Quiz.id)
+        .offset(pagination.offset)
+    )
+    if pagination.limit is not None:
+        query = query.limit(pagination.limit)
+
+    # Format response with quiz details
+    now = datetime.now(timezone.utc)
+    result = []
+    for row in query:
+        quiz_start = row.date_of_quiz.replace(tzinfo=timezone.utc)
+        quiz_end = row.end_time.replace(tzinfo=timezone.utc)
+        status = "upcoming" if quiz_start > now else "active" if now <= quiz_end else "completed"
+
+        result.append(
+            {
+                "id": row.id,
+                "name": row.name,
+                "date_of_quiz": row.date_of_quiz.isoformat(),
+                "time_duration": row.time_duration,
+                "chapter_name": row.chapter_name,
+                "subject_name": row.subject_name,
                 "status": status,
-                "user_score": user_score_value,
-                "total_quiz_score": quiz.total_quiz_score,
-                "number_of_correct_answers": user_number_of_correct_answers,
-                "total_questions": quiz.number_of_questions,
+                "user_score": row.user_score if row.user_score is not None else "?",
+                "total_quiz_score": row.total_quiz_score,
+                "number_of_correct_answers": (
+                    row.number_of_correct_answers if row.number_of_correct_answers is not None else "?"
+                ),
+                "total_questions": row.number_of_questions,
+            }
+        )
+
+    # if the result is empty, return a 404 error
+    # if not result:
+    #     return jsonify({"message": "No quizzes found"}), HTTPStatus.NOT_FOUND
+
+    return jsonify(result), HTTPStatus.OK
+
+
+@user_quiz_bp.route("/users/me/summary", methods=[HTTPMethod.GET])
+@jwt_required()
+def get_user_summary():
+    """
+    Get the current user's attempts, total score, and average, best and latest percentage, overall and per subject.
+
+    The summary is read from the user's stats, a row per subject they scored in, rather than from their scores.
+    """
+    current_user_id = int(get_jwt_identity())
+    rows = db.session.execute(
+        select(UserStat, Subject.name, Quiz.name)
+        .join(Subject, Subject.id == UserStat.subject_id)
+        .outerjoin(Quiz, Quiz.id == UserStat.latest_quiz_id)
+        .where(UserStat.user_id == current_user_id)
+        .order_by(Subject.name, Subject.id)
+    ).all()
+
+    subjects = []
+    for stat, subject_name, quiz_name in rows:
+        subjects.append(
+            {
+                "subject_id": stat.subject_id,
+                "subject_name": subject_name,
+                **user_stat_summary(
+                    stat.attempts, stat.score_sum, stat.percentage_sum, stat.best_percentage, stat.latest_at
+                ),
+                "latest_quiz_id": stat.latest_quiz_id,
+                "latest_quiz_name": quiz_name,
+                "latest_percentage": round(stat.latest_percentage, 2),
             }
-            result.append(quiz_data)
-        
-        # if the result is empty, return a 404 error
-        # if not result:
-        #     return jsonify({"message": "No quizzes found"}), HTTPStatus.NOT_FOUND
-
-        return jsonify(result), HTTPStatus.OK
-    finally:
-        db.session.close()
+        )
+
+    stats = [row[0] for row in rows]
+    latest = max(rows, key=lambda row: row[0].latest_at, default=None)
+    summary = user_stat_summary(
+        sum(stat.attempts for stat in stats),
+        sum(stat.score_sum for stat in stats),
+        sum(stat.percentage_sum for stat in stats),
+        max((stat.best_percentage for stat in stats), default=None),
+        latest[0].latest_at if latest else None,
+    )
+    summary["latest"] = (
+        {
+            "quiz_id": latest[0].latest_quiz_id,
+            "quiz_name": latest[2],
+            "percentage": round(latest[0].latest_percentage, 2),
+        }
+        if latest
+        else None
+    )
+    return jsonify({**summary, "subjects": subjects}), HTTPStatus.OK
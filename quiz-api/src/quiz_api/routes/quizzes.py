@@ -1,30 +1,42 @@
 """Quiz routes for the Quiz API."""
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from http import HTTPMethod, HTTPStatus
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
+from flask.typing import ResponseReturnValue
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import select
 
 from quiz_api.models.database import db
-from quiz_api.models.models import Chapter, Quiz, Score, User
-from quiz_api.models.schemas import QuizSchema, QuizUpdateSchema, SearchSchema
-from quiz_api.utils.search import search_quizzes
+from quiz_api.models.models import Chapter, Quiz, Score, Subject, User
+from quiz_api.models.schemas import (
+    CursorPaginationSchema,
+    LeaderboardSchema,
+    PaginationSchema,
+    QuizListingSchema,
+    QuizSchema,
+    QuizUpdateSchema,
+    SearchSchema,
+)
+from quiz_api.utils import admin_required, get_current_role
+from quiz_api.utils.leaderboard import get_leaderboard_cache
+from quiz_api.utils.pagination import paginate_by_keyset
+from quiz_api.utils.score_rollups import refresh_chapter_rollups, refresh_subject_rollups, refresh_user_stats
+from quiz_api.utils.search import count_search_matches, paginate_search, search_quizzes
+from quiz_api.utils.single_flight import get_single_flight
 
 quiz_bp: Blueprint = Blueprint("quizzes", __name__)
 
+# Serialized body of a listing without any quizzes, which is served as a 404
+EMPTY_LISTING = b"[]"
+
 
 @quiz_bp.route("/chapters/<int:chapter_id>/quizzes", methods=[HTTPMethod.POST])
-@jwt_required()
+@admin_required()
 def create_quiz(chapter_id: int):
     """Create a new quiz under a chapter. (Admin only)"""
     try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
         # Verify chapter exists
         chapter: Chapter | None = db.session.get(Chapter, chapter_id)
         if not chapter:
@@ -51,36 +63,45 @@ def create_quiz(chapter_id: int):
         return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         raise e
-    finally:
-        db.session.close()
 
 
 @quiz_bp.route("/chapters/<int:chapter_id>/quizzes", methods=[HTTPMethod.GET])
 @jwt_required()
 def get_chapter_quizzes(chapter_id: int):
-    """Get all quizzes under a chapter. (User is logged in)"""
-    try:
-        # Verify chapter exists
-        chapter: Chapter | None = db.session.get(Chapter, chapter_id)
-        if not chapter:
-            return jsonify({"message": "Chapter not found"}), HTTPStatus.NOT_FOUND
-
-        quizzes = Quiz.query.filter_by(chapter_id=chapter_id).all()
-        quizzes_list = [
-            {
-                "id": quiz.id,
-                "chapter_id": quiz.chapter_id,
-                "name": quiz.name,
-                "date_of_quiz": quiz.date_of_quiz.isoformat(),
-                "time_duration": quiz.time_duration,
-                "remarks": quiz.remarks,
-            }
-            for quiz in quizzes
-        ]
+    """Get all quizzes under a chapter, paged by date when `cursor` or `limit` is given. (User is logged in)"""
+    pagination = CursorPaginationSchema(**request.args)
+
+    # Verify chapter exists
+    chapter: Chapter | None = db.session.get(Chapter, chapter_id)
+    if not chapter:
+        return jsonify({"message": "Chapter not found"}), HTTPStatus.NOT_FOUND
+
+    query = Quiz.query.filter_by(chapter_id=chapter_id)
+    if pagination.enabled:
+        quizzes, next_cursor = paginate_by_keyset(
+            query, (Quiz.date_of_quiz, Quiz.id), pagination.page_size, cursor=pagination.cursor
+        )
+    else:
+        quizzes = query.all()
+    quizzes_list = [
+        {
+            "id": quiz.id,
+            "chapter_id": quiz.chapter_id,
+            "name": quiz.name,
+            "date_of_quiz": quiz.date_of_quiz.isoformat(),
+            "time_duration": quiz.time_duration,
+            "remarks": quiz.remarks,
+            "number_of_questions": quiz.number_of_questions,
+            "total_quiz_score": quiz.total_quiz_score,
+        }
+        for quiz in quizzes
+    ]
 
-        return jsonify(quizzes_list), HTTPStatus.OK
-    finally:
-        db.session.close()
+    if pagination.enabled:
+        return jsonify(
+            {"items": quizzes_list, "next_cursor": next_cursor, "limit": pagination.page_size}
+        ), HTTPStatus.OK
+    return jsonify(quizzes_list), HTTPStatus.OK
 
 
 @quiz_bp.route("/quizzes/<int:quiz_id>", methods=[HTTPMethod.GET])
@@ -104,21 +125,60 @@ def get_quiz(quiz_id: int):
         return jsonify(response), HTTPStatus.OK
     except Exception as e:
         raise e
-    finally:
-        db.session.close()
 
 
-@quiz_bp.route("/quizzes/<int:quiz_id>", methods=[HTTPMethod.PATCH])
+@quiz_bp.route("/quizzes/<int:quiz_id>/leaderboard", methods=[HTTPMethod.GET])
 @jwt_required()
+def get_quiz_leaderboard(quiz_id: int):
+    """Get the top scores of a quiz, one per user, and the current user's rank. (User is logged in)"""
+    params = LeaderboardSchema(**request.args)
+    current_user_id = int(get_jwt_identity())
+
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    # Scores of a running quiz stay hidden from users, as its answers are
+    if get_current_role() == "user" and quiz.is_active:
+        return jsonify({"message": "Quiz is still active"}), HTTPStatus.FORBIDDEN
+
+    view = get_leaderboard_cache().view(quiz, current_user_id, params.limit)
+    top_user_ids = [user_id for _, _, user_id in view.top]
+    usernames = dict(db.session.execute(select(User.id, User.username).where(User.id.in_(top_user_ids))).all())
+
+    me = None
+    if view.rank is not None:
+        negated_score, _, _ = view.key
+        me = {
+            "rank": view.rank,
+            "user_score": -negated_score,
+            # Share of the entries scoring at most the user's best score
+            "percentile": round(view.percentile, 2),
+        }
+
+    response = {
+        "quiz_id": quiz_id,
+        "total_entries": view.total,
+        "entries": [
+            {
+                "rank": rank,
+                "user_id": user_id,
+                "username": usernames.get(user_id),
+                "user_score": -negated_score,
+                "timestamp": timestamp.isoformat(),
+            }
+            for rank, (negated_score, timestamp, user_id) in enumerate(view.top, start=1)
+        ],
+        "me": me,
+    }
+    return jsonify(response), HTTPStatus.OK
+
+
+@quiz_bp.route("/quizzes/<int:quiz_id>", methods=[HTTPMethod.PATCH])
+@admin_required()
 def update_quiz(quiz_id: int):
     """Update a quiz. (Admin only)"""
     try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
         quiz: Quiz | None = db.session.get(Quiz, quiz_id)
         if not quiz:
             return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
@@ -139,242 +199,266 @@ def update_quiz(quiz_id: int):
         return (jsonify({"message": "Quiz updated successfully"}), HTTPStatus.OK)
     except Exception as e:
         raise e
-    finally:
-        db.session.close()
 
 
 @quiz_bp.route("/quizzes/<int:quiz_id>", methods=[HTTPMethod.DELETE])
-@jwt_required()
+@admin_required()
 def delete_quiz(quiz_id: int):
     """Delete a quiz. (Admin only)"""
-    try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
+    quiz: Quiz | None = db.session.get(Quiz, quiz_id)
+    if not quiz:
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    chapter_id, subject_id = quiz.chapter_id, quiz.chapter.subject_id
+    db.session.delete(quiz)
+    db.session.flush()
+    # The quiz's rollup is deleted with it, so the totals of its chapter and subject are combined again
+    refresh_chapter_rollups(chapter_id)
+    refresh_subject_rollups(subject_id)
+    refresh_user_stats(subject_id)
+    db.session.commit()
+
+    return jsonify({"message": "Quiz deleted successfully"}), HTTPStatus.OK
+
+
+def _get_quiz_listing(status_filters, order_by, hide_empty_quizzes: bool, pagination: PaginationSchema) -> list[dict]:
+    """
+    List quizzes matching a status window in a single joined query.
+
+    Args:
+        status_filters: SQL expressions selecting the quizzes (e.g. `[Quiz.is_active]`)
+        order_by: Column expressions to sort the quizzes by
+        hide_empty_quizzes: Skip quizzes without any questions (normal users never see them)
+        pagination: Limit and offset to apply in the database
+
+    Returns:
+        List of quiz dictionaries with their chapter and subject names and question totals
+
+    """
+    query = (
+        db.session.query(
+            Quiz.id,
+            Quiz.chapter_id,
+            Chapter.name.label("chapter_name"),
+            Chapter.subject_id,
+            Subject.name.label("subject_name"),
+            Quiz.name,
+            Quiz.date_of_quiz,
+            Quiz.time_duration,
+            Quiz.remarks,
+            Quiz.number_of_questions,
+            Quiz.total_quiz_score,
+        )
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+        .filter(*status_filters)
+    )
+    if hide_empty_quizzes:
+        query = query.filter(Quiz.number_of_questions > 0)
+
+    query = query.order_by(*order_by, Quiz.id).offset(pagination.offset)
+    if pagination.limit is not None:
+        query = query.limit(pagination.limit)
+
+    return [
+        {
+            "id": row.id,
+            "chapter_id": row.chapter_id,
+            "chapter_name": row.chapter_name,
+            "subject_id": row.subject_id,
+            "subject_name": row.subject_name,
+            "name": row.name,
+            "date_of_quiz": row.date_of_quiz.isoformat(),
+            "time_duration": row.time_duration,
+            "remarks": row.remarks,
+            "number_of_questions": row.number_of_questions,
+            "total_quiz_score": row.total_quiz_score,
+        }
+        for row in query
+    ]
 
-        quiz: Quiz | None = db.session.get(Quiz, quiz_id)
-        if not quiz:
-            return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
 
-        db.session.delete(quiz)
-        db.session.commit()
+def _serve_quiz_listing(
+    listing: str, status_filters, order_by, params: QuizListingSchema, not_found_message: str
+) -> ResponseReturnValue:
+    """
+    Serve a quiz listing, sharing one query between concurrent requests for the same listing and parameters.
 
-        return jsonify({"message": "Quiz deleted successfully"}), HTTPStatus.OK
-    finally:
-        db.session.close()
+    Args:
+        listing: Name of the listing, part of the coalescing key
+        status_filters: SQL expressions selecting the quizzes
+        order_by: Column expressions to sort the quizzes by
+        params: Filters and pagination of the request
+        not_found_message: Message of the 404 returned when no quiz matches
+
+    Returns:
+        The serialized listing, or a 404 if it is empty
+
+    """
+    # Do not show quizzes with no questions to normal users
+    hide_empty_quizzes = get_current_role() == "user"
+    body = get_single_flight().do(
+        f"quiz-listing:{listing}:{hide_empty_quizzes}:{params.model_dump_json()}",
+        lambda: current_app.json.dumps(
+            _get_quiz_listing(status_filters, order_by, hide_empty_quizzes, pagination=params)
+        ).encode(),
+    )
+    if body == EMPTY_LISTING:
+        return jsonify({"message": not_found_message}), HTTPStatus.NOT_FOUND
+
+    return current_app.response_class(body, mimetype="application/json"), HTTPStatus.OK
 
 
 @quiz_bp.route("/quizzes/upcoming", methods=[HTTPMethod.GET])
 @jwt_required()
 def get_all_upcoming_quizzes():
     """Get all upcoming quizzes. (User is logged in)"""
-    try:
-        current_user_id = int(get_jwt_identity())
-        current_user: User = db.session.get(User, current_user_id)
+    params = QuizListingSchema(**request.args)
 
-        current_date = datetime.now(timezone.utc)
-        quizzes = Quiz.query.filter(Quiz.date_of_quiz >= current_date).all()
+    status_filters = [Quiz.is_upcoming]
+    if params.starts_within_hours:
+        latest_start = datetime.now(timezone.utc) + timedelta(hours=params.starts_within_hours)
+        status_filters.append(Quiz.date_of_quiz <= latest_start)
 
-        if not quizzes:
-            return jsonify({"message": "No upcoming quizzes found"}), HTTPStatus.NOT_FOUND
-
-        # Get chapter id and subject id from quiz
-        # Do not show quizzes with no questions to normal users
-        quizzes_list = [
-            {
-                "id": quiz.id,
-                "chapter_id": quiz.chapter_id,
-                "chapter_name": quiz.chapter.name,
-                "subject_id": quiz.chapter.subject_id,
-                "subject_name": quiz.chapter.subject.name,
-                "name": quiz.name,
-                "date_of_quiz": quiz.date_of_quiz.isoformat(),
-                "time_duration": quiz.time_duration,
-                "remarks": quiz.remarks,
-            }
-            for quiz in quizzes
-            if quiz.is_upcoming
-            and not quiz.is_active
-            and not (current_user.role == "user" and quiz.number_of_questions == 0)
-        ]
-        return jsonify(quizzes_list), HTTPStatus.OK
-    finally:
-        db.session.close()
+    return _serve_quiz_listing(
+        "upcoming", status_filters, [Quiz.date_of_quiz], params, not_found_message="No upcoming quizzes found"
+    )
 
 
 @quiz_bp.route("/quizzes/past", methods=[HTTPMethod.GET])
 @jwt_required()
 def get_all_past_quizzes():
     """Get all past quizzes."""
-    try:
-        current_user_id = int(get_jwt_identity())
-        current_user: User = db.session.get(User, current_user_id)
-
-        current_date = datetime.now(timezone.utc)
-        quizzes = Quiz.query.filter(Quiz.date_of_quiz < current_date).all()
+    params = QuizListingSchema(**request.args)
 
-        if not quizzes:
-            return jsonify({"message": "No quizzes found"}), HTTPStatus.NOT_FOUND
-
-        # get seperate list of past and upcoming quizzes
-        # Do not show quizzes with no questions to normal users
-        past_quizzes = [
-            {
-                "id": quiz.id,
-                "chapter_id": quiz.chapter_id,
-                "chapter_name": quiz.chapter.name,
-                "subject_id": quiz.chapter.subject_id,
-                "subject_name": quiz.chapter.subject.name,
-                "name": quiz.name,
-                "date_of_quiz": quiz.date_of_quiz.isoformat(),
-                "time_duration": quiz.time_duration,
-                "remarks": quiz.remarks,
-            }
-            for quiz in quizzes
-            if not quiz.is_active and not (current_user.role == "user" and quiz.number_of_questions == 0)
-        ]
+    # A quiz is over once its end time has passed; most recent first
+    status_filters = [Quiz.end_time < datetime.now(timezone.utc)]
+    if params.ended_since:
+        status_filters.append(Quiz.end_time >= params.ended_since)
 
-        return jsonify(past_quizzes), HTTPStatus.OK
-    finally:
-        db.session.close()
+    return _serve_quiz_listing(
+        "past", status_filters, [Quiz.end_time.desc()], params, not_found_message="No quizzes found"
+    )
 
 
 @quiz_bp.route("/quizzes/ongoing", methods=[HTTPMethod.GET])
 @jwt_required()
 def get_all_ongoing_quizzes():
     """Get all ongoing quizzes. (User is logged in)"""
-    try:
-        current_user_id = int(get_jwt_identity())
-        current_user: User = db.session.get(User, current_user_id)
+    params = QuizListingSchema(**request.args)
+
+    return _serve_quiz_listing(
+        "ongoing", [Quiz.is_active], [Quiz.date_of_quiz], params, not_found_message="No ongoing quizzes found"
+    )
+
+
+@quiz_bp.route("/quizzes/user", methods=[HTTPMethod.GET])
+@jwt_required()
+def get_quizzes_by_user():
+    """Get all quizzes attempted by a user. (User is logged in)"""
+    current_user_id = int(get_jwt_identity())
+    current_user: User | None = db.session.get(User, current_user_id)
+    if not current_user:
+        return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
+
+    # Get all scores for the user
+    scores = Score.query.filter_by(user_id=current_user_id).all()
+    if not scores:
+        return jsonify({"message": "No quizzes attempted by the user"}), HTTPStatus.NOT_FOUND
+
+    # Create a dictionary to track the latest score for each quiz
+    latest_scores = {}
+    for score in scores:
+        if score.quiz_id not in latest_scores or score.timestamp > latest_scores[score.quiz_id].timestamp:
+            latest_scores[score.quiz_id] = score
+
+    # Convert the latest scores to a list of dictionaries
+    quizzes_list = [
+        {
+            "id": score.id,
+            "quiz_id": score.quiz_id,
+            "user_id": score.user_id,
+            "score": score.score,
+            "timestamp": score.timestamp.isoformat(),
+        }
+        for score in latest_scores.values()
+    ]
 
-        # Fetch only quizzes that have started (optimizing DB filtering)
-        current_time = datetime.now(timezone.utc)
-        quizzes = Quiz.query.filter(Quiz.date_of_quiz <= current_time).all()
-        if not quizzes:
-            return jsonify({"message": "No ongoing quizzes found"}), HTTPStatus.NOT_FOUND
+    return jsonify(quizzes_list), HTTPStatus.OK
 
+
+@quiz_bp.route("/chapters/<int:chapter_id>/quizzes/search", methods=[HTTPMethod.GET])
+def search_chapter_quizzes(chapter_id: int):
+    """Search quizzes within a chapter using Full-Text Search."""
+    # Check if chapter exists
+    chapter: Chapter | None = db.session.get(Chapter, chapter_id)
+    if not chapter:
+        return jsonify({"message": "Chapter not found"}), HTTPStatus.NOT_FOUND
+
+    search_params = SearchSchema(**request.args)
+    query = search_params.q
+
+    next_cursor = None
+    if not query:
+        # Return all quizzes for this chapter if no query
+        quizzes_query = Quiz.query.filter_by(chapter_id=chapter_id)
+        total, total_is_approximate = quizzes_query.count(), False
+        if search_params.cursor is None:
+            quizzes = quizzes_query.limit(search_params.limit).offset(search_params.offset).all()
+        else:
+            quizzes, next_cursor = paginate_by_keyset(
+                quizzes_query, (Quiz.date_of_quiz, Quiz.id), search_params.limit, cursor=search_params.cursor
+            )
         quizzes_list = [
             {
                 "id": quiz.id,
                 "chapter_id": quiz.chapter_id,
-                "chapter_name": quiz.chapter.name,
-                "subject_id": quiz.chapter.subject_id,
-                "subject_name": quiz.chapter.subject.name,
                 "name": quiz.name,
                 "date_of_quiz": quiz.date_of_quiz.isoformat(),
                 "time_duration": quiz.time_duration,
                 "remarks": quiz.remarks,
+                "created_at": quiz.created_at.isoformat(),
+                "updated_at": quiz.updated_at.isoformat() if quiz.updated_at else None,
             }
             for quiz in quizzes
-            if quiz.is_active and not (current_user.role == "user" and quiz.number_of_questions == 0)
         ]
-        return jsonify(quizzes_list), HTTPStatus.OK
-    finally:
-        db.session.close()
-
+    else:
+        # Use FTS to search quizzes
+        results, next_cursor = paginate_search(
+            search_quizzes,
+            query,
+            limit=search_params.limit,
+            offset=search_params.offset,
+            cursor=search_params.cursor,
+            chapter_id=chapter_id,
+        )
+        total, total_is_approximate = count_search_matches(
+            "quizzes", query, approximate=search_params.approximate_total, chapter_id=chapter_id
+        )
 
-@quiz_bp.route("/quizzes/user", methods=[HTTPMethod.GET])
-@jwt_required()
-def get_quizzes_by_user():
-    """Get all quizzes attempted by a user. (User is logged in)"""
-    try:
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user:
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
-        # Get all scores for the user
-        scores = Score.query.filter_by(user_id=current_user_id).all()
-        if not scores:
-            return jsonify({"message": "No quizzes attempted by the user"}), HTTPStatus.NOT_FOUND
-
-        # Create a dictionary to track the latest score for each quiz
-        latest_scores = {}
-        for score in scores:
-            if score.quiz_id not in latest_scores or score.timestamp > latest_scores[score.quiz_id].timestamp:
-                latest_scores[score.quiz_id] = score
-
-        # Convert the latest scores to a list of dictionaries
+        # Format results
         quizzes_list = [
             {
-                "id": score.id,
-                "quiz_id": score.quiz_id,
-                "user_id": score.user_id,
-                "score": score.score,
-                "timestamp": score.timestamp.isoformat(),
+                "id": row[0],
+                "chapter_id": row[1],
+                "name": row[2],
+                "date_of_quiz": row[3] if isinstance(row[3], str) else row[3].isoformat() if row[3] else None,
+                "time_duration": row[4],
+                "remarks": row[5],
+                "created_at": row[6] if isinstance(row[6], str) else row[6].isoformat() if row[6] else None,
+                "updated_at": row[7] if isinstance(row[7], str) else row[7].isoformat() if row[7] else None,
             }
-            for score in latest_scores.values()
+            for row in results
         ]
 
-        return jsonify(quizzes_list), HTTPStatus.OK
-    finally:
-        db.session.close()
-
-
-@quiz_bp.route("/chapters/<int:chapter_id>/quizzes/search", methods=[HTTPMethod.GET])
-def search_chapter_quizzes(chapter_id: int):
-    """Search quizzes within a chapter using Full-Text Search."""
-    try:
-        # Check if chapter exists
-        chapter: Chapter | None = db.session.get(Chapter, chapter_id)
-        if not chapter:
-            return jsonify({"message": "Chapter not found"}), HTTPStatus.NOT_FOUND
-
-        search_params = SearchSchema(**request.args)
-        query = search_params.q
-
-        if not query:
-            # Return all quizzes for this chapter if no query
-            quizzes = (
-                Quiz.query.filter_by(chapter_id=chapter_id)
-                .limit(search_params.limit)
-                .offset(search_params.offset)
-                .all()
-            )
-            quizzes_list = [
-                {
-                    "id": quiz.id,
-                    "chapter_id": quiz.chapter_id,
-                    "name": quiz.name,
-                    "date_of_quiz": quiz.date_of_quiz.isoformat(),
-                    "time_duration": quiz.time_duration,
-                    "remarks": quiz.remarks,
-                    "created_at": quiz.created_at.isoformat(),
-                    "updated_at": quiz.updated_at.isoformat() if quiz.updated_at else None,
-                }
-                for quiz in quizzes
-            ]
-        else:
-            # Use FTS to search quizzes
-            results = search_quizzes(
-                query, limit=search_params.limit, offset=search_params.offset, chapter_id=chapter_id
-            )
-
-            # Format results
-            quizzes_list = [
-                {
-                    "id": row[0],
-                    "chapter_id": row[1],
-                    "name": row[2],
-                    "date_of_quiz": row[3] if isinstance(row[3], str) else row[3].isoformat() if row[3] else None,
-                    "time_duration": row[4],
-                    "remarks": row[5],
-                    "created_at": row[6] if isinstance(row[6], str) else row[6].isoformat() if row[6] else None,
-                    "updated_at": row[7] if isinstance(row[7], str) else row[7].isoformat() if row[7] else None,
-                }
-                for row in results
-            ]
-
-        # Return with metadata
-        response = {
-            "items": quizzes_list,
-            "total": len(quizzes_list),
-            "limit": search_params.limit,
-            "offset": search_params.offset,
-        }
-
-        return jsonify(response), HTTPStatus.OK
-    finally:
-        db.session.close()
+    # Return with metadata
+    response = {
+        "items": quizzes_list,
+        "total": total,
+        "total_is_approximate": total_is_approximate,
+        "limit": search_params.limit,
+        "offset": search_params.offset,
+        "next_cursor": next_cursor,
+    }
+
+    return jsonify(response), HTTPStatus.OK
@@ -0,0 +1,109 @@
+"""Admin Reporting Routes."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPMethod, HTTPStatus
+
+from flask import Blueprint, current_app, jsonify, request
+from flask.typing import ResponseReturnValue
+from sqlalchemy import select
+
+from quiz_api.models.database import db
+from quiz_api.models.models import (
+    Chapter,
+    ChapterScoreRollup,
+    Quiz,
+    QuizScoreRollup,
+    ScoreRollup,
+    Subject,
+    SubjectScoreRollup,
+)
+from quiz_api.models.schemas import ActivityMetricsSchema, AdminSummarySchema
+from quiz_api.utils import admin_required
+from quiz_api.utils.activity import activity_series, bucket_count
+from quiz_api.utils.score_rollups import ROLLUP_COLUMNS, rollup_stats
+
+reports_bp = Blueprint("reports", __name__, url_prefix="/admin")
+
+
+@reports_bp.route("/summary", methods=[HTTPMethod.GET])
+@admin_required()
+def get_summary() -> ResponseReturnValue:
+    """
+    Get the attempts, average and spread of scores, best score and pass rate of each subject, chapter and quiz.
+
+    Statistics are read from the score rollups, so the summary costs a row per subject, chapter and quiz, however
+    many scores there are (Admin only).
+    """
+    params = AdminSummarySchema(**request.args)
+    if params.subject_id is not None and not db.session.get(Subject, params.subject_id):
+        return jsonify({"message": "Subject not found"}), HTTPStatus.NOT_FOUND
+
+    subjects = select(Subject.id, Subject.name, *_columns(SubjectScoreRollup)).outerjoin(
+        SubjectScoreRollup, SubjectScoreRollup.subject_id == Subject.id
+    )
+    chapters = select(Chapter.id, Chapter.subject_id, Chapter.name, *_columns(ChapterScoreRollup)).outerjoin(
+        ChapterScoreRollup, ChapterScoreRollup.chapter_id == Chapter.id
+    )
+    quizzes = (
+        select(Quiz.id, Quiz.chapter_id, Quiz.name, *_columns(QuizScoreRollup))
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .outerjoin(QuizScoreRollup, QuizScoreRollup.quiz_id == Quiz.id)
+    )
+    if params.subject_id is not None:
+        subjects = subjects.where(Subject.id == params.subject_id)
+        chapters = chapters.where(Chapter.subject_id == params.subject_id)
+        quizzes = quizzes.where(Chapter.subject_id == params.subject_id)
+
+    response = {
+        "pass_mark_percent": current_app.config["PASS_MARK_PERCENT"],
+        "subjects": [
+            {"id": row[0], "name": row[1], **rollup_stats(*row[2:])}
+            for row in db.session.execute(subjects.order_by(Subject.id))
+        ],
+        "chapters": [
+            {"id": row[0], "subject_id": row[1], "name": row[2], **rollup_stats(*row[3:])}
+            for row in db.session.execute(chapters.order_by(Chapter.id))
+        ],
+        "quizzes": [
+            {"id": row[0], "chapter_id": row[1], "name": row[2], **rollup_stats(*row[3:])}
+            for row in db.session.execute(quizzes.order_by(Quiz.id))
+        ],
+    }
+    return jsonify(response), HTTPStatus.OK
+
+
+@reports_bp.route("/metrics/activity", methods=[HTTPMethod.GET])
+@admin_required()
+def get_activity_metrics() -> ResponseReturnValue:
+    """
+    Get the attempts, answers, signups and active users of each hour or day from `from` to `to`, for trend charts.
+
+    Counts are read from the activity rollups, a row per bucket with activity, so a year of days costs at most 366
+    rows however many scores and signups there are. With `quiz_id`, only that quiz's activity is counted, without
+    active users (Admin only).
+    """
+    params = ActivityMetricsSchema(**request.args)
+    if params.quiz_id is not None and not db.session.get(Quiz, params.quiz_id):
+        return jsonify({"message": "Quiz not found"}), HTTPStatus.NOT_FOUND
+
+    to_date = params.to_date or datetime.now(timezone.utc)
+    from_date = params.from_date or to_date - timedelta(days=current_app.config["ACTIVITY_DEFAULT_DAYS"])
+    if from_date > to_date:
+        return jsonify({"message": "`from` must not be after `to`"}), HTTPStatus.BAD_REQUEST
+    max_buckets = current_app.config["ACTIVITY_MAX_BUCKETS"]
+    if bucket_count(params.granularity, from_date, to_date) > max_buckets:
+        return jsonify({"message": f"The range spans more than {max_buckets} buckets"}), HTTPStatus.BAD_REQUEST
+
+    response = {
+        "granularity": params.granularity,
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "quiz_id": params.quiz_id,
+        "buckets": activity_series(params.granularity, from_date, to_date, params.quiz_id),
+    }
+    return jsonify(response), HTTPStatus.OK
+
+
+def _columns(rollup: type[ScoreRollup]) -> list:
+    """Columns of a rollup, in the order of `rollup_stats` arguments."""
+    return [getattr(rollup, column) for column in ROLLUP_COLUMNS]
@@ -10,38 +10,30 @@ from flask import (
     jsonify,
     request,
 )
-from flask_jwt_extended import (
-    get_jwt_identity,
-    jwt_required,
-)
 
 from quiz_api.models.database import db
 from quiz_api.models.models import (
     Subject,
-    User,
 )
 from quiz_api.models.schemas import (
+    CursorPaginationSchema,
     SearchSchema,
     SubjectSchema,
     SubjectUpdateSchema,
 )
-from quiz_api.utils.search import search_subjects
+from quiz_api.utils import admin_required
+from quiz_api.utils.pagination import paginate_by_keyset
+from quiz_api.utils.search import count_search_matches, paginate_search, search_subjects
 
 # Define Blueprint
 subjects_bp = Blueprint("subjects", __name__, url_prefix="/subjects")
 
 
 @subjects_bp.route("", methods=[HTTPMethod.POST])
-@jwt_required()
+@admin_required()
 def create_subject():
     """Create a new subject (Admin only)."""
     try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
         # Validate request data
         subject_data = SubjectSchema(**request.get_json())
 
@@ -72,24 +64,31 @@ def create_subject():
         return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         raise e
-    finally:
-        db.session.close()
 
 
 @subjects_bp.route("", methods=[HTTPMethod.GET])
 def get_all_subjects():
-    """Get all subjects."""
+    """Get all subjects, or one page of them when `cursor` or `limit` is given."""
     try:
-        subjects = db.session.query(Subject).all()  # Subject.query.all()
+        pagination = CursorPaginationSchema(**request.args)
+        query = db.session.query(Subject)
+        if pagination.enabled:
+            subjects, next_cursor = paginate_by_keyset(
+                query, (Subject.id,), pagination.page_size, cursor=pagination.cursor
+            )
+        else:
+            subjects = query.all()  # Subject.query.all()
         subjects_list = [
             {"id": subject.id, "name": subject.name, "description": subject.description} for subject in subjects
         ]
 
+        if pagination.enabled:
+            return jsonify(
+                {"items": subjects_list, "next_cursor": next_cursor, "limit": pagination.page_size}
+            ), HTTPStatus.OK
         return jsonify(subjects_list), HTTPStatus.OK
     except Exception as e:
         raise e
-    finally:
-        db.session.close()
 
 
 @subjects_bp.route("/<int:subject_id>", methods=[HTTPMethod.GET])
@@ -114,21 +113,13 @@ def get_subject(subject_id: int):
         )
     except Exception as e:
         raise e
-    finally:
-        db.session.close()
 
 
 @subjects_bp.route("/<int:subject_id>", methods=[HTTPMethod.PATCH])
-@jwt_required()
+@admin_required()
 def update_subject(subject_id: int):
     """Update a subject's details (Admin only)."""
     try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
-
         subject: Subject | None = db.session.get(Subject, subject_id)
         if not subject:
             return jsonify({"message": "Subject not found"}), HTTPStatus.NOT_FOUND
@@ -149,76 +140,80 @@ def update_subject(subject_id: int):
         return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
     except Exception as e:
         raise e
-    finally:
-        db.session.close()
 
 
 @subjects_bp.route("/<int:subject_id>", methods=[HTTPMethod.DELETE])
-@jwt_required()
+@admin_required()
 def delete_subject(subject_id: int):
     """Delete a subject (Admin only)."""
-    try:
-        # Check if user is admin
-        current_user_id = int(get_jwt_identity())
-        current_user: User | None = db.session.get(User, current_user_id)
-        if not current_user or current_user.role != "admin":
-            return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
+    subject: Subject | None = db.session.get(Subject, subject_id)
+    if not subject:
+        return jsonify({"message": "Subject not found"}), HTTPStatus.NOT_FOUND
 
-        subject: Subject | None = db.session.get(Subject, subject_id)
-        if not subject:
-            return jsonify({"message": "Subject not found"}), HTTPStatus.NOT_FOUND
-
-        db.session.delete(subject)
-        db.session.commit()
-        return jsonify({"message": "Subject deleted successfully"}), HTTPStatus.OK
-    finally:
-        db.session.close()
+    db.session.delete(subject)
+    db.session.commit()
+    return jsonify({"message": "Subject deleted successfully"}), HTTPStatus.OK
 
 
 @subjects_bp.route("/search", methods=[HTTPMethod.GET])
 def search():
     """Search subjects using Full-Text Search."""
-    try:
-        search_params = SearchSchema(**request.args)
-        query = search_params.q
-
-        if not query:
-            # Return all subjects if no query
+    search_params = SearchSchema(**request.args)
+    query = search_params.q
+
+    next_cursor = None
+    if not query:
+        # Return all subjects if no query
+        total, total_is_approximate = Subject.query.count(), False
+        if search_params.cursor is None:
             subjects = Subject.query.limit(search_params.limit).offset(search_params.offset).all()
-            subjects_list = [
-                {
-                    "id": subject.id,
-                    "name": subject.name,
-                    "description": subject.description,
-                    "created_at": subject.created_at.isoformat(),
-                    "updated_at": subject.updated_at.isoformat() if subject.updated_at else None,
-                }
-                for subject in subjects
-            ]
         else:
-            # Use FTS to search
-            results = search_subjects(query, limit=search_params.limit, offset=search_params.offset)
+            subjects, next_cursor = paginate_by_keyset(
+                Subject.query, (Subject.id,), search_params.limit, cursor=search_params.cursor
+            )
+        subjects_list = [
+            {
+                "id": subject.id,
+                "name": subject.name,
+                "description": subject.description,
+                "created_at": subject.created_at.isoformat(),
+                "updated_at": subject.updated_at.isoformat() if subject.updated_at else None,
+            }
+            for subject in subjects
+        ]
+    else:
+        # Use FTS to search
+        results, next_cursor = paginate_search(
+            search_subjects,
+            query,
+            limit=search_params.limit,
+            offset=search_params.offset,
+            cursor=search_params.cursor,
+        )
+        total, total_is_approximate = count_search_matches(
+            "subjects", query, approximate=search_params.approximate_total
+        )
 
-            # Format results
-            subjects_list = [
-                {
-                    "id": row[0],
-                    "name": row[1],
-                    "description": row[2],
-                    "created_at": row[3] if isinstance(row[3], str) else row[3].isoformat() if row[3] else None,
-                    "updated_at": row[4] if isinstance(row[4], str) else row[4].isoformat() if row[4] else None,
-                }
-                for row in results
-            ]
-
-        # Return with metadata
-        response = {
-            "items": subjects_list,
-            "total": len(subjects_list),
-            "limit": search_params.limit,
-            "offset": search_params.offset,
-        }
-
-        return jsonify(response), HTTPStatus.OK
-    finally:
-        db.session.close()
+        # Format results
+        subjects_list = [
+            {
+                "id": row[0],
+                "name": row[1],
+                "description": row[2],
+                "created_at": row[3] if isinstance(row[3], str) else row[3].isoformat() if row[3] else None,
+                "updated_at": row[4] if isinstance(row[4], str) else row[4].isoformat() if row[4] else None,
+            }
+            for row in results
+        ]
+
+    # Return with metadata
+    response = {
+        "items": subjects_list,
+        "total": total,
+        "total_is_approximate": total_is_approximate,
+        "limit": search_params.limit,
+        "offset": search_params.offset,
+        "next_cursor": next_cursor,
+    }
+
+    return jsonify(response), HTTPStatus.OK
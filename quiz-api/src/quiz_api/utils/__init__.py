@@ -2,8 +2,22 @@
 
 from quiz_api.utils.auth import (
     add_token_to_blacklist,
+    admin_required,
+    create_user_access_token,
+    get_current_role,
     init_admin,
     init_jwt,
+    revoke_user_tokens,
+    user_required,
 )
 
-__all__ = ["init_jwt", "init_admin", "add_token_to_blacklist"]
+__all__ = [
+    "init_jwt",
+    "init_admin",
+    "add_token_to_blacklist",
+    "admin_required",
+    "create_user_access_token",
+    "get_current_role",
+    "revoke_user_tokens",
+    "user_required",
+]
@@ -0,0 +1,83 @@
+"""Streaming export of a user's quiz attempts as CSV."""
+
+import csv
+import io
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from sqlalchemy import Row, select
+
+from quiz_api.models.database import db
+from quiz_api.models.models import Quiz, Score
+
+EXPORT_COLUMNS = (
+    "quiz_id",
+    "chapter_id",
+    "quiz_name",
+    "date_of_quiz",
+    "attempted_at",
+    "score",
+    "total_points",
+    "number_of_correct_answers",
+    "remarks",
+)
+
+
+def iter_attempts_csv(
+    user_id: int, batch_size: int, from_date: datetime | None = None, to_date: datetime | None = None
+) -> Iterator[str]:
+    """
+    Stream the attempts of a user as CSV, oldest first, a chunk of `batch_size` rows at a time.
+
+    The header is yielded before the query runs, so that the download starts at once. Rows are fetched in batches
+    with `yield_per`, on a server-side cursor where the database has them, and written without loading ORM objects,
+    so memory stays the same however many attempts the user has.
+
+    Args:
+        user_id: ID of the user
+        batch_size: Rows fetched and yielded at a time
+        from_date: Only attempts made at or after this time
+        to_date: Only attempts made before this time
+
+    Yields:
+        The header line, then the lines of each batch of rows
+
+    """
+    yield _csv_lines([EXPORT_COLUMNS])
+
+    query = (
+        select(
+            Score.quiz_id,
+            Quiz.chapter_id,
+            Quiz.name,
+            Quiz.date_of_quiz,
+            Score.timestamp,
+            Score.user_score,
+            Quiz.total_points,
+            Score.number_of_correct_answers,
+            Quiz.remarks,
+        )
+        .join(Quiz, Quiz.id == Score.quiz_id)
+        .where(Score.user_id == user_id)
+        .order_by(Score.timestamp, Score.id)
+    )
+    if from_date:
+        query = query.where(Score.timestamp >= from_date)
+    if to_date:
+        query = query.where(Score.timestamp < to_date)
+
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield _csv_lines(_csv_row(row) for row in rows)
+
+
+def _csv_row(row: Row) -> tuple:
+    """Format the dates of a row as ISO 8601, and a quiz without remarks as an empty cell."""
+    quiz_id, chapter_id, quiz_name, date_of_quiz, attempted_at, *scores, remarks = row
+    return (quiz_id, chapter_id, quiz_name, date_of_quiz.isoformat(), attempted_at.isoformat(), *scores, remarks or "")
+
+
+def _csv_lines(rows: Iterable[Iterable]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
@@ -1,17 +1,95 @@
 """Authentication utility functions."""
 
 import os
-
-from flask_jwt_extended import JWTManager
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from http import HTTPStatus
+from typing import Dict, Iterable, Tuple
+
+from flask import Flask, current_app, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import inspect, select
 from werkzeug.security import generate_password_hash
 
 from quiz_api.models.database import db
-from quiz_api.models.models import User
+from quiz_api.models.models import TokenRevocation, User
 
 # Store for blacklisted tokens (in a real app, use Redis or database)
 token_blacklist = set()
 
 
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def _timestamp_ms(moment: datetime) -> float:
+    # SQLite returns naive datetimes, which are stored in UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() * 1000
+
+
+class TokenRevocationCache:
+    """
+    Revocation time of each user's tokens, as stored in `token_revocations`, held by each worker.
+
+    The revocations are read again once they are `max_age` seconds old, so checking a token needs no query, and a
+    revocation committed by another worker, or before a restart, takes effect within `max_age` seconds.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self.loaded_at: float | None = None
+        self._revoked_at_ms: Dict[int, float] = {}
+
+    def replace(self, revocations: Iterable[Tuple[int, datetime]]) -> None:
+        """Replace the cached revocations with `(user_id, revoked_at)` pairs."""
+        self._revoked_at_ms = {user_id: _timestamp_ms(revoked_at) for user_id, revoked_at in revocations}
+        self.loaded_at = time.monotonic()
+
+    def load(self) -> None:
+        """Read every revocation from the database."""
+        self.replace(db.session.execute(select(TokenRevocation.user_id, TokenRevocation.revoked_at)))
+
+    def revoked_at_ms(self, user_id: int) -> float | None:
+        """Get when the user's tokens were last revoked, in milliseconds since the epoch, or None if they never were."""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age:
+            self.load()
+        return self._revoked_at_ms.get(user_id)
+
+    def revoke(self, user_id: int, revoked_at: datetime) -> None:
+        """Apply a revocation of this worker right away, without waiting for the next read."""
+        self._revoked_at_ms[user_id] = _timestamp_ms(revoked_at)
+
+
+def get_token_revocation_cache() -> TokenRevocationCache:
+    """Get the token revocation cache of the current app, creating it on first use."""
+    cache = current_app.extensions.get("token_revocation_cache")
+    if cache is None:
+        cache = current_app.extensions["token_revocation_cache"] = TokenRevocationCache(
+            current_app.config["TOKEN_REVOCATION_CACHE_MAX_AGE"]
+        )
+    return cache
+
+
+def init_token_revocations(app: Flask) -> None:
+    """
+    Load the token revocations of a new app, so that its first requests do not read them.
+
+    Args:
+        app: The app whose revocation cache is loaded
+
+    """
+    with app.app_context():
+        cache = get_token_revocation_cache()
+        if inspect(db.engine).has_table(TokenRevocation.__tablename__):
+            cache.load()
+        else:
+            # The table is created by `db.create_all` or the migrations after the app, until then nothing is revoked
+            cache.replace([])
+
+
 def init_jwt(jwt_manager: JWTManager) -> None:
     """
     Initialize JWT manager with token blacklist.
@@ -23,9 +101,19 @@ def init_jwt(jwt_manager: JWTManager) -> None:
 
     @jwt_manager.token_in_blocklist_loader
     def check_if_token_is_revoked(jwt_header, jwt_payload: dict) -> bool:
-        """Check if the token is in the blacklist."""
+        """Check if the token is in the blacklist or was issued before its user's tokens were revoked."""
         jti = jwt_payload["jti"]
-        return jti in token_blacklist
+        if jti in token_blacklist:
+            return True
+
+        # Revocations are stored in the database, so that they hold in every worker and across restarts,
+        # and checked against the worker's copy of them
+        revoked_at_ms = get_token_revocation_cache().revoked_at_ms(int(jwt_payload["sub"]))
+        if revoked_at_ms is None:
+            return False
+        # Tokens without `iat_ms` predate role claims; fall back to the second resolution `iat`
+        issued_at = jwt_payload.get("iat_ms", jwt_payload["iat"] * 1000)
+        return issued_at <= revoked_at_ms
 
 
 def init_admin() -> None:
@@ -62,3 +150,92 @@ def add_token_to_blacklist(jti: str) -> None:
 
     """
     token_blacklist.add(jti)
+
+
+def revoke_user_tokens(user_id: int) -> None:
+    """
+    Revoke every token issued to a user so far, e.g. after their role changed or they were deleted.
+
+    The revocation is written in the current transaction and applied to this worker's `TokenRevocationCache` at once.
+    Once committed, it takes effect in the other workers when they next read the revocations.
+
+    Args:
+        user_id: The ID of the user whose tokens are revoked
+
+    """
+    revoked_at = datetime.now(timezone.utc)
+    db.session.merge(TokenRevocation(user_id=user_id, revoked_at=revoked_at))
+    get_token_revocation_cache().revoke(user_id, revoked_at)
+
+
+def create_user_access_token(user: User, expires_delta: timedelta) -> str:
+    """
+    Create an access token carrying the user's role, so routes can authorize without loading the user.
+
+    Args:
+        user: The user to create the token for
+        expires_delta: Lifetime of the token
+
+    Returns:
+        The encoded access token
+
+    """
+    # Flask-JWT-Extended expects the identity to be a string
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={"role": user.role, "iat_ms": _now_ms()},
+        expires_delta=expires_delta,
+    )
+
+
+def get_current_role() -> str | None:
+    """
+    Get the role of the user making the request from the JWT claims.
+
+    Tokens issued before the role claim was added fall back to loading the user.
+
+    Returns:
+        The role of the current user, or None if the user no longer exists
+
+    """
+    claims = get_jwt()
+    if "role" in claims:
+        return claims["role"]
+
+    current_user: User | None = db.session.get(User, int(get_jwt_identity()))
+    return current_user.role if current_user else None
+
+
+def role_required(role: str):
+    """
+    Require a valid JWT whose role claim is `role`.
+
+    Args:
+        role: The role allowed to call the route
+
+    Returns:
+        A decorator responding with 403 Forbidden to other roles
+
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            if get_current_role() != role:
+                return jsonify({"message": "Unauthorized"}), HTTPStatus.FORBIDDEN
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def admin_required():
+    """Require a valid JWT issued to an admin."""
+    return role_required("admin")
+
+
+def user_required():
+    """Require a valid JWT issued to a regular user."""
+    return role_required("user")
@@ -0,0 +1,68 @@
+"""Diagnostics of the database engines of the current worker process."""
+
+from typing import Any, Iterable
+
+from sqlalchemy import Engine
+from sqlalchemy.pool import QueuePool
+
+
+def pool_stats(engine: Engine) -> dict[str, Any]:
+    """
+    Get the connection pool stats of an engine.
+
+    Args:
+        engine: The engine to inspect
+
+    Returns:
+        The pool class and its status, with connection counts for queue pools
+
+    """
+    pool = engine.pool
+    stats: dict[str, Any] = {"class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+
+def sqlite_pragmas(engine: Engine, names: Iterable[str]) -> dict[str, Any]:
+    """
+    Read the effective values of SQLite PRAGMAs on a pooled connection of an engine.
+
+    Args:
+        engine: A SQLite engine
+        names: Names of the PRAGMAs to read
+
+    Returns:
+        The value of each PRAGMA
+
+    """
+    with engine.connect() as connection:
+        return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
+def engine_diagnostics(engine: Engine, pragma_names: Iterable[str]) -> dict[str, Any]:
+    """
+    Report the dialect, connection pool stats and, for SQLite, the effective PRAGMAs of an engine.
+
+    Args:
+        engine: The engine to inspect
+        pragma_names: Names of the SQLite PRAGMAs to report
+
+    Returns:
+        The engine's diagnostics
+
+    """
+    # Read the pool stats first, reading the PRAGMAs checks out a connection
+    report: dict[str, Any] = {
+        "dialect": engine.dialect.name,
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool": pool_stats(engine),
+    }
+    if engine.dialect.name == "sqlite":
+        report["pragmas"] = sqlite_pragmas(engine, pragma_names)
+    return report
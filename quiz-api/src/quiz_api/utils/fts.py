@@ -7,6 +7,17 @@ from sqlalchemy import text
 
 from quiz_api.models.database import db
 
+# Tables indexed by an FTS5 virtual table named `<table>_fts`
+FTS_TABLES = ("users", "subjects", "chapters", "quizzes")
+
+# Columns whose updates can change the search results of each table: the indexed ones, and the search filters
+FTS_VERSIONED_COLUMNS = {
+    "users": ("username", "full_name", "email"),
+    "subjects": ("name", "description"),
+    "chapters": ("name", "description", "subject_id"),
+    "quizzes": ("name", "remarks", "chapter_id"),
+}
+
 
 def setup_fts():
     """Set up Full-Text Search virtual tables for searchable entities."""
@@ -26,6 +37,7 @@ def setup_fts():
         setup_subjects_fts()
         setup_chapters_fts()
         setup_quizzes_fts()
+        setup_fts_versions()
 
         current_app.logger.info("FTS setup completed successfully")
 
@@ -284,3 +296,48 @@ def setup_quizzes_fts():
         raise
     finally:
         db.session.close()
+
+
+def setup_fts_versions():
+    """
+    Set up a version counter per FTS indexed table.
+
+    The counter is bumped by triggers on inserts, deletes, and updates of the columns in `FTS_VERSIONED_COLUMNS`,
+    so cached search counts (see `quiz_api.utils.search`) can tell when they are stale, whichever process changed
+    the table. Writes to other columns, such as the question totals of a quiz, keep the cached counts.
+    """
+    try:
+        db.session.execute(
+            text("""
+            CREATE TABLE IF NOT EXISTS fts_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        )
+
+        for table in FTS_TABLES:
+            db.session.execute(
+                text("INSERT OR IGNORE INTO fts_versions(name, version) VALUES (:name, 0);"), {"name": table}
+            )
+            columns = ", ".join(FTS_VERSIONED_COLUMNS[table])
+            # Replace the update trigger, as databases set up before it was limited to these columns have a wider one
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {table}_version_au;"))
+            for suffix, event in (("ai", "INSERT"), ("au", f"UPDATE OF {columns}"), ("ad", "DELETE")):
+                db.session.execute(
+                    text(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE fts_versions SET version = version + 1 WHERE name = '{table}';
+                    END;
+                """)
+                )
+
+        db.session.commit()
+        current_app.logger.info("FTS versions setup completed successfully")
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error setting up FTS versions: {str(e)}")
+        raise
+    finally:
+        db.session.close()
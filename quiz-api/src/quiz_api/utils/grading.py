@@ -0,0 +1,236 @@
+"""Grading of quiz submissions."""
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from quiz_api.models.database import db
+from quiz_api.models.models import Question, QuestionAttempt, Quiz, Score
+from quiz_api.models.schemas import QuizAnswerSchema
+from quiz_api.utils.activity import record_activity
+from quiz_api.utils.leaderboard import record_leaderboard_score
+from quiz_api.utils.score_rollups import record_score_rollups
+
+# Stored as the selected option of unanswered questions, since valid answers are 1-4
+UNANSWERED_OPTION = 0
+
+
+class InvalidAnswersError(ValueError):
+    """Raised when a submission answers a question that is not part of its quiz, or a question twice."""
+
+
+class Grade(NamedTuple):
+    """Result of grading a submission, with one `QuestionAttempt` row per graded answer."""
+
+    user_score: int
+    number_of_correct_answers: int
+    attempts: List[Dict[str, Any]]
+
+
+class AnswerKey:
+    """Correct option and points of each question of a quiz, in parallel arrays sorted by question ID."""
+
+    __slots__ = ("version", "question_ids", "correct_options", "points")
+
+    def __init__(self, version: int, questions: Iterable[Tuple[int, int, int]]):
+        """
+        Build an answer key.
+
+        Args:
+            version: The quiz's `questions_version` when the questions were read
+            questions: `(question_id, correct_option, points)` of each question
+
+        """
+        questions = sorted(questions)
+        self.version = version
+        self.question_ids = array("q", [question[0] for question in questions])
+        self.correct_options = array("b", [question[1] for question in questions])
+        self.points = array("q", [question[2] for question in questions])
+
+    def __len__(self) -> int:
+        """Get the number of questions in the key."""
+        return len(self.question_ids)
+
+    def lookup(self, question_id: int) -> Tuple[int, int] | None:
+        """Get the correct option and points of a question, or None if it is not part of the quiz."""
+        index = bisect_left(self.question_ids, question_id)
+        if index == len(self.question_ids) or self.question_ids[index] != question_id:
+            return None
+        return self.correct_options[index], self.points[index]
+
+
+def load_answer_key(quiz_id: int, version: int = 0) -> AnswerKey:
+    """
+    Load the answer key of a quiz, without loading the questions themselves.
+
+    Args:
+        quiz_id: ID of the quiz
+        version: The quiz's `questions_version` to stamp the key with
+
+    Returns:
+        The quiz's answer key
+
+    """
+    rows = db.session.execute(
+        select(Question.id, Question.correct_option, Question.points).where(Question.quiz_id == quiz_id)
+    )
+    return AnswerKey(version, rows)
+
+
+class AnswerKeyCache:
+    """Answer keys of recently graded quizzes, with hit and miss counts for metrics."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._keys: Dict[int, AnswerKey] = {}
+
+    def get(self, quiz: Quiz) -> AnswerKey:
+        """
+        Get the answer key of a quiz, loading it unless the cached key has the quiz's current `questions_version`.
+
+        `refresh_question_totals` bumps the version on every question write, so keys go stale in every worker at
+        once, and a hit needs no database reads beyond the quiz itself.
+
+        Args:
+            quiz: The quiz being graded
+
+        Returns:
+            The quiz's answer key
+
+        """
+        answer_key = self._keys.get(quiz.id)
+        if answer_key is not None and answer_key.version == quiz.questions_version:
+            self.hits += 1
+            return answer_key
+
+        self.misses += 1
+        answer_key = load_answer_key(quiz.id, quiz.questions_version)
+        if len(self._keys) >= self.max_size and quiz.id not in self._keys:
+            self._keys.clear()
+        self._keys[quiz.id] = answer_key
+        return answer_key
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of cached keys, the hits and misses, and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+def get_answer_key_cache() -> AnswerKeyCache:
+    """Get the answer key cache of the current app, creating it on first use."""
+    cache = current_app.extensions.get("answer_key_cache")
+    if cache is None:
+        cache = current_app.extensions["answer_key_cache"] = AnswerKeyCache(
+            current_app.config["ANSWER_KEY_CACHE_SIZE"]
+        )
+    return cache
+
+
+def check_answers(answer_key: AnswerKey, answers: Iterable[QuizAnswerSchema]) -> None:
+    """
+    Check that the answers of a submission can be graded against a quiz's answer key.
+
+    Args:
+        answer_key: The quiz's answer key
+        answers: The submitted answers
+
+    Raises:
+        InvalidAnswersError: If an answer is to a question that is not part of the quiz, or a question is answered twice
+
+    """
+    question_ids = [answer.question_id for answer in answers]
+    unknown_question_ids = sorted(
+        {question_id for question_id in question_ids if answer_key.lookup(question_id) is None}
+    )
+    if unknown_question_ids:
+        raise InvalidAnswersError(f"Questions not part of this quiz: {', '.join(map(str, unknown_question_ids))}")
+    if len(set(question_ids)) < len(question_ids):
+        raise InvalidAnswersError("Each question can only be answered once")
+
+
+def grade_answers(answer_key: AnswerKey, answers: Iterable[QuizAnswerSchema]) -> Grade:
+    """
+    Grade the answers of a submission against a quiz's answer key, without any database reads.
+
+    Args:
+        answer_key: The quiz's answer key
+        answers: The submitted answers
+
+    Returns:
+        The total points scored, the number of correct answers and the attempt rows without their `score_id`
+
+    Raises:
+        InvalidAnswersError: If the answers do not pass `check_answers`
+
+    """
+    answers = list(answers)
+    check_answers(answer_key, answers)
+
+    user_score = 0
+    number_of_correct_answers = 0
+    attempts = []
+
+    for answer in answers:
+        correct_option, points = answer_key.lookup(answer.question_id)
+        is_correct = answer.selected_option is not None and answer.selected_option == correct_option
+        if is_correct:
+            user_score += points
+            number_of_correct_answers += 1
+
+        attempts.append(
+            {
+                "question_id": answer.question_id,
+                "selected_option": UNANSWERED_OPTION if answer.selected_option is None else answer.selected_option,
+                "is_correct": is_correct,
+            }
+        )
+
+    return Grade(user_score, number_of_correct_answers, attempts)
+
+
+def record_grade(quiz_id: int, user_id: int, grade: Grade, timestamp: datetime | None = None) -> int:
+    """
+    Insert a graded submission as one score and all of its attempts, in the current transaction.
+
+    The score is a single INSERT and the attempts a single executemany INSERT, bypassing the unit of work, and the
+    score's quiz leaderboard, score rollups, user stats and activity rollups are updated with it.
+
+    Args:
+        quiz_id: ID of the quiz
+        user_id: ID of the user who submitted
+        grade: The graded submission, from `grade_answers`
+        timestamp: When the answers were submitted, defaults to now
+
+    Returns:
+        ID of the new score
+
+    """
+    timestamp = timestamp or datetime.now(timezone.utc)
+    result = db.session.execute(
+        insert(Score).values(
+            quiz_id=quiz_id,
+            user_id=user_id,
+            timestamp=timestamp,
+            user_score=grade.user_score,
+            number_of_correct_answers=grade.number_of_correct_answers,
+        )
+    )
+    score_id = result.inserted_primary_key[0]
+
+    if grade.attempts:
+        db.session.execute(insert(QuestionAttempt), [{**attempt, "score_id": score_id} for attempt in grade.attempts])
+    record_leaderboard_score(quiz_id, user_id, score_id, grade.user_score, timestamp)
+    record_score_rollups(quiz_id, user_id, grade.user_score, timestamp)
+    record_activity(quiz_id, user_id, timestamp, attempts=1, answers=len(grade.attempts))
+    return score_id
@@ -0,0 +1,181 @@
+"""Group commit: small writes of concurrent requests applied by one writer thread in shared transactions."""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+from flask import Flask, current_app
+
+from quiz_api.models.database import db
+
+T = TypeVar("T")
+
+# A write and the future its caller waits on
+WriteIntent = Tuple[Callable[[], Any], Future]
+
+
+class GroupCommitWriter:
+    """
+    A writer thread per worker that collects the writes of request threads and commits them together.
+
+    SQLite has a single writer, so concurrent requests that each commit mostly wait on `busy_timeout`. The writer
+    instead takes the writes queued within `max_delay` seconds, applies them in one transaction and commits once.
+    If any write fails, the batch is applied again with a savepoint per write, so that the error is raised to the
+    caller of the failed write only. Writes must therefore be safe to apply again after a rollback.
+    """
+
+    def __init__(self, app: Flask, max_delay: float, max_batch: int):
+        """
+        Create a writer, started by its first write.
+
+        Args:
+            app: The app whose database the writer writes to
+            max_delay: Seconds to wait for more writes after the first one of a batch
+            max_batch: Maximum number of writes per transaction
+
+        """
+        self.app = app
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._intents: "queue.SimpleQueue[WriteIntent]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+
+    def submit(self, write: Callable[[], T]) -> T:
+        """
+        Apply a write in the writer's next transaction, and wait until it is committed.
+
+        The write runs in the writer thread with its own session, so it must not use ORM objects of the caller's
+        session; it gets IDs and values from the caller, e.g. `lambda: db.session.add(QuizSignup(...))`.
+
+        Args:
+            write: Applies the write to `db.session`, without committing it
+
+        Returns:
+            The value returned by the write
+
+        Raises:
+            Exception: The error of the write, or of the commit of its transaction
+
+        """
+        self._start()
+        future: Future = Future()
+        self._intents.put((write, future))
+        return future.result()
+
+    def _start(self) -> None:
+        """Start the writer thread of this process, unless it is running; threads do not survive a fork."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="group-commit-writer", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._intents.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._intents.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            try:
+                with self.app.app_context():
+                    self._apply(batch)
+            except Exception as exc:  # pragma: no cover - the writer must outlive any batch
+                self.app.logger.exception("Group commit failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _apply(self, batch: List[WriteIntent]) -> None:
+        """Apply the writes of a batch and commit them all, then resolve their futures."""
+        try:
+            # Writes rarely fail, so the batch is first applied without the cost of a savepoint per write
+            outcomes = [(future, write(), None) for write, future in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            outcomes = self._apply_isolated(batch)
+
+        with self._lock:
+            self.batches += 1
+            self.writes += len(batch)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _apply_isolated(self, batch: List[WriteIntent]) -> List[Tuple[Future, Any, Exception | None]]:
+        """Apply each write of a batch in its own savepoint, so that a failed write does not undo the others."""
+        outcomes = []
+        for write, future in batch:
+            try:
+                # Leaving the savepoint flushes the write, which is where most constraint errors are raised
+                with db.session.begin_nested():
+                    result = write()
+            except Exception as exc:
+                outcomes.append((future, None, exc))
+            else:
+                outcomes.append((future, result, None))
+
+        try:
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            outcomes = [(future, None, exc) for future, _, _ in outcomes]
+        return outcomes
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of transactions and writes, and the average number of writes per transaction."""
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "writes": self.writes,
+                "writes_per_batch": self.writes / self.batches if self.batches else None,
+            }
+
+
+def get_group_commit_writer() -> GroupCommitWriter:
+    """Get the group commit writer of the current app, creating it on first use."""
+    writer = current_app.extensions.get("group_commit_writer")
+    if writer is None:
+        writer = current_app.extensions["group_commit_writer"] = GroupCommitWriter(
+            current_app._get_current_object(),
+            current_app.config["GROUP_COMMIT_MAX_DELAY_MS"] / 1000,
+            current_app.config["GROUP_COMMIT_MAX_BATCH"],
+        )
+    return writer
+
+
+def commit_write(write: Callable[[], T]) -> T:
+    """
+    Apply a write and commit it, through the group commit writer if `GROUP_COMMIT` is enabled.
+
+    Otherwise the write is committed in its own transaction, with the request's session.
+
+    Args:
+        write: Applies the write to `db.session`, without committing it, and without ORM objects of the request
+
+    Returns:
+        The value returned by the write
+
+    """
+    if current_app.config["GROUP_COMMIT"]:
+        return get_group_commit_writer().submit(write)
+
+    try:
+        result = write()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
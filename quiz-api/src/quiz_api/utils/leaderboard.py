@@ -0,0 +1,316 @@
+"""Per-quiz leaderboards: the best score of each user, ranked in memory for O(log n) rank lookups."""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from flask import current_app
+from sqlalchemy import bindparam, delete, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from quiz_api.models.database import db
+from quiz_api.models.models import LeaderboardEntry, Quiz, Score
+
+# Sorts the entries of a leaderboard best first: higher score, then reached earlier, then lower user ID
+RankKey = Tuple[int, datetime, int]
+
+
+# Built once on the table, so that SQLAlchemy memoizes their cache keys and runs them as plain Core statements
+ENTRIES = LeaderboardEntry.__table__
+QUIZZES = Quiz.__table__
+# Also sets `updated_at` to itself, which an UPDATE of the quiz would otherwise set
+BUMP_VERSION = (
+    update(QUIZZES)
+    .where(QUIZZES.c.id == bindparam("entry_quiz_id"))
+    .values(leaderboard_version=QUIZZES.c.leaderboard_version + 1, updated_at=QUIZZES.c.updated_at)
+)
+CURRENT_VERSION = (
+    select(QUIZZES.c.leaderboard_version).where(QUIZZES.c.id == bindparam("entry_quiz_id")).scalar_subquery()
+)
+IMPROVE_ENTRY = (
+    update(ENTRIES)
+    .where(
+        ENTRIES.c.quiz_id == bindparam("entry_quiz_id"),
+        ENTRIES.c.user_id == bindparam("entry_user_id"),
+        ENTRIES.c.user_score < bindparam("new_score"),
+    )
+    .values(
+        score_id=bindparam("new_score_id"),
+        user_score=bindparam("new_score"),
+        timestamp=bindparam("new_timestamp"),
+        version=CURRENT_VERSION,
+    )
+)
+# Inserts the entry of a user's first score, and nothing if they have one
+ADD_ENTRY = insert(ENTRIES).from_select(
+    ["quiz_id", "user_id", "score_id", "user_score", "timestamp", "version"],
+    select(
+        bindparam("entry_quiz_id", type_=ENTRIES.c.quiz_id.type),
+        bindparam("entry_user_id", type_=ENTRIES.c.user_id.type),
+        bindparam("new_score_id", type_=ENTRIES.c.score_id.type),
+        bindparam("new_score", type_=ENTRIES.c.user_score.type),
+        bindparam("new_timestamp", type_=ENTRIES.c.timestamp.type),
+        CURRENT_VERSION,
+    ).where(
+        ~exists().where(
+            ENTRIES.c.quiz_id == bindparam("entry_quiz_id"), ENTRIES.c.user_id == bindparam("entry_user_id")
+        )
+    ),
+)
+
+
+def record_leaderboard_score(quiz_id: int, user_id: int, score_id: int, user_score: int, timestamp: datetime) -> None:
+    """
+    Keep a new score in the leaderboard of its quiz if it is the user's best, in the current transaction.
+
+    The entry is inserted if the user has none, or else updated if the score is better, rather than upserted with
+    `ON CONFLICT`, which SQLAlchemy compiles again on every execution. The quiz's `leaderboard_version` is bumped
+    first and the entry stamped with it: the bump locks the quiz's row until commit, so concurrent submissions to a
+    quiz stamp their entries in commit order and a cached ranking never skips one that commits late.
+
+    Args:
+        quiz_id: ID of the quiz
+        user_id: ID of the user
+        score_id: ID of the new score
+        user_score: Points of the new score
+        timestamp: When the score was recorded
+
+    """
+    params = {
+        "entry_quiz_id": quiz_id,
+        "entry_user_id": user_id,
+        "new_score_id": score_id,
+        "new_score": user_score,
+        "new_timestamp": timestamp,
+    }
+    db.session.execute(BUMP_VERSION, params)
+    try:
+        with db.session.begin_nested():
+            added = db.session.execute(ADD_ENTRY, params).rowcount
+    except IntegrityError:
+        # Another transaction inserted the user's entry since the check
+        added = 0
+    if not added:
+        db.session.execute(IMPROVE_ENTRY, params)
+
+
+def rebuild_leaderboards(*quiz_ids: int) -> int:
+    """
+    Rebuild leaderboards from `scores`, keeping the best and earliest score of each user, in the current transaction.
+
+    The leaderboards are reset with `reset_leaderboard_versions`, so cached rankings are rebuilt too.
+
+    Args:
+        quiz_ids: IDs of the quizzes to rebuild; rebuilds every leaderboard if none are given
+
+    Returns:
+        Number of leaderboard entries
+
+    """
+    best_scores = select(
+        Score.quiz_id,
+        Score.user_id,
+        Score.user_score,
+        Score.timestamp,
+        Score.id.label("score_id"),
+        func.row_number()
+        .over(
+            partition_by=(Score.quiz_id, Score.user_id),
+            order_by=(Score.user_score.desc(), Score.timestamp, Score.id),
+        )
+        .label("attempt_rank"),
+    )
+    clear = delete(LeaderboardEntry)
+    if quiz_ids:
+        best_scores = best_scores.where(Score.quiz_id.in_(quiz_ids))
+        clear = clear.where(LeaderboardEntry.quiz_id.in_(quiz_ids))
+    best_scores = best_scores.subquery()
+
+    reset_leaderboard_versions(*quiz_ids)
+    db.session.execute(clear)
+    result = db.session.execute(
+        insert(LeaderboardEntry).from_select(
+            ["quiz_id", "user_id", "user_score", "timestamp", "score_id"],
+            select(
+                best_scores.c.quiz_id,
+                best_scores.c.user_id,
+                best_scores.c.user_score,
+                best_scores.c.timestamp,
+                best_scores.c.score_id,
+            ).where(best_scores.c.attempt_rank == 1),
+        )
+    )
+    return result.rowcount
+
+
+def reset_leaderboard_versions(*quiz_ids: int) -> None:
+    """
+    Mark leaderboards whose entries were removed, so cached rankings are rebuilt rather than updated.
+
+    Removed entries leave nothing behind to catch up from, so every caller that deletes entries, directly or through
+    a cascade, must call this in the same transaction.
+
+    Args:
+        quiz_ids: IDs of the quizzes; resets every leaderboard if none are given
+
+    """
+    statement = update(Quiz).values(
+        leaderboard_version=Quiz.leaderboard_version + 1,
+        leaderboard_reset_version=Quiz.leaderboard_version + 1,
+        updated_at=Quiz.updated_at,
+    )
+    if quiz_ids:
+        statement = statement.where(Quiz.id.in_(quiz_ids))
+    db.session.execute(statement, execution_options={"synchronize_session": False})
+
+
+class Ranking:
+    """The entries of a leaderboard sorted by `RankKey`, updated in place with the entries that changed."""
+
+    __slots__ = ("keys", "by_user", "version", "built_at", "lock")
+
+    def __init__(self, entries: Iterable[Tuple[int, int, datetime]], version: int):
+        """Build a ranking from all the entries of a leaderboard at a version, given as `(user_id, user_score, timestamp)`."""
+        self.by_user: Dict[int, RankKey] = {
+            user_id: (-user_score, timestamp, user_id) for user_id, user_score, timestamp in entries
+        }
+        self.keys: List[RankKey] = sorted(self.by_user.values())
+        self.version = version
+        self.built_at = time.monotonic()
+        # Held while the ranking is updated or read, which only blocks lookups of the same quiz
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get the number of ranked users."""
+        return len(self.keys)
+
+    def apply(self, entries: Iterable[Tuple[int, int, datetime]], version: int) -> None:
+        """Insert or move the entries written since the ranking's version, bringing it to `version`."""
+        for user_id, user_score, timestamp in entries:
+            previous = self.by_user.get(user_id)
+            if previous is not None:
+                del self.keys[bisect_left(self.keys, previous)]
+            key = (-user_score, timestamp, user_id)
+            insort(self.keys, key)
+            self.by_user[user_id] = key
+        self.version = version
+
+    def rank(self, user_id: int) -> int | None:
+        """Get the 1-based rank of a user, or None if they have no entry."""
+        key = self.by_user.get(user_id)
+        return None if key is None else bisect_left(self.keys, key) + 1
+
+    def percentile(self, user_id: int) -> float | None:
+        """
+        Get the percentage of entries whose score is at most the user's, or None if they have no entry.
+
+        Tied users share a percentile whatever their rank, the best score is at 100 and so is a sole entry.
+        """
+        key = self.by_user.get(user_id)
+        if key is None:
+            return None
+        # Keys of higher scores sort before the bare negated score of the user's
+        higher = bisect_left(self.keys, (key[0],))
+        return (len(self.keys) - higher) / len(self.keys) * 100
+
+
+class LeaderboardView(NamedTuple):
+    """A snapshot of the top of a leaderboard and of one user's position in it."""
+
+    total: int
+    top: List[RankKey]
+    rank: int | None
+    key: RankKey | None
+    percentile: float | None
+
+
+class LeaderboardCache:
+    """
+    Rankings of recently viewed leaderboards.
+
+    Every write to a leaderboard bumps its quiz's `leaderboard_version` and stamps the entry with it, so a cached
+    ranking catches up by reading the entries above the version it was last brought to, and reads nothing while the
+    versions match. Removing entries also moves the quiz's `leaderboard_reset_version` past every cached ranking's
+    version, which has them rebuilt. Rankings are rebuilt after `max_age` seconds anyway.
+    """
+
+    def __init__(self, max_size: int, max_age: float):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._rankings: Dict[int, Ranking] = {}
+        # Only guards swapping rankings in and out, never a query
+        self._lock = threading.Lock()
+
+    def view(self, quiz: Quiz, user_id: int, top_k: int) -> LeaderboardView:
+        """
+        Get the top entries of a quiz's leaderboard and a user's rank, after bringing the cached ranking up to date.
+
+        Args:
+            quiz: The quiz, as just read, for its leaderboard versions
+            user_id: ID of the user whose rank to look up
+            top_k: Number of top entries
+
+        Returns:
+            The number of entries, the top entries, and the user's rank, entry and percentile
+
+        """
+        ranking = self._rankings.get(quiz.id)
+        if (
+            ranking is None
+            or time.monotonic() - ranking.built_at > self.max_age
+            or ranking.version < quiz.leaderboard_reset_version
+        ):
+            # Concurrent lookups of the quiz may each build a ranking, and the last one built is kept
+            ranking = Ranking(self._entries(quiz.id), quiz.leaderboard_version)
+            with self._lock:
+                self.misses += 1
+                if len(self._rankings) >= self.max_size and quiz.id not in self._rankings:
+                    self._rankings.clear()
+                self._rankings[quiz.id] = ranking
+        else:
+            self.hits += 1
+
+        with ranking.lock:
+            if ranking.version < quiz.leaderboard_version:
+                ranking.apply(self._entries(quiz.id, after_version=ranking.version), quiz.leaderboard_version)
+
+            return LeaderboardView(
+                len(ranking),
+                ranking.keys[:top_k],
+                ranking.rank(user_id),
+                ranking.by_user.get(user_id),
+                ranking.percentile(user_id),
+            )
+
+    @staticmethod
+    def _entries(quiz_id: int, after_version: int | None = None) -> Iterable[Tuple[int, int, datetime]]:
+        statement = select(LeaderboardEntry.user_id, LeaderboardEntry.user_score, LeaderboardEntry.timestamp).where(
+            LeaderboardEntry.quiz_id == quiz_id
+        )
+        if after_version is not None:
+            statement = statement.where(LeaderboardEntry.version > after_version)
+        return db.session.execute(statement).tuples()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of cached rankings, the hits and misses, and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._rankings),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+def get_leaderboard_cache() -> LeaderboardCache:
+    """Get the leaderboard cache of the current app, creating it on first use."""
+    cache = current_app.extensions.get("leaderboard_cache")
+    if cache is None:
+        cache = current_app.extensions["leaderboard_cache"] = LeaderboardCache(
+            current_app.config["LEADERBOARD_CACHE_SIZE"], current_app.config["LEADERBOARD_CACHE_MAX_AGE"]
+        )
+    return cache
@@ -0,0 +1,115 @@
+"""Cursor (keyset) pagination helpers."""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Sequence, Tuple
+
+from sqlalchemy import DateTime, tuple_
+from sqlalchemy.orm import Query
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor that was not produced by `encode_cursor`."""
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last item of a page as an opaque cursor.
+
+    Args:
+        values: Sort key values, e.g. a timestamp and an ID. Datetimes are stored as ISO 8601 strings
+
+    Returns:
+        URL-safe cursor string
+
+    """
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int | None = None) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor: The opaque cursor sent by the client
+        size: Expected number of sort key values, if known
+
+    Returns:
+        The encoded sort key values
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not isinstance(values, list) or not all(isinstance(value, (str, int, float)) for value in values):
+        raise InvalidCursorError("Invalid cursor")
+    if size is not None and len(values) != size:
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+def build_page(rows: Sequence[Any], limit: int, sort_key: Callable[[Any], Tuple[Any, ...]]) -> Tuple[list, str | None]:
+    """
+    Split `limit + 1` fetched rows into a page and the cursor for the next page.
+
+    Args:
+        rows: Rows fetched with `LIMIT limit + 1`
+        limit: The page size requested by the client
+        sort_key: Returns the sort key values of a row
+
+    Returns:
+        Tuple of the page rows and the next cursor, which is None on the last page
+
+    """
+    page = list(rows[:limit])
+    next_cursor = encode_cursor(*sort_key(page[-1])) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def paginate_by_keyset(
+    query: Query, sort_columns: Sequence[Any], limit: int, cursor: str | None = None, descending: bool = False
+) -> Tuple[list, str | None]:
+    """
+    Fetch one page of `query` ordered by `sort_columns`, starting after `cursor`.
+
+    The last sort column must be unique (usually the primary key) so that the ordering is total.
+    Unlike `OFFSET`, the cost of a page does not grow with its depth when the sort columns are indexed.
+
+    Args:
+        query: The query to paginate, without ORDER BY or LIMIT
+        sort_columns: Mapped columns to order by. Rows must expose them under the same attribute names
+        limit: Maximum number of rows in the page
+        cursor: Cursor returned with the previous page, None or empty for the first page
+        descending: Order from the largest key to the smallest
+
+    Returns:
+        Tuple of the page rows and the next cursor, which is None on the last page
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+
+    """
+    if cursor:
+        values = decode_cursor(cursor, size=len(sort_columns))
+        try:
+            after = tuple(
+                datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+                for column, value in zip(sort_columns, values)
+            )
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+        key = tuple_(*sort_columns)
+        query = query.filter(key < after if descending else key > after)
+
+    order_by = [column.desc() for column in sort_columns] if descending else list(sort_columns)
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+    return build_page(rows, limit, lambda row: tuple(getattr(row, column.key) for column in sort_columns))
@@ -0,0 +1,148 @@
+"""Streaming import of question banks from CSV or NDJSON uploads."""
+
+import csv
+import hashlib
+import io
+import json
+from pathlib import PurePath
+from typing import IO, Any, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from quiz_api.models.database import db
+from quiz_api.models.models import Question
+from quiz_api.models.schemas import QuestionSchema
+from quiz_api.utils.question_totals import refresh_question_totals
+
+# Import format of each accepted MIME type and file extension
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    ".csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+# A parsed row: its line in the upload, and either its fields or why it could not be parsed
+ParsedRow = Tuple[int, Dict[str, Any] | None, str | None]
+
+
+def detect_import_format(requested: str | None, filename: str | None, mimetype: str | None) -> str | None:
+    """
+    Work out the format of an upload from the `format` argument, else its file extension, else its MIME type.
+
+    Args:
+        requested: The format asked for by the client, `csv` or `ndjson`
+        filename: Name of the uploaded file, if any
+        mimetype: MIME type of the upload
+
+    Returns:
+        `csv`, `ndjson`, or None if the format is not supported
+
+    """
+    if requested:
+        return requested.lower() if requested.lower() in IMPORT_FORMATS.values() else None
+    if filename and PurePath(filename).suffix.lower() in IMPORT_FORMATS:
+        return IMPORT_FORMATS[PurePath(filename).suffix.lower()]
+    return IMPORT_FORMATS.get(mimetype or "")
+
+
+def question_hash(question_statement: str) -> bytes:
+    """Hash a question statement, ignoring case and whitespace, to find duplicates without keeping their text."""
+    return hashlib.sha256(" ".join(question_statement.split()).casefold().encode()).digest()
+
+
+def iter_csv_rows(text_stream: IO[str]) -> Iterator[ParsedRow]:
+    """Parse CSV rows one at a time, dropping empty cells so that fields with defaults fall back to them."""
+    reader = csv.DictReader(text_stream)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}, None
+
+
+def iter_ndjson_rows(text_stream: IO[str]) -> Iterator[ParsedRow]:
+    """Parse one JSON object per line, skipping blank lines."""
+    for line_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            yield line_number, None, "Invalid JSON"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, data, None
+
+
+def import_questions(quiz_id: int, stream: IO[bytes], import_format: str, batch_size: int) -> Dict[str, Any]:
+    """
+    Import questions into a quiz from a UTF-8 CSV or NDJSON stream, without loading the whole upload.
+
+    Each row is validated with `QuestionSchema`, and rows whose statement is already in the quiz, or earlier in
+    the upload, are skipped. Valid rows are inserted in executemany batches in the current transaction, which the
+    caller commits.
+
+    Args:
+        quiz_id: ID of the quiz to import into
+        stream: Binary stream of the upload
+        import_format: `csv` or `ndjson`
+        batch_size: Number of rows per INSERT batch
+
+    Returns:
+        Report of the number of imported questions, the lines of skipped duplicates and the errors of invalid lines
+
+    Raises:
+        UnicodeDecodeError: If the upload is not UTF-8
+
+    """
+    # Only the hashes of the quiz's statements are kept in memory, however large the quiz
+    statements = select(Question.question_statement).where(Question.quiz_id == quiz_id)
+    seen = {question_hash(statement) for statement in db.session.scalars(statements.execution_options(yield_per=1000))}
+
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    rows = iter_csv_rows(text_stream) if import_format == "csv" else iter_ndjson_rows(text_stream)
+
+    imported = 0
+    duplicates: List[int] = []
+    errors: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+
+    for line_number, data, parse_error in rows:
+        if parse_error:
+            errors.append({"line": line_number, "details": [{"msg": parse_error}]})
+            continue
+        try:
+            question = QuestionSchema(**{**data, "quiz_id": quiz_id})
+        except ValidationError as exc:
+            details = [
+                {"field": ".".join(map(str, error["loc"])), "msg": error["msg"], "input": error["input"]}
+                for error in exc.errors()
+            ]
+            errors.append({"line": line_number, "details": details})
+            continue
+
+        digest = question_hash(question.question_statement)
+        if digest in seen:
+            duplicates.append(line_number)
+            continue
+        seen.add(digest)
+
+        batch.append(question.model_dump())
+        if len(batch) >= batch_size:
+            db.session.execute(insert(Question), batch)
+            imported += len(batch)
+            batch = []
+
+    if batch:
+        db.session.execute(insert(Question), batch)
+        imported += len(batch)
+
+    if imported:
+        refresh_question_totals(quiz_id)
+
+    return {"imported": imported, "duplicates": duplicates, "errors": errors}
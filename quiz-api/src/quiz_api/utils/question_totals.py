@@ -0,0 +1,36 @@
+"""Maintenance of the denormalized question totals stored on quizzes."""
+
+from sqlalchemy import func, select, update
+
+from quiz_api.models.database import db
+from quiz_api.models.models import Question, Quiz
+
+
+def refresh_question_totals(*quiz_ids: int) -> int:
+    """
+    Recompute `question_count` and `total_points` of quizzes from their questions, and bump `questions_version`.
+
+    Runs as a single UPDATE in the current transaction, so callers must call it
+    after their question changes are flushed and before they commit.
+
+    Args:
+        quiz_ids: IDs of the quizzes to refresh; refreshes every quiz if none are given
+
+    Returns:
+        Number of quizzes refreshed
+
+    """
+    statement = update(Quiz).values(
+        question_count=(select(func.count(Question.id)).where(Question.quiz_id == Quiz.id).scalar_subquery()),
+        total_points=(
+            select(func.coalesce(func.sum(Question.points), 0)).where(Question.quiz_id == Quiz.id).scalar_subquery()
+        ),
+        # Invalidates the cached answer keys of the quizzes in every worker
+        questions_version=Quiz.questions_version + 1,
+    )
+    if quiz_ids:
+        statement = statement.where(Quiz.id.in_(quiz_ids))
+
+    db.session.flush()
+    result = db.session.execute(statement, execution_options={"synchronize_session": False})
+    return result.rowcount
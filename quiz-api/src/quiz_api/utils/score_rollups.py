@@ -0,0 +1,391 @@
+"""Score rollups: running totals of the scores per quiz, chapter and subject, and per user and subject."""
+
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, Tuple
+
+from flask import current_app
+from sqlalchemy import Insert, Select, Update, bindparam, case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from quiz_api.models.database import db
+from quiz_api.models.models import (
+    Chapter,
+    ChapterScoreRollup,
+    Quiz,
+    QuizScoreRollup,
+    Score,
+    ScoreRollup,
+    SubjectScoreRollup,
+    UserStat,
+)
+
+ROLLUP_COLUMNS = ("attempts", "score_sum", "score_sum_of_squares", "max_score", "passes")
+USER_STAT_COLUMNS = (
+    "user_id",
+    "subject_id",
+    "attempts",
+    "score_sum",
+    "percentage_sum",
+    "best_percentage",
+    "latest_quiz_id",
+    "latest_percentage",
+    "latest_at",
+)
+
+
+def is_passing(user_score: Any, total_points: Any) -> Any:
+    """Whether a score reaches `PASS_MARK_PERCENT` of its quiz's points; also builds the SQL condition of columns."""
+    return (total_points > 0) & (user_score * 100 >= current_app.config["PASS_MARK_PERCENT"] * total_points)
+
+
+def percentage(user_score: Any, total_points: Any) -> Any:
+    """A score as a percentage of its quiz's points, 0 for a quiz without points; also builds the SQL expression."""
+    if isinstance(total_points, int):
+        return user_score * 100 / total_points if total_points > 0 else 0.0
+    return case((total_points > 0, user_score * 100.0 / total_points), else_=0.0)
+
+
+def _rollup_statements(rollup: type[ScoreRollup], key: str) -> Tuple[Update, Insert]:
+    """
+    Build the statements adding a score to the rollup row of `key`.
+
+    They are built once on the table, so that SQLAlchemy memoizes their cache keys and runs them as plain Core
+    statements.
+    """
+    table = rollup.__table__
+    add = (
+        update(table)
+        .where(table.c[key] == bindparam("key"))
+        .values(
+            attempts=table.c.attempts + bindparam("attempts"),
+            score_sum=table.c.score_sum + bindparam("score_sum"),
+            score_sum_of_squares=table.c.score_sum_of_squares + bindparam("score_sum_of_squares"),
+            max_score=case(
+                (table.c.max_score < bindparam("max_score"), bindparam("max_score")), else_=table.c.max_score
+            ),
+            passes=table.c.passes + bindparam("passes"),
+        )
+    )
+    create = insert(table).values({key: bindparam("key"), **{column: bindparam(column) for column in ROLLUP_COLUMNS}})
+    return add, create
+
+
+QUIZ_ROLLUP = _rollup_statements(QuizScoreRollup, "quiz_id")
+CHAPTER_ROLLUP = _rollup_statements(ChapterScoreRollup, "chapter_id")
+SUBJECT_ROLLUP = _rollup_statements(SubjectScoreRollup, "subject_id")
+
+
+def _user_stat_statements() -> Tuple[Update, Insert]:
+    """Build the statements adding a score to the stats of a user in a subject, like `_rollup_statements`."""
+    table = UserStat.__table__
+    new_percentage = bindparam("percentage", type_=table.c.percentage_sum.type)
+    timestamp = bindparam("timestamp", type_=table.c.latest_at.type)
+    # Scores submitted out of order, e.g. by the submission queue, do not replace a later one as the latest
+    is_latest = table.c.latest_at <= timestamp
+    add = (
+        update(table)
+        .where(table.c.user_id == bindparam("stat_user_id"), table.c.subject_id == bindparam("stat_subject_id"))
+        .values(
+            attempts=table.c.attempts + 1,
+            score_sum=table.c.score_sum + bindparam("score"),
+            percentage_sum=table.c.percentage_sum + new_percentage,
+            best_percentage=case(
+                (table.c.best_percentage < new_percentage, new_percentage), else_=table.c.best_percentage
+            ),
+            latest_quiz_id=case((is_latest, bindparam("quiz_id")), else_=table.c.latest_quiz_id),
+            latest_percentage=case((is_latest, new_percentage), else_=table.c.latest_percentage),
+            latest_at=case((is_latest, timestamp), else_=table.c.latest_at),
+        )
+    )
+    create = insert(table).values(
+        user_id=bindparam("stat_user_id"),
+        subject_id=bindparam("stat_subject_id"),
+        attempts=1,
+        score_sum=bindparam("score"),
+        percentage_sum=new_percentage,
+        best_percentage=new_percentage,
+        latest_quiz_id=bindparam("quiz_id"),
+        latest_percentage=new_percentage,
+        latest_at=timestamp,
+    )
+    return add, create
+
+
+USER_STAT = _user_stat_statements()
+QUIZ_PARENTS = (
+    select(Quiz.chapter_id, Chapter.subject_id, Quiz.total_points)
+    .join(Chapter, Chapter.id == Quiz.chapter_id)
+    .where(Quiz.id == bindparam("quiz_id"))
+)
+
+
+def record_score_rollups(quiz_id: int, user_id: int, user_score: int, timestamp: datetime) -> None:
+    """
+    Add a new score to the rollups of its quiz, chapter and subject, and to its user's stats, in the current transaction.
+
+    Rows are updated, or inserted in a savepoint on the first score, rather than upserted with `ON CONFLICT`, which
+    SQLAlchemy compiles again on every execution.
+
+    Args:
+        quiz_id: ID of the quiz
+        user_id: ID of the user who scored
+        user_score: Points of the new score
+        timestamp: When the score was submitted
+
+    """
+    chapter_id, subject_id, total_points = db.session.execute(QUIZ_PARENTS, {"quiz_id": quiz_id}).one()
+    values = {
+        "attempts": 1,
+        "score_sum": user_score,
+        "score_sum_of_squares": user_score * user_score,
+        "max_score": user_score,
+        "passes": int(is_passing(user_score, total_points)),
+    }
+    for statements, key in ((QUIZ_ROLLUP, quiz_id), (CHAPTER_ROLLUP, chapter_id), (SUBJECT_ROLLUP, subject_id)):
+        add_to_rollup(*statements, {"key": key, **values})
+    add_to_rollup(
+        *USER_STAT,
+        {
+            "stat_user_id": user_id,
+            "stat_subject_id": subject_id,
+            "quiz_id": quiz_id,
+            "score": user_score,
+            "percentage": percentage(user_score, total_points),
+            "timestamp": timestamp,
+        },
+    )
+
+
+def add_to_rollup(add: Update, create: Insert, params: Dict[str, Any]) -> None:
+    """Run the update of a rollup row, or the insert creating it when the update found no row."""
+    if db.session.execute(add, params).rowcount:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(create, params)
+    except IntegrityError:
+        # Inserted concurrently since the update
+        db.session.execute(add, params)
+
+
+def _combined(rollup: type[ScoreRollup]) -> tuple:
+    """Aggregates combining rollup rows into the rollup of their parent."""
+    return (
+        func.sum(rollup.attempts),
+        func.sum(rollup.score_sum),
+        func.sum(rollup.score_sum_of_squares),
+        func.max(rollup.max_score),
+        func.sum(rollup.passes),
+    )
+
+
+def _quiz_totals() -> Select:
+    return (
+        select(
+            Score.quiz_id,
+            func.count(Score.id),
+            func.sum(Score.user_score),
+            func.sum(Score.user_score * Score.user_score),
+            func.max(Score.user_score),
+            func.sum(case((is_passing(Score.user_score, Quiz.total_points), 1), else_=0)),
+        )
+        .join(Quiz, Quiz.id == Score.quiz_id)
+        .group_by(Score.quiz_id)
+    )
+
+
+def _chapter_totals() -> Select:
+    return (
+        select(Quiz.chapter_id, *_combined(QuizScoreRollup))
+        .join(Quiz, Quiz.id == QuizScoreRollup.quiz_id)
+        .group_by(Quiz.chapter_id)
+    )
+
+
+def _subject_totals() -> Select:
+    return (
+        select(Chapter.subject_id, *_combined(ChapterScoreRollup))
+        .join(Chapter, Chapter.id == ChapterScoreRollup.chapter_id)
+        .group_by(Chapter.subject_id)
+    )
+
+
+def refresh_quiz_rollups(*quiz_ids: int) -> None:
+    """Recompute the rollups of quizzes from their scores, e.g. after a user is deleted with their scores."""
+    db.session.execute(delete(QuizScoreRollup).where(QuizScoreRollup.quiz_id.in_(quiz_ids)))
+    db.session.execute(
+        insert(QuizScoreRollup).from_select(
+            ["quiz_id", *ROLLUP_COLUMNS], _quiz_totals().where(Score.quiz_id.in_(quiz_ids))
+        )
+    )
+
+
+def refresh_chapter_rollups(*chapter_ids: int) -> None:
+    """Recompute the rollups of chapters from the rollups of their quizzes, e.g. after a quiz is deleted."""
+    db.session.execute(delete(ChapterScoreRollup).where(ChapterScoreRollup.chapter_id.in_(chapter_ids)))
+    db.session.execute(
+        insert(ChapterScoreRollup).from_select(
+            ["chapter_id", *ROLLUP_COLUMNS], _chapter_totals().where(Quiz.chapter_id.in_(chapter_ids))
+        )
+    )
+
+
+def refresh_subject_rollups(*subject_ids: int) -> None:
+    """Recompute the rollups of subjects from the rollups of their chapters, e.g. after a chapter is deleted."""
+    db.session.execute(delete(SubjectScoreRollup).where(SubjectScoreRollup.subject_id.in_(subject_ids)))
+    db.session.execute(
+        insert(SubjectScoreRollup).from_select(
+            ["subject_id", *ROLLUP_COLUMNS], _subject_totals().where(Chapter.subject_id.in_(subject_ids))
+        )
+    )
+
+
+def _user_stat_totals() -> Select:
+    """The stats of every user in every subject, computed from `scores`."""
+    scores = (
+        select(
+            Score.user_id,
+            Chapter.subject_id,
+            Score.quiz_id,
+            Score.user_score,
+            percentage(Score.user_score, Quiz.total_points).label("percentage"),
+            Score.timestamp,
+            func.row_number()
+            .over(partition_by=(Score.user_id, Chapter.subject_id), order_by=(Score.timestamp.desc(), Score.id.desc()))
+            .label("recency"),
+        )
+        .join(Quiz, Quiz.id == Score.quiz_id)
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .subquery()
+    )
+    latest = scores.c.recency == 1
+    return select(
+        scores.c.user_id,
+        scores.c.subject_id,
+        func.count(),
+        func.sum(scores.c.user_score),
+        func.sum(scores.c.percentage),
+        func.max(scores.c.percentage),
+        func.max(case((latest, scores.c.quiz_id))),
+        func.max(case((latest, scores.c.percentage))),
+        func.max(case((latest, scores.c.timestamp))),
+    ).group_by(scores.c.user_id, scores.c.subject_id)
+
+
+def refresh_user_stats(*subject_ids: int) -> None:
+    """Recompute the users' stats in subjects from their scores, e.g. after a quiz or chapter is deleted."""
+    db.session.execute(delete(UserStat).where(UserStat.subject_id.in_(subject_ids)))
+    totals = _user_stat_totals().subquery()
+    db.session.execute(
+        insert(UserStat).from_select(
+            list(USER_STAT_COLUMNS), select(totals).where(totals.c.subject_id.in_(subject_ids))
+        )
+    )
+
+
+def rebuild_score_rollups() -> int:
+    """
+    Rebuild every rollup and user stat from `scores`, in the current transaction.
+
+    Passes are counted against the current `PASS_MARK_PERCENT` and quiz points, so a rebuild also applies a change
+    of either to past scores.
+
+    Returns:
+        Number of quizzes with scores
+
+    """
+    for rollup in (UserStat, SubjectScoreRollup, ChapterScoreRollup, QuizScoreRollup):
+        db.session.execute(delete(rollup))
+    result = db.session.execute(insert(QuizScoreRollup).from_select(["quiz_id", *ROLLUP_COLUMNS], _quiz_totals()))
+    db.session.execute(insert(ChapterScoreRollup).from_select(["chapter_id", *ROLLUP_COLUMNS], _chapter_totals()))
+    db.session.execute(insert(SubjectScoreRollup).from_select(["subject_id", *ROLLUP_COLUMNS], _subject_totals()))
+    db.session.execute(insert(UserStat).from_select(list(USER_STAT_COLUMNS), _user_stat_totals()))
+    return result.rowcount
+
+
+def rollup_stats(
+    attempts: int | None,
+    score_sum: int | None,
+    score_sum_of_squares: int | None,
+    max_score: int | None,
+    passes: int | None,
+) -> Dict[str, Any]:
+    """
+    Derive the summary statistics of a rollup, which is all None for a quiz, chapter or subject without scores.
+
+    Returns:
+        The attempts, the average and standard deviation of the scores, the best score, and the pass rate in percent
+
+    """
+    if not attempts:
+        return {"attempts": 0, "average_score": None, "score_stddev": None, "max_score": None, "pass_rate": None}
+
+    average = score_sum / attempts
+    # Population variance from the running sums, clamped at zero against floating point error
+    variance = max(score_sum_of_squares / attempts - average * average, 0.0)
+    return {
+        "attempts": attempts,
+        "average_score": round(average, 2),
+        "score_stddev": round(math.sqrt(variance), 2),
+        "max_score": max_score,
+        "pass_rate": round(passes / attempts * 100, 2),
+    }
+
+
+def user_stat_totals(user_ids: Iterable[int] | None = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Combine the stats of users across their subjects, with one grouped query over `user_stats`.
+
+    Args:
+        user_ids: IDs of the users, defaults to every user
+
+    Returns:
+        The totals of each user with scores, by user ID, as from `user_stat_summary`
+
+    """
+    query = select(
+        UserStat.user_id,
+        func.sum(UserStat.attempts),
+        func.sum(UserStat.score_sum),
+        func.sum(UserStat.percentage_sum),
+        func.max(UserStat.best_percentage),
+        func.max(UserStat.latest_at),
+    ).group_by(UserStat.user_id)
+    if user_ids is not None:
+        query = query.where(UserStat.user_id.in_(list(user_ids)))
+    return {row[0]: user_stat_summary(*row[1:]) for row in db.session.execute(query)}
+
+
+def user_stat_summary(
+    attempts: int | None,
+    score_sum: int | None,
+    percentage_sum: float | None,
+    best_percentage: float | None,
+    latest_at: datetime | None,
+) -> Dict[str, Any]:
+    """
+    Derive the summary of a user's stats, which is all None for a user without scores.
+
+    Returns:
+        The attempts, total score, average and best percentage of the quizzes' points, and when the latest score was
+        submitted
+
+    """
+    if not attempts:
+        return {
+            "attempts": 0,
+            "total_score": 0,
+            "average_percentage": None,
+            "best_percentage": None,
+            "latest_attempt_at": None,
+        }
+
+    return {
+        "attempts": attempts,
+        "total_score": score_sum,
+        "average_percentage": round(percentage_sum / attempts, 2),
+        "best_percentage": round(best_percentage, 2),
+        "latest_attempt_at": latest_at.isoformat(),
+    }
@@ -1,168 +1,216 @@
 """Search utilities for the application."""
 
 from flask import current_app
-from sqlalchemy import text
+from sqlalchemy import func, literal, select, tuple_
 
 from quiz_api.models.database import db
-
-
-def search_subjects(query_text, limit=10, offset=0):
+from quiz_api.utils.pagination import build_page, decode_cursor
+from quiz_api.utils.search_backends import SEARCH_FIELDS, get_search_backend, query_terms
+
+# Columns of the result rows of each table, in the order the routes read them, followed by `search_rank`
+SEARCH_COLUMNS = {
+    "users": ("id", "username", "password", "full_name", "dob", "email", "role", "joined_at"),
+    "subjects": ("id", "name", "description", "created_at", "updated_at"),
+    "chapters": ("id", "name", "description", "subject_id", "created_at", "updated_at"),
+    "quizzes": ("id", "chapter_id", "name", "date_of_quiz", "time_duration", "remarks", "created_at", "updated_at"),
+}
+
+
+def _search_matches(table_name, terms, filters):
+    """Join a table to the search backend's ranked matches of the terms, keeping the rows that pass the filters."""
+    table = db.metadata.tables[table_name]
+    matches = get_search_backend().match(table_name, terms).subquery("matches")
+    statement = (
+        select(*(table.c[column] for column in SEARCH_COLUMNS[table_name]), matches.c.search_rank)
+        .select_from(table)
+        .join(matches, matches.c.id == table.c.id)
+        .where(*(table.c[column] == value for column, value in filters.items()))
+    )
+    return statement, matches
+
+
+def _run_search(table_name, query_text, limit, offset, after, **filters):
     """
-    Search subjects using FTS.
+    Search a table through the app's search backend, ordered by rank, paged by offset or by a `(rank, id)` keyset.
 
     Args:
+        table_name: One of `SEARCH_COLUMNS`
         query_text: The search query text
         limit: Maximum number of results to return
         offset: Number of results to skip
+        after: Optional `(search_rank, id)` of the last row of the previous page
+        filters: Column equality filters, applied before paginating so pages are not cut short
 
     Returns:
-        List of Subject objects matching the query
+        List of rows matching the query, with `search_rank` as the last column
 
     """
-    if not query_text:
+    terms = query_terms(query_text or "")
+    if not terms:
         return []
 
     try:
-        result = db.session.execute(
-            text("""
-                 SELECT s.* FROM subjects s
-                 JOIN subjects_fts ON s.id = subjects_fts.rowid
-                 WHERE subjects_fts MATCH :query
-                 ORDER BY subjects_fts.rank
-                 LIMIT :limit OFFSET :offset
-            """),
-            {"query": f"{query_text}*", "limit": limit, "offset": offset},
-        ).fetchall()
-
-        return result
+        statement, matches = _search_matches(table_name, terms, filters)
+        id_column = statement.selected_columns.id
+        if after is not None:
+            statement = statement.where(tuple_(matches.c.search_rank, id_column) > tuple_(*after))
+        statement = statement.order_by(matches.c.search_rank, id_column).limit(limit).offset(offset)
+        return db.session.execute(statement).fetchall()
     except Exception as e:
-        current_app.logger.error(f"Error searching subjects: {str(e)}")
+        current_app.logger.error(f"Error searching {table_name}: {str(e)}")
         return []
-    finally:
-        db.session.close()
 
 
-def search_chapters(query_text, limit=10, offset=0):
+def count_search_matches(table, query_text, approximate=False, **filters):
     """
-    Search chapters using FTS.
+    Count the rows of a table matching a search query, using the same backend match and filters as the search.
+
+    Counts are cached per app by query terms and filters. A cached count is reused until the search
+    backend's version of the table changes, e.g. when the `fts_versions` triggers fire.
 
     Args:
+        table: One of `SEARCH_COLUMNS`
         query_text: The search query text
-        limit: Maximum number of results to return
-        offset: Number of results to skip
+        approximate: Stop counting at `SEARCH_APPROXIMATE_COUNT_CAP` matches, for very broad prefix queries
+        filters: Column equality filters of the search, e.g. `subject_id`
 
     Returns:
-        List of Chapter objects matching the query
+        Tuple of the number of matches and whether it is only a lower bound because the cap was reached
 
     """
-    if not query_text:
-        return []
+    if table not in SEARCH_FIELDS:
+        raise ValueError(f"Unknown search table: {table}")
 
-    try:
-        # Use FTS to search chapters
-        result = db.session.execute(
-            text("""
-                SELECT c.id, c.name, c.description, c.subject_id, c.created_at, c.updated_at
-                FROM chapters c
-                JOIN chapters_fts fts ON c.id = fts.rowid
-                WHERE chapters_fts MATCH :query
-                ORDER BY rank
-                LIMIT :limit OFFSET :offset
-            """),
-            {"query": f"{query_text}*", "limit": limit, "offset": offset},
-        ).fetchall()
-
-        return result
+    terms = query_terms(query_text)
+    if not terms:
+        return 0, False
 
+    cap = current_app.config["SEARCH_APPROXIMATE_COUNT_CAP"] if approximate else None
+    key = (table, tuple(terms), tuple(sorted(filters.items())), cap)
+    cache = current_app.extensions.setdefault("search_count_cache", {})
+
+    try:
+        backend = get_search_backend()
+        version = backend.version(table)
+        cached = cache.get(key)
+        if cached is not None and cached[0] == version:
+            count = cached[1]
+        else:
+            if filters:
+                statement, _ = _search_matches(table, terms, filters)
+                matches = statement.with_only_columns(literal(1))
+            else:
+                matches = select(literal(1)).select_from(backend.match(table, terms).subquery("matches"))
+
+            if cap is not None:
+                matches = matches.limit(cap)
+
+            count = db.session.execute(select(func.count()).select_from(matches.subquery())).scalar_one()
+
+            if len(cache) >= current_app.config["SEARCH_COUNT_CACHE_SIZE"]:
+                cache.clear()
+            cache[key] = (version, count)
+
+        return count, cap is not None and count >= cap
     except Exception as e:
-        current_app.logger.error(f"Error searching chapters: {str(e)}")
-        return []
-    finally:
-        db.session.close()
+        current_app.logger.error(f"Error counting {table} search matches: {str(e)}")
+        return 0, False
 
 
-def search_users(query_text, limit=10, offset=0):
+def paginate_search(search, query_text, limit, offset=0, cursor=None, **filters):
     """
-    Search users using FTS.
+    Page through the results of one of the `search_*` functions by offset or by cursor.
 
     Args:
+        search: The search function, e.g. `search_subjects`
         query_text: The search query text
         limit: Maximum number of results to return
-        offset: Number of results to skip
+        offset: Number of results to skip, used when `cursor` is None
+        cursor: Cursor from the previous page, or an empty string for the first page in cursor mode
+        filters: Extra keyword arguments of the search function, e.g. `chapter_id`
 
     Returns:
-        List of User objects matching the query
+        Tuple of the matching rows and the next cursor, which is None on the last page and in offset mode
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
 
     """
-    if not query_text:
-        return []
+    if cursor is None:
+        return search(query_text, limit=limit, offset=offset, **filters), None
 
-    try:
-        # Use FTS to search users
-        result = db.session.execute(
-            text("""
-                SELECT u.id, u.username, u.password, u.full_name, u.dob, u.email, u.role, u.joined_at
-                FROM users u
-                JOIN users_fts fts ON u.id = fts.rowid
-                WHERE users_fts MATCH :query
-                ORDER BY rank
-                LIMIT :limit OFFSET :offset
-            """),
-            {"query": f"{query_text}*", "limit": limit, "offset": offset},
-        ).fetchall()
-
-        return result
+    after = tuple(decode_cursor(cursor, size=2)) if cursor else None
+    rows = search(query_text, limit=limit + 1, after=after, **filters)
+    return build_page(rows, limit, lambda row: (row.search_rank, row.id))
 
-    except Exception as e:
-        current_app.logger.error(f"Error searching users: {str(e)}")
-        return []
-    finally:
-        db.session.close()
+
+def search_subjects(query_text, limit=10, offset=0, after=None):
+    """
+    Search subjects through the search backend.
+
+    Args:
+        query_text: The search query text
+        limit: Maximum number of results to return
+        offset: Number of results to skip
+        after: Optional `(search_rank, id)` cursor position to continue from
+
+    Returns:
+        List of subject rows matching the query
+
+    """
+    return _run_search("subjects", query_text, limit, offset, after)
 
 
-def search_quizzes(query_text, limit=10, offset=0, chapter_id=None):
+def search_chapters(query_text, limit=10, offset=0, subject_id=None, after=None):
     """
-    Search quizzes using FTS.
+    Search chapters through the search backend.
 
     Args:
         query_text: The search query text
         limit: Maximum number of results to return
         offset: Number of results to skip
-        chapter_id: Optional chapter ID to filter results
+        subject_id: Optional subject ID to filter results
+        after: Optional `(search_rank, id)` cursor position to continue from
 
     Returns:
-        List of Quiz objects matching the query
+        List of chapter rows matching the query
 
     """
-    if not query_text:
-        return []
+    filters = {} if subject_id is None else {"subject_id": subject_id}
+    return _run_search("chapters", query_text, limit, offset, after, **filters)
 
-    try:
-        # Base query
-        sql_query = """
-            SELECT q.id, q.chapter_id, q.name, q.date_of_quiz, q.time_duration, q.remarks, q.created_at, q.updated_at
-            FROM quizzes q
-            JOIN quizzes_fts fts ON q.id = fts.rowid
-            WHERE quizzes_fts MATCH :query
-        """
 
-        params = {"query": f"{query_text}*", "limit": limit, "offset": offset}
+def search_users(query_text, limit=10, offset=0, after=None):
+    """
+    Search users through the search backend.
 
-        # Add chapter filter if provided
-        if chapter_id is not None:
-            sql_query += " AND q.chapter_id = :chapter_id"
-            params["chapter_id"] = chapter_id
+    Args:
+        query_text: The search query text
+        limit: Maximum number of results to return
+        offset: Number of results to skip
+        after: Optional `(search_rank, id)` cursor position to continue from
 
-        # Add ordering and pagination
-        sql_query += " ORDER BY rank LIMIT :limit OFFSET :offset"
+    Returns:
+        List of user rows matching the query
 
-        # Execute query
-        result = db.session.execute(text(sql_query), params).fetchall()
+    """
+    return _run_search("users", query_text, limit, offset, after)
 
-        return result
 
-    except Exception as e:
-        current_app.logger.error(f"Error searching quizzes: {str(e)}")
-        return []
-    finally:
-        db.session.close()
+def search_quizzes(query_text, limit=10, offset=0, chapter_id=None, after=None):
+    """
+    Search quizzes through the search backend.
+
+    Args:
+        query_text: The search query text
+        limit: Maximum number of results to return
+        offset: Number of results to skip
+        chapter_id: Optional chapter ID to filter results
+        after: Optional `(search_rank, id)` cursor position to continue from
+
+    Returns:
+        List of quiz rows matching the query
+
+    """
+    filters = {} if chapter_id is None else {"chapter_id": chapter_id}
+    return _run_search("quizzes", query_text, limit, offset, after, **filters)
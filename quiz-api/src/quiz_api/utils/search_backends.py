@@ -0,0 +1,368 @@
+"""
+Pluggable full-text search backends.
+
+A backend finds the rows of a searchable table matching the terms of a query and ranks them. The search
+helpers in `quiz_api.utils.search` join those ranked matches back to the table, so filtering, paging and
+counting are the same for every backend:
+
+- `fts5`: SQLite FTS5 virtual tables kept in sync by triggers (see `quiz_api.utils.fts`)
+- `postgres`: PostgreSQL generated `tsvector` columns with GIN indexes
+- `memory`: An in-process inverted index, for tests and databases without full-text search
+"""
+
+import os
+import re
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Iterable
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import Float, Integer, case, event, false, literal, select, text
+from sqlalchemy.sql import Selectable
+
+from quiz_api.models.database import RoutingSession, db
+from quiz_api.utils.fts import setup_fts
+
+# Indexed text columns of each searchable table
+SEARCH_FIELDS = {
+    "users": ("username", "full_name", "email"),
+    "subjects": ("name", "description"),
+    "chapters": ("name", "description"),
+    "quizzes": ("name", "remarks"),
+}
+
+TERM_PATTERN = re.compile(r"[^\W_]+")  # Letters and digits, like the FTS5 unicode61 tokenizer
+
+
+def query_terms(query_text: str) -> list[str]:
+    """
+    Split a search query into lowercase word terms.
+
+    Every term must match, and the last one also matches as a prefix, so results narrow as the user types.
+    Punctuation only separates terms, so no query can be a syntax error in any backend.
+
+    Args:
+        query_text: The search query text
+
+    Returns:
+        The terms of the query, empty if it has no words
+
+    """
+    return TERM_PATTERN.findall(query_text.lower())
+
+
+class SearchBackend(ABC):
+    """Interface of a full-text search backend."""
+
+    name: str
+
+    @abstractmethod
+    def setup(self) -> None:
+        """Create the backend's index structures. Safe to call on every start."""
+
+    @abstractmethod
+    def match(self, table: str, terms: list[str]) -> Selectable:
+        """
+        Select the rows of a table matching every term, the last one as a prefix.
+
+        Args:
+            table: One of `SEARCH_FIELDS`
+            terms: Non-empty terms from `query_terms`
+
+        Returns:
+            A SELECT of the matching rows' `id` and their `search_rank`, lower ranks being better matches
+
+        """
+
+    def version(self, table: str) -> int:
+        """
+        Get a counter that changes whenever the indexed rows of a table change, to invalidate cached counts.
+
+        Args:
+            table: One of `SEARCH_FIELDS`
+
+        Returns:
+            The table's version, bumped by database triggers in every process
+
+        """
+        return db.session.execute(
+            text("SELECT version FROM fts_versions WHERE name = :name"), {"name": table}
+        ).scalar_one()
+
+
+class FTS5SearchBackend(SearchBackend):
+    """SQLite FTS5 search, ranked by bm25."""
+
+    name = "fts5"
+
+    def setup(self) -> None:
+        """Create the FTS5 tables, their sync triggers and the version counters."""
+        setup_fts()
+
+    def match(self, table: str, terms: list[str]) -> Selectable:
+        """Select the FTS5 matches of the terms with their bm25 rank."""
+        # Terms are quoted as strings so FTS5 never reads them as operators or column filters
+        fts_query = " ".join(f'"{term}"' for term in terms) + "*"
+        return (
+            text(f"SELECT rowid AS id, rank AS search_rank FROM {table}_fts WHERE {table}_fts MATCH :query")
+            .bindparams(query=fts_query)
+            .columns(id=Integer, search_rank=Float)
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """PostgreSQL search over generated `tsvector` columns with GIN indexes, ranked by `ts_rank`."""
+
+    name = "postgres"
+    text_config = "english"
+
+    def setup(self) -> None:
+        """Add a generated `search_vector` column with a GIN index to each table, and the version counters."""
+        try:
+            db.session.execute(
+                text("""
+                CREATE TABLE IF NOT EXISTS fts_versions (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0
+                );
+            """)
+            )
+            db.session.execute(
+                text("""
+                CREATE OR REPLACE FUNCTION bump_fts_version() RETURNS trigger AS $$
+                BEGIN
+                    UPDATE fts_versions SET version = version + 1 WHERE name = TG_TABLE_NAME;
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+            """)
+            )
+
+            for table, fields in SEARCH_FIELDS.items():
+                # Earlier fields weigh more, e.g. a subject's name over its description
+                document = " || ".join(
+                    f"setweight(to_tsvector('{self.text_config}', coalesce({field}, '')), '{weight}')"
+                    for field, weight in zip(fields, "ABCD")
+                )
+                db.session.execute(
+                    text(f"""
+                    ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector
+                    GENERATED ALWAYS AS ({document}) STORED;
+                """)
+                )
+                db.session.execute(
+                    text(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector);")
+                )
+
+                db.session.execute(
+                    text("INSERT INTO fts_versions(name, version) VALUES (:name, 0) ON CONFLICT (name) DO NOTHING;"),
+                    {"name": table},
+                )
+                db.session.execute(text(f"DROP TRIGGER IF EXISTS {table}_version ON {table};"))
+                db.session.execute(
+                    text(f"""
+                    CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE ON {table}
+                    FOR EACH STATEMENT EXECUTE FUNCTION bump_fts_version();
+                """)
+                )
+
+            db.session.commit()
+            current_app.logger.info("PostgreSQL search setup completed successfully")
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error setting up PostgreSQL search: {str(e)}")
+            raise
+
+    def match(self, table: str, terms: list[str]) -> Selectable:
+        """Select the rows whose `search_vector` matches the terms, ranked by descending `ts_rank`."""
+        ts_query = " & ".join([*terms[:-1], f"{terms[-1]}:*"])
+        return (
+            text(f"""
+                SELECT id, -ts_rank(search_vector, query) AS search_rank
+                FROM {table}, to_tsquery('{self.text_config}', :query) AS query
+                WHERE search_vector @@ query
+            """)
+            .bindparams(query=ts_query)
+            .columns(id=Integer, search_rank=Float)
+        )
+
+
+class InvertedIndex:
+    """Term frequencies per document of one table, with a sorted vocabulary for prefix lookups."""
+
+    def __init__(self, documents: Iterable[tuple[int, str]]):
+        self.postings: dict[str, dict[int, int]] = defaultdict(dict)
+        for document_id, document in documents:
+            for term in query_terms(document):
+                frequencies = self.postings[term]
+                frequencies[document_id] = frequencies.get(document_id, 0) + 1
+        self.vocabulary = sorted(self.postings)
+
+    def _prefix_postings(self, prefix: str) -> dict[int, int]:
+        postings: dict[int, int] = {}
+        for term in self.vocabulary[bisect_left(self.vocabulary, prefix) :]:
+            if not term.startswith(prefix):
+                break
+            for document_id, frequency in self.postings[term].items():
+                postings[document_id] = postings.get(document_id, 0) + frequency
+        return postings
+
+    def search(self, terms: list[str]) -> dict[int, float]:
+        """
+        Find the documents containing every term, the last one as a prefix.
+
+        Args:
+            terms: Non-empty terms from `query_terms`
+
+        Returns:
+            The rank of each matching document: its negated number of term occurrences
+
+        """
+        scores: dict[int, int] | None = None
+        for position, term in enumerate(terms):
+            if position == len(terms) - 1:
+                postings = self._prefix_postings(term)
+            else:
+                postings = self.postings.get(term, {})
+            if scores is None:
+                scores = dict(postings)
+            else:
+                scores = {
+                    document_id: scores[document_id] + f
+                    for document_id, f in postings.items()
+                    if document_id in scores
+                }
+            if not scores:
+                return {}
+        return {document_id: -float(score) for document_id, score in (scores or {}).items()}
+
+
+class InMemorySearchBackend(SearchBackend):
+    """
+    Search through in-process inverted indexes, for tests and databases without full-text search.
+
+    A table's index is built on its first search and dropped when the ORM writes to the table, so raw SQL
+    writes go unnoticed. Indexes are per process, so this backend only suits a single worker.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._indexes: dict[str, InvertedIndex] = {}
+        self._versions = dict.fromkeys(SEARCH_FIELDS, 0)
+
+    def setup(self) -> None:
+        """Listen to ORM writes to keep the indexes current. Indexes themselves are built on demand."""
+        for identifier, listener in (
+            ("after_flush", _invalidate_flushed_tables),
+            ("do_orm_execute", _invalidate_bulk_statement_table),
+            ("after_rollback", _invalidate_all_tables),
+        ):
+            if not event.contains(RoutingSession, identifier, listener):
+                event.listen(RoutingSession, identifier, listener)
+
+    def invalidate(self, table: str) -> None:
+        """Drop the index of a table, to be rebuilt by its next search."""
+        self._versions[table] += 1
+        self._indexes.pop(table, None)
+
+    def version(self, table: str) -> int:
+        """Get the number of times the table's index was invalidated."""
+        return self._versions[table]
+
+    def _index(self, table: str) -> InvertedIndex:
+        index = self._indexes.get(table)
+        if index is None:
+            columns = db.metadata.tables[table].c
+            fields = [columns[field] for field in SEARCH_FIELDS[table]]
+            rows = db.session.execute(select(columns.id, *fields)).all()
+            index = InvertedIndex((row[0], " ".join(value for value in row[1:] if value)) for row in rows)
+            self._indexes[table] = index
+        return index
+
+    def match(self, table: str, terms: list[str]) -> Selectable:
+        """Select the IDs found in the table's index, with their rank as a literal per ID."""
+        ranks = self._index(table).search(terms)
+        columns = db.metadata.tables[table].c
+        if not ranks:
+            return select(columns.id, literal(0.0).label("search_rank")).where(false())
+        return select(columns.id, case(ranks, value=columns.id).label("search_rank")).where(columns.id.in_(ranks))
+
+
+def _memory_backend() -> InMemorySearchBackend | None:
+    backend = current_app.extensions.get("search_backend") if has_app_context() else None
+    return backend if isinstance(backend, InMemorySearchBackend) else None
+
+
+def _invalidate_flushed_tables(session, flush_context) -> None:
+    backend = _memory_backend()
+    if backend is None:
+        return
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, "__tablename__", None)
+        if table in SEARCH_FIELDS:
+            backend.invalidate(table)
+
+
+def _invalidate_bulk_statement_table(orm_execute_state) -> None:
+    backend = _memory_backend()
+    if backend is None or orm_execute_state.is_select or orm_execute_state.bind_mapper is None:
+        return
+    table = orm_execute_state.bind_mapper.local_table.name
+    if table in SEARCH_FIELDS:
+        backend.invalidate(table)
+
+
+def _invalidate_all_tables(session) -> None:
+    backend = _memory_backend()
+    if backend is not None:
+        for table in SEARCH_FIELDS:
+            backend.invalidate(table)
+
+
+SEARCH_BACKENDS: dict[str, type[SearchBackend]] = {
+    backend.name: backend for backend in (FTS5SearchBackend, PostgresSearchBackend, InMemorySearchBackend)
+}
+
+
+def init_search(app: Flask) -> None:
+    """
+    Select the search backend of the app, from `SEARCH_BACKEND` or else the database dialect.
+
+    Args:
+        app: The Flask application
+
+    Raises:
+        ValueError: If `SEARCH_BACKEND` names an unknown backend
+
+    """
+    name = app.config.get("SEARCH_BACKEND")
+    if not name:
+        database_uri = app.config["SQLALCHEMY_DATABASE_URI"]
+        if database_uri.startswith("sqlite"):
+            name = FTS5SearchBackend.name
+        elif database_uri.startswith("postgresql"):
+            name = PostgresSearchBackend.name
+        else:
+            app.logger.warning("No full-text search for this database, falling back to in-memory search")
+            name = InMemorySearchBackend.name
+
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {name}")
+    app.extensions["search_backend"] = SEARCH_BACKENDS[name]()
+
+
+def get_search_backend() -> SearchBackend:
+    """Get the search backend of the current app."""
+    return current_app.extensions["search_backend"]
+
+
+def setup_search() -> None:
+    """Set up the index structures of the current app's search backend."""
+    # Skip search setup during migrations
+    if os.environ.get("FLASK_DB_MIGRATION", "false").lower() == "true":
+        current_app.logger.info("Search setup skipped: Database migration in progress")
+        return
+
+    get_search_backend().setup()
@@ -0,0 +1,101 @@
+"""Caches of serialized JSON responses, served with strong ETags."""
+
+import hashlib
+from typing import Any, Callable, Dict, Hashable, NamedTuple
+
+from flask import Response, current_app, request
+
+from quiz_api.utils.single_flight import get_single_flight
+
+
+class CachedPayload(NamedTuple):
+    """A serialized JSON payload and its strong ETag, valid while the source data has the same fingerprint."""
+
+    fingerprint: Hashable
+    body: bytes
+    etag: str
+
+
+class PayloadCache:
+    """Serialized JSON payloads by key, rebuilt when the fingerprint of their source data changes."""
+
+    def __init__(self, name: str, max_size: int):
+        self.name = name
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._payloads: Dict[Hashable, CachedPayload] = {}
+
+    def get(self, key: Hashable, fingerprint: Hashable, build: Callable[[], Any]) -> CachedPayload:
+        """
+        Get the serialized payload of a key, building and serializing it unless the cached one has the fingerprint.
+
+        Builds are coalesced, so concurrent misses of a key build it once, and callers that would wait on another
+        worker's build get the outdated payload if there is one.
+
+        Args:
+            key: The cache key, e.g. a quiz ID
+            fingerprint: Every value of the source data that the payload depends on, e.g. a version stamp
+            build: Builds the payload as JSON serializable data
+
+        Returns:
+            The cached payload
+
+        """
+        payload = self._payloads.get(key)
+        if payload is not None and payload.fingerprint == fingerprint:
+            self.hits += 1
+            return payload
+
+        self.misses += 1
+        stale = payload.body if payload is not None else None
+        body = get_single_flight().do(
+            f"{self.name}:{key}:{fingerprint}", lambda: current_app.json.dumps(build()).encode(), stale=stale
+        )
+        if body is stale:
+            return payload
+
+        payload = CachedPayload(fingerprint, body, hashlib.sha256(body).hexdigest())
+        if len(self._payloads) >= self.max_size and key not in self._payloads:
+            self._payloads.clear()
+        self._payloads[key] = payload
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of cached payloads, the hits and misses, and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._payloads),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+
+def get_payload_cache(name: str) -> PayloadCache:
+    """Get a named payload cache of the current app, creating it on first use."""
+    caches = current_app.extensions.setdefault("payload_caches", {})
+    if name not in caches:
+        caches[name] = PayloadCache(name, current_app.config["PAYLOAD_CACHE_SIZE"])
+    return caches[name]
+
+
+def cached_json_response(payload: CachedPayload) -> Response:
+    """
+    Serve a cached payload with its strong ETag, or a 304 if the client's `If-None-Match` already has it.
+
+    The response is private, so shared caches never serve it to users who did not pass the route's checks,
+    and clients revalidate it on every use.
+
+    Args:
+        payload: The cached payload
+
+    Returns:
+        The response
+
+    """
+    response = current_app.response_class(payload.body, mimetype="application/json")
+    response.set_etag(payload.etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -0,0 +1,172 @@
+"""Request coalescing: one computation per key at a time, within a worker and across workers."""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict
+
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX, so coalescing stays within the process
+    fcntl = None
+
+# Seconds between attempts to take the lock of a key that another worker holds
+LOCK_POLL_INTERVAL = 0.01
+
+
+class _Flight:
+    """A computation in progress, which other threads of the process wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: bytes | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Runs one computation of a key at a time, and hands its result to every caller that asked for the key meanwhile.
+
+    Threads of a process wait on the thread that computes the key. Across workers, the computing worker holds an
+    exclusive `flock` on a file per key and writes the result into it, so workers that waited on the lock read the
+    result instead of computing it again. Results are serialized bytes, e.g. a JSON response body.
+    """
+
+    def __init__(self, lock_dir: str | None, wait_timeout: float):
+        """
+        Create a single flight group.
+
+        Args:
+            lock_dir: Directory of the lock files shared by the workers, or None to coalesce within the process only
+            wait_timeout: Seconds to wait on another worker before computing the key regardless
+
+        """
+        self.lock_dir = Path(lock_dir) if lock_dir and fcntl is not None else None
+        self.wait_timeout = wait_timeout
+        self.computed = 0
+        self.coalesced = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def do(self, key: str, compute: Callable[[], bytes], stale: bytes | None = None) -> bytes:
+        """
+        Get the result of a key, computing it unless a computation of the key is already in progress.
+
+        Args:
+            key: Identifies the computation, e.g. the route and its arguments
+            compute: Computes the result
+            stale: An outdated result to return instead of waiting on a computation in progress, if any
+
+        Returns:
+            The result, of this call's computation or of the one it waited on, or the stale result
+
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flights[key] = _Flight()
+
+        if not is_leader:
+            return self._follow(flight, stale)
+
+        try:
+            flight.result = self._lead(key, compute, stale)
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _follow(self, flight: _Flight, stale: bytes | None) -> bytes:
+        """Return the stale result, or wait for the result of the computation in progress."""
+        with self._lock:
+            if stale is not None:
+                self.stale += 1
+                return stale
+            self.coalesced += 1
+
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _lead(self, key: str, compute: Callable[[], bytes], stale: bytes | None) -> bytes:
+        """Compute the result under the key's lock file, unless another worker computed it while this one waited."""
+        if self.lock_dir is None:
+            return self._compute(compute)
+
+        self.lock_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        lock_path = self.lock_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.lock"
+        with open(lock_path, "a+b") as lock_file:
+            if not _try_lock(lock_file):
+                if stale is not None:
+                    with self._lock:
+                        self.stale += 1
+                    return stale
+
+                waiting_since = time.time()
+                deadline = time.monotonic() + self.wait_timeout
+                while not _try_lock(lock_file):
+                    if time.monotonic() >= deadline:
+                        return self._compute(compute)
+                    time.sleep(LOCK_POLL_INTERVAL)
+
+                # The file holds the result of the last computation; it is ours if it finished after we started waiting
+                stat = os.fstat(lock_file.fileno())
+                if stat.st_size and stat.st_mtime >= waiting_since:
+                    lock_file.seek(0)
+                    with self._lock:
+                        self.coalesced += 1
+                    return lock_file.read()
+
+            try:
+                result = self._compute(compute)
+                lock_file.truncate(0)
+                lock_file.write(result)
+                lock_file.flush()
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _compute(self, compute: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            self.computed += 1
+        return compute()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of computations, of callers that shared one or got a stale result, and of keys in flight."""
+        with self._lock:
+            return {
+                "computed": self.computed,
+                "coalesced": self.coalesced,
+                "stale": self.stale,
+                "in_flight": len(self._flights),
+            }
+
+
+def _try_lock(lock_file: BinaryIO) -> bool:
+    """Take the exclusive lock of a file without blocking."""
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the single flight group of the current app, creating it on first use."""
+    single_flight = current_app.extensions.get("single_flight")
+    if single_flight is None:
+        single_flight = current_app.extensions["single_flight"] = SingleFlight(
+            current_app.config["SINGLE_FLIGHT_DIR"], current_app.config["SINGLE_FLIGHT_WAIT_TIMEOUT"]
+        )
+    return single_flight
@@ -0,0 +1,192 @@
+"""Asynchronous grading of quiz submissions, queued in the `submissions` table."""
+
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from quiz_api.models.database import db
+from quiz_api.models.models import Quiz, Submission
+from quiz_api.models.schemas import QuizAttemptSchema
+from quiz_api.utils.grading import get_answer_key_cache, grade_answers, record_grade
+
+SUBMISSION_QUEUED = "queued"
+SUBMISSION_GRADED = "graded"
+SUBMISSION_FAILED = "failed"
+
+
+def enqueue_submission(
+    quiz_id: int, user_id: int, attempt: QuizAttemptSchema, idempotency_key: str | None = None
+) -> Tuple[Submission, bool]:
+    """
+    Queue a validated submission for grading, and commit it so that it survives a restart.
+
+    Args:
+        quiz_id: ID of the quiz
+        user_id: ID of the user who submitted
+        attempt: The validated answers
+        idempotency_key: Key of the client's request; a retry with the same key returns the queued submission
+
+    Returns:
+        The queued submission, and whether it was queued by this call
+
+    """
+    if idempotency_key is not None:
+        existing = _find_submission(quiz_id, user_id, idempotency_key)
+        if existing is not None:
+            return existing, False
+
+    submission = Submission(
+        public_id=uuid.uuid4().hex,
+        quiz_id=quiz_id,
+        user_id=user_id,
+        idempotency_key=idempotency_key,
+        answers=attempt.model_dump_json(),
+        status=SUBMISSION_QUEUED,
+    )
+    db.session.add(submission)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent retry with the same key was queued first
+        db.session.rollback()
+        existing = _find_submission(quiz_id, user_id, idempotency_key)
+        if idempotency_key is None or existing is None:
+            raise
+        return existing, False
+    return submission, True
+
+
+def _find_submission(quiz_id: int, user_id: int, idempotency_key: str) -> Submission | None:
+    return Submission.query.filter_by(quiz_id=quiz_id, user_id=user_id, idempotency_key=idempotency_key).first()
+
+
+def drain_submissions(batch_size: int) -> int:
+    """
+    Grade a batch of queued submissions, oldest first, in a single transaction.
+
+    Each submission is claimed with a conditional UPDATE before its score is recorded, in the same transaction,
+    so a submission that another grader claimed first is skipped, and a failed batch leaves its submissions queued:
+    every submission is applied exactly once.
+
+    Args:
+        batch_size: Maximum number of submissions to grade
+
+    Returns:
+        Number of submissions graded or failed by this call
+
+    """
+    queued = db.session.execute(
+        select(Submission.id, Submission.quiz_id, Submission.user_id, Submission.answers, Submission.submitted_at)
+        .where(Submission.status == SUBMISSION_QUEUED)
+        .order_by(Submission.id)
+        .limit(batch_size)
+    ).all()
+
+    processed = 0
+    for submission in queued:
+        claimed = db.session.execute(
+            update(Submission)
+            .where(Submission.id == submission.id, Submission.status == SUBMISSION_QUEUED)
+            .values(status=SUBMISSION_GRADED, graded_at=datetime.now(timezone.utc))
+        )
+        if not claimed.rowcount:
+            continue
+
+        processed += 1
+        quiz: Quiz | None = db.session.get(Quiz, submission.quiz_id)
+        if quiz is None:
+            _fail_submission(submission.id, "Quiz not found")
+            continue
+
+        try:
+            with db.session.begin_nested():
+                attempt = QuizAttemptSchema.model_validate_json(submission.answers)
+                # Fails the submission if the quiz's questions changed since it was checked and queued
+                grade = grade_answers(get_answer_key_cache().get(quiz), attempt.answers)
+                score_id = record_grade(quiz.id, submission.user_id, grade, timestamp=submission.submitted_at)
+                db.session.execute(update(Submission).where(Submission.id == submission.id).values(score_id=score_id))
+        except Exception as exc:
+            current_app.logger.exception("Grading submission %s failed", submission.id)
+            _fail_submission(submission.id, str(exc))
+
+    db.session.commit()
+    return processed
+
+
+def _fail_submission(submission_id: int, error: str) -> None:
+    db.session.execute(
+        update(Submission).where(Submission.id == submission_id).values(status=SUBMISSION_FAILED, error=error)
+    )
+
+
+class SubmissionGraders:
+    """Background threads of a worker that drain the submission queue, woken up when a submission is queued."""
+
+    def __init__(self, app: Flask, threads: int, batch_size: int, poll_interval: float):
+        """
+        Create a pool of graders, started by `start`.
+
+        Args:
+            app: The app whose database the graders drain
+            threads: Number of grader threads
+            batch_size: Maximum number of submissions graded per transaction
+            poll_interval: Seconds between checks for submissions queued by other workers
+
+        """
+        self.app = app
+        self.threads = threads
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._workers: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the grader threads of this process, unless they are running; threads do not survive a fork."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._workers = [
+                threading.Thread(target=self._run, name=f"submission-grader-{index}", daemon=True)
+                for index in range(self.threads)
+            ]
+            for worker in self._workers:
+                worker.start()
+
+    def wake(self) -> None:
+        """Start the graders if needed, and wake them up to grade a newly queued submission."""
+        self.start()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                with self.app.app_context():
+                    processed = drain_submissions(self.batch_size)
+            except Exception:
+                self.app.logger.exception("Draining the submission queue failed")
+                processed = 0
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+def get_submission_graders() -> SubmissionGraders:
+    """Get the submission graders of the current app, creating them on first use."""
+    graders = current_app.extensions.get("submission_graders")
+    if graders is None:
+        graders = current_app.extensions["submission_graders"] = SubmissionGraders(
+            current_app._get_current_object(),
+            current_app.config["SUBMISSION_GRADER_THREADS"],
+            current_app.config["SUBMISSION_BATCH_SIZE"],
+            current_app.config["SUBMISSION_POLL_INTERVAL"],
+        )
+    return graders
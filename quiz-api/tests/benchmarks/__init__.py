@@ -0,0 +1 @@
+"""Benchmarks of the hot paths, skipped unless run with `-m slow`."""
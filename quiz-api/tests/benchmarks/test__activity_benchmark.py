@@ -0,0 +1,102 @@
+"""
+Benchmark of year-long activity series: read from the hourly and daily rollups, and the scan of `scores` they replace.
+
+Run with `./run.sh benchmark`, or `pytest -m slow -s tests/benchmarks/`.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Quiz, Score, Subject, User
+from quiz_api.utils.activity import activity_series, rebuild_activity_rollups
+from sqlalchemy import func, insert, select
+
+NUMBER_OF_USERS = 2_000
+NUMBER_OF_SCORES = 200_000
+YEAR_START = datetime(2024, 1, 1)
+YEAR_END = datetime(2024, 12, 31, 23)
+LOOKUPS = 20
+
+
+def _add_year_of_scores() -> None:
+    """Create `NUMBER_OF_SCORES` scores spread over a year, and rebuild the activity rollups from them."""
+    subject = Subject(name="Subject", description="Description")
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(name="Chapter", description="Description", subject_id=subject.id)
+    db.session.add(chapter)
+    db.session.flush()
+    quiz = Quiz(chapter_id=chapter.id, name="Exam", date_of_quiz=YEAR_START, time_duration="01:00")
+    db.session.add(quiz)
+    db.session.flush()
+
+    db.session.execute(
+        insert(User),
+        [
+            {"username": f"user{i}", "password": "x", "full_name": f"User {i}", "email": f"user{i}@test.com"}
+            for i in range(NUMBER_OF_USERS)
+        ],
+    )
+    user_ids = list(db.session.execute(select(User.id)).scalars())
+    rng = random.Random(42)
+    seconds = int((YEAR_END - YEAR_START).total_seconds())
+    db.session.execute(
+        insert(Score),
+        [
+            {
+                "quiz_id": quiz.id,
+                "user_id": rng.choice(user_ids),
+                "user_score": 0,
+                "number_of_correct_answers": 0,
+                "timestamp": YEAR_START + timedelta(seconds=rng.randint(0, seconds)),
+            }
+            for _ in range(NUMBER_OF_SCORES)
+        ],
+    )
+    rebuild_activity_rollups()
+    db.session.commit()
+
+
+def _daily_attempts_from_scores() -> dict:
+    """Count the attempts of each day by grouping `scores`, the query the rollups replace."""
+    day = func.date(Score.timestamp)
+    query = (
+        select(day, func.count(), func.count(Score.user_id.distinct()))
+        .where(Score.timestamp.between(YEAR_START, YEAR_END))
+        .group_by(day)
+    )
+    return {row[0]: row[1:] for row in db.session.execute(query)}
+
+
+def _average_ms(lookup) -> float:
+    started_at = time.perf_counter()
+    for _ in range(LOOKUPS):
+        lookup()
+    return (time.perf_counter() - started_at) / LOOKUPS * 1000
+
+
+@pytest.mark.slow
+def test_year_of_activity_latency(file_app: Flask) -> None:
+    """Compare a year of daily activity from the rollups with the scan of scores, and a year of hours."""
+    _add_year_of_scores()
+
+    scan = _average_ms(_daily_attempts_from_scores)
+    daily = _average_ms(lambda: activity_series("day", YEAR_START, YEAR_END))
+    hourly = _average_ms(lambda: activity_series("hour", YEAR_START, YEAR_END))
+
+    print(
+        f"\nA year of {NUMBER_OF_SCORES} attempts: daily scan of scores {scan:.2f} ms, "
+        f"daily rollups {daily:.2f} ms, hourly rollups {hourly:.2f} ms per series"
+    )
+    series = activity_series("day", YEAR_START, YEAR_END)
+    assert len(series) == (YEAR_END - YEAR_START).days + 1
+    assert sum(bucket["attempts"] for bucket in series) == NUMBER_OF_SCORES
+    scanned = _daily_attempts_from_scores()
+    assert [bucket["active_users"] for bucket in series] == [
+        scanned.get(bucket["start"][:10], (0, 0))[1] for bucket in series
+    ]
+    assert daily < scan
@@ -0,0 +1,116 @@
+"""
+Benchmark of exporting a user's attempts as CSV: streamed in batches, and built from `Score` objects with lazy quizzes.
+
+Run with `./run.sh benchmark`, or `pytest -m slow -s tests/benchmarks/`.
+"""
+
+import csv
+import io
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Quiz, Score, Subject, User
+from quiz_api.utils.attempt_export import EXPORT_COLUMNS, iter_attempts_csv
+from sqlalchemy import insert
+
+NUMBER_OF_ATTEMPTS = 50_000
+NUMBER_OF_QUIZZES = 500
+BATCH_SIZE = 1000
+
+
+def _add_attempts() -> int:
+    """Create a user with `NUMBER_OF_ATTEMPTS` attempts spread over `NUMBER_OF_QUIZZES` quizzes."""
+    subject = Subject(name="Subject", description="Description")
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(name="Chapter", description="Description", subject_id=subject.id)
+    user = User(username="student", password="x", full_name="Student", email="student@test.com")
+    db.session.add_all([chapter, user])
+    db.session.flush()
+    quizzes = [
+        Quiz(chapter_id=chapter.id, name=f"Quiz {i}", date_of_quiz=datetime(2024, 1, 1), time_duration="01:00")
+        for i in range(NUMBER_OF_QUIZZES)
+    ]
+    db.session.add_all(quizzes)
+    db.session.flush()
+
+    rng = random.Random(42)
+    db.session.execute(
+        insert(Score),
+        [
+            {
+                "quiz_id": rng.choice(quizzes).id,
+                "user_id": user.id,
+                "user_score": rng.randint(0, 10),
+                "number_of_correct_answers": 0,
+                "timestamp": datetime(2024, 1, 1) + timedelta(minutes=i),
+            }
+            for i in range(NUMBER_OF_ATTEMPTS)
+        ],
+    )
+    db.session.commit()
+    user_id = user.id
+    db.session.expunge_all()
+    return user_id
+
+
+def _export_from_objects(user_id: int) -> str:
+    """Build the whole export from `Score` objects and their lazily loaded quizzes, the approach streaming replaces."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for score in Score.query.filter_by(user_id=user_id).order_by(Score.timestamp, Score.id):
+        quiz = score.quiz
+        writer.writerow(
+            (
+                quiz.id,
+                quiz.chapter_id,
+                quiz.name,
+                quiz.date_of_quiz.isoformat(),
+                score.timestamp.isoformat(),
+                score.user_score,
+                quiz.total_points,
+                score.number_of_correct_answers,
+                quiz.remarks or "",
+            )
+        )
+    return buffer.getvalue()
+
+
+def _measure(export) -> tuple[float, float, float, int]:
+    """Time to the first chunk and in total in ms, peak traced memory in MiB, and bytes of an export."""
+    db.session.expunge_all()
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    chunks = export()
+    first = next(chunks)
+    first_ms = (time.perf_counter() - started_at) * 1000
+    # Chunks are sent and dropped one at a time, as the server writes them to the client
+    size = len(first) + sum(len(chunk) for chunk in chunks)
+    total_ms = (time.perf_counter() - started_at) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return first_ms, total_ms, peak, size
+
+
+@pytest.mark.slow
+def test_attempt_export_memory_and_latency(file_app: Flask) -> None:
+    """Compare streaming the export of 50k attempts with building it from ORM objects."""
+    user_id = _add_attempts()
+
+    objects = _measure(lambda: iter([_export_from_objects(user_id)]))
+    streamed = _measure(lambda: iter_attempts_csv(user_id, BATCH_SIZE))
+
+    print(
+        f"\nExport of {NUMBER_OF_ATTEMPTS} attempts: from objects first byte {objects[0]:.0f} ms, "
+        f"total {objects[1]:.0f} ms, peak {objects[2]:.1f} MiB; streamed first byte {streamed[0]:.1f} ms, "
+        f"total {streamed[1]:.0f} ms, peak {streamed[2]:.1f} MiB"
+    )
+    assert streamed[3] == objects[3]
+    assert streamed[0] < objects[0]
+    assert streamed[2] < objects[2] / 5
@@ -0,0 +1,129 @@
+"""
+Benchmark of concurrent submissions from several workers: a transaction per request against group commit.
+
+Run with `./run.sh benchmark`, or `pytest -m slow -s tests/benchmarks/`.
+"""
+
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+import pytest
+from flask import Flask
+from quiz_api.main import create_app
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, QuestionAttempt, Quiz, Score, Subject, User
+from quiz_api.models.schemas import QuizAnswerSchema
+from quiz_api.utils.grading import Grade, get_answer_key_cache, grade_answers, record_grade
+from quiz_api.utils.group_commit import commit_write, get_group_commit_writer
+
+NUMBER_OF_WORKERS = 4
+THREADS_PER_WORKER = 8
+SUBMISSIONS_PER_THREAD = 25
+NUMBER_OF_QUESTIONS = 10
+
+
+def _add_quiz() -> tuple[int, int, Grade]:
+    """Create a quiz and a user, and grade a submission of the quiz."""
+    user = User(username="student", password="x", full_name="Student", email="student@test.com")
+    subject = Subject(name="Subject", description="Description")
+    db.session.add_all([user, subject])
+    db.session.flush()
+    chapter = Chapter(name="Chapter", description="Description", subject_id=subject.id)
+    db.session.add(chapter)
+    db.session.flush()
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Exam",
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(minutes=5),
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    questions = [
+        Question(
+            quiz_id=quiz.id,
+            question_statement=f"Question {i}",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1,
+        )
+        for i in range(NUMBER_OF_QUESTIONS)
+    ]
+    db.session.add_all(questions)
+    db.session.commit()
+
+    answers = [QuizAnswerSchema(question_id=question.id, selected_option=1) for question in questions]
+    grade = grade_answers(get_answer_key_cache().get(quiz), answers)
+    return quiz.id, user.id, grade
+
+
+def _worker(config: Dict[str, Any], submission: tuple[int, int, Grade], start: Any, stats: Any) -> None:
+    """A worker process whose request threads each commit their submissions with `commit_write`."""
+    app = create_app(test_config=config)
+    quiz_id, user_id, grade = submission
+
+    def request_thread() -> None:
+        for _ in range(SUBMISSIONS_PER_THREAD):
+            with app.app_context():
+                commit_write(lambda: record_grade(quiz_id, user_id, grade))
+
+    threads = [threading.Thread(target=request_thread) for _ in range(THREADS_PER_WORKER)]
+    start.wait()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if config["GROUP_COMMIT"]:
+        with app.app_context():
+            stats.put(get_group_commit_writer().stats()["writes_per_batch"])
+
+
+def _throughput(app: Flask, group_commit: bool, quiz_id: int, user_id: int, grade: Grade) -> tuple[float, float]:
+    """Run the workers, and return the submissions per second and the average submissions per transaction."""
+    context = multiprocessing.get_context("fork")
+    config = {**app.config, "GROUP_COMMIT": group_commit}
+    start = context.Barrier(NUMBER_OF_WORKERS + 1)
+    stats = context.Queue()
+    workers = [
+        context.Process(target=_worker, args=(config, (quiz_id, user_id, grade), start, stats))
+        for _ in range(NUMBER_OF_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+
+    start.wait()
+    started_at = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started_at
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    batch_sizes = [stats.get() for _ in workers] if group_commit else [1.0]
+    submissions = NUMBER_OF_WORKERS * THREADS_PER_WORKER * SUBMISSIONS_PER_THREAD
+    return submissions / elapsed, sum(batch_sizes) / len(batch_sizes)
+
+
+@pytest.mark.slow
+def test_group_commit_throughput(file_app: Flask) -> None:
+    """Compare the submissions per second of workers committing each request alone or through group commit."""
+    quiz_id, user_id, grade = _add_quiz()
+    # Forked workers must not share the parent's connections
+    db.session.remove()
+    db.engine.dispose()
+
+    before, _ = _throughput(file_app, False, quiz_id, user_id, grade)
+    after, writes_per_batch = _throughput(file_app, True, quiz_id, user_id, grade)
+
+    print(
+        f"\n{NUMBER_OF_WORKERS} workers x {THREADS_PER_WORKER} threads submitting {NUMBER_OF_QUESTIONS} answers: "
+        f"transaction per request {before:.1f}/s, group commit {after:.1f}/s ({after / before:.1f}x, "
+        f"{writes_per_batch:.1f} submissions per transaction)"
+    )
+    submissions = NUMBER_OF_WORKERS * THREADS_PER_WORKER * SUBMISSIONS_PER_THREAD
+    assert Score.query.filter_by(quiz_id=quiz_id).count() == 2 * submissions
+    assert QuestionAttempt.query.count() == 2 * submissions * NUMBER_OF_QUESTIONS
@@ -0,0 +1,121 @@
+"""
+Benchmark of leaderboard lookups on a quiz with many attempts: cold rankings, warm rankings, and the SQL baseline.
+
+Run with `./run.sh benchmark`, or `pytest -m slow -s tests/benchmarks/`.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, LeaderboardEntry, Quiz, Score, Subject, User
+from quiz_api.utils.grading import Grade, record_grade
+from quiz_api.utils.leaderboard import LeaderboardCache, rebuild_leaderboards
+from sqlalchemy import and_, func, insert, or_, select
+
+NUMBER_OF_USERS = 20_000
+ATTEMPTS_PER_USER = 5
+TOP_K = 10
+LOOKUPS = 200
+
+
+def _add_attempts() -> tuple[int, list[int]]:
+    """Create a past quiz with `ATTEMPTS_PER_USER` scores for each of `NUMBER_OF_USERS` users."""
+    subject = Subject(name="Subject", description="Description")
+    db.session.add(subject)
+    db.session.flush()
+    chapter = Chapter(name="Chapter", description="Description", subject_id=subject.id)
+    db.session.add(chapter)
+    db.session.flush()
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Exam",
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(days=1),
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+
+    db.session.execute(
+        insert(User),
+        [
+            {"username": f"user{i}", "password": "x", "full_name": f"User {i}", "email": f"user{i}@test.com"}
+            for i in range(NUMBER_OF_USERS)
+        ],
+    )
+    user_ids = list(db.session.execute(select(User.id)).scalars())
+    rng = random.Random(42)
+    started_at = datetime(2024, 1, 1)
+    db.session.execute(
+        insert(Score),
+        [
+            {
+                "quiz_id": quiz.id,
+                "user_id": user_id,
+                "user_score": rng.randint(0, 100),
+                "number_of_correct_answers": 0,
+                "timestamp": started_at + timedelta(seconds=rng.randint(0, 3600)),
+            }
+            for user_id in user_ids
+            for _ in range(ATTEMPTS_PER_USER)
+        ],
+    )
+    rebuild_leaderboards(quiz.id)
+    db.session.commit()
+    return quiz.id, user_ids
+
+
+def _rank_with_sql(quiz_id: int, user_id: int) -> int:
+    """Rank a user by counting the entries ahead of theirs, the lookup the cached rankings replace."""
+    entry = db.session.get(LeaderboardEntry, (quiz_id, user_id))
+    ahead = or_(
+        LeaderboardEntry.user_score > entry.user_score,
+        and_(
+            LeaderboardEntry.user_score == entry.user_score,
+            or_(
+                LeaderboardEntry.timestamp < entry.timestamp,
+                and_(LeaderboardEntry.timestamp == entry.timestamp, LeaderboardEntry.user_id < user_id),
+            ),
+        ),
+    )
+    return db.session.scalar(select(func.count()).where(LeaderboardEntry.quiz_id == quiz_id, ahead)) + 1
+
+
+def _average_ms(lookup, user_ids: list[int]) -> float:
+    started_at = time.perf_counter()
+    for user_id in user_ids:
+        lookup(user_id)
+    return (time.perf_counter() - started_at) / len(user_ids) * 1000
+
+
+@pytest.mark.slow
+def test_leaderboard_lookup_latency(file_app: Flask) -> None:
+    """Compare rank lookups on a quiz with 100k attempts: SQL count, cold ranking, and warm ranking."""
+    quiz_id, user_ids = _add_attempts()
+    quiz = db.session.get(Quiz, quiz_id)
+    lookups = random.Random(7).sample(user_ids, LOOKUPS)
+
+    sql = _average_ms(lambda user_id: _rank_with_sql(quiz_id, user_id), lookups[:20])
+    cold = _average_ms(lambda user_id: LeaderboardCache(1, 60.0).view(quiz, user_id, TOP_K), lookups[:20])
+    cache = LeaderboardCache(1, 60.0)
+    cache.view(quiz, lookups[0], TOP_K)
+    warm = _average_ms(lambda user_id: cache.view(quiz, user_id, TOP_K), lookups)
+
+    # Each new best score is then applied to the warm ranking without rebuilding it
+    improved = lookups[:20]
+    for user_id in improved:
+        record_grade(quiz_id, user_id, Grade(101, 0, []))
+    db.session.commit()
+    view = cache.view(quiz, lookups[0], TOP_K)
+
+    print(
+        f"\n{NUMBER_OF_USERS * ATTEMPTS_PER_USER} attempts by {NUMBER_OF_USERS} users: rank by SQL count {sql:.2f} ms, "
+        f"cold ranking {cold:.2f} ms, warm ranking {warm:.3f} ms per lookup"
+    )
+    assert view.total == NUMBER_OF_USERS
+    assert view.rank <= len(improved)
+    assert cache.view(quiz, lookups[50], TOP_K).rank == _rank_with_sql(quiz_id, lookups[50])
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,115 @@
+"""
+Benchmark of quiz submission throughput: the previous unit-of-work implementation against set-based grading.
+
+Run with `./run.sh benchmark`, or `pytest -m slow -s tests/benchmarks/`.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+import pytest
+from flask import Flask
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, QuestionAttempt, Quiz, Score, Subject, User
+from quiz_api.models.schemas import QuizAnswerSchema
+from quiz_api.utils.grading import get_answer_key_cache, grade_answers, record_grade
+
+NUMBER_OF_QUESTIONS = 100
+NUMBER_OF_SUBMISSIONS = 100
+
+
+def _submit_with_unit_of_work(quiz_id: int, user_id: int, answers: list[QuizAnswerSchema]) -> None:
+    """Grade and store a submission the way `submit_quiz` used to: one ORM object per attempt and a flush."""
+    questions = Question.query.filter_by(quiz_id=quiz_id).all()
+    question_map = {q.id: q for q in questions}
+    user_score = num_correct_answers = 0
+    question_attempts = []
+    for answer in answers:
+        question = question_map[answer.question_id]
+        is_correct = bool(answer.selected_option and question.correct_option == answer.selected_option)
+        if is_correct:
+            user_score += question.points
+            num_correct_answers += 1
+        question_attempts.append(
+            QuestionAttempt(
+                question_id=question.id, selected_option=answer.selected_option or 0, is_correct=is_correct
+            )
+        )
+
+    score = Score(
+        quiz_id=quiz_id, user_id=user_id, user_score=user_score, number_of_correct_answers=num_correct_answers
+    )
+    db.session.add(score)
+    db.session.flush()
+    for question_attempt in question_attempts:
+        question_attempt.score_id = score.id
+        db.session.add(question_attempt)
+    db.session.commit()
+
+
+def _submit_set_based(quiz_id: int, user_id: int, answers: list[QuizAnswerSchema]) -> None:
+    """Grade and store a submission the way `submit_quiz` does now."""
+    answer_key = get_answer_key_cache().get(db.session.get(Quiz, quiz_id))
+    record_grade(quiz_id, user_id, grade_answers(answer_key, answers))
+    db.session.commit()
+
+
+def _throughput(submit: Callable[[int, int, list[QuizAnswerSchema]], None], quiz_id: int, user_id: int) -> float:
+    """Submit the same answers repeatedly, each in its own transaction, and return submissions per second."""
+    question_ids = [question_id for (question_id,) in db.session.query(Question.id).filter_by(quiz_id=quiz_id)]
+    answers = [
+        QuizAnswerSchema(question_id=question_id, selected_option=1 + i % 4)
+        for i, question_id in enumerate(question_ids)
+    ]
+    db.session.remove()
+
+    start = time.perf_counter()
+    for _ in range(NUMBER_OF_SUBMISSIONS):
+        submit(quiz_id, user_id, answers)
+        db.session.remove()  # End of request
+    return NUMBER_OF_SUBMISSIONS / (time.perf_counter() - start)
+
+
+@pytest.mark.slow
+def test_submit_quiz_throughput(file_app: Flask) -> None:
+    """Compare the submissions per second of both implementations on the same quiz."""
+    user = User(username="student", password="x", full_name="Student", email="student@test.com")
+    subject = Subject(name="Subject", description="Description")
+    db.session.add_all([user, subject])
+    db.session.flush()
+    chapter = Chapter(name="Chapter", description="Description", subject_id=subject.id)
+    db.session.add(chapter)
+    db.session.flush()
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Exam",
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(minutes=5),
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    db.session.add_all(
+        Question(
+            quiz_id=quiz.id,
+            question_statement=f"Question {i}",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1 + i % 3,
+        )
+        for i in range(NUMBER_OF_QUESTIONS)
+    )
+    db.session.commit()
+    quiz_id, user_id = quiz.id, user.id
+
+    before = _throughput(_submit_with_unit_of_work, quiz_id, user_id)
+    after = _throughput(_submit_set_based, quiz_id, user_id)
+
+    print(
+        f"\nsubmit_quiz with {NUMBER_OF_QUESTIONS} answers: unit of work {before:.1f}/s, "
+        f"set-based {after:.1f}/s ({after / before:.1f}x)"
+    )
+    assert Score.query.filter_by(quiz_id=quiz_id).count() == 2 * NUMBER_OF_SUBMISSIONS
+    assert QuestionAttempt.query.count() == 2 * NUMBER_OF_SUBMISSIONS * NUMBER_OF_QUESTIONS
@@ -15,5 +15,7 @@ sys.path.insert(0, str(THIS_DIR.parent))
 # Also we do not need to add __init__.py files in the fixtures directory.
 pytest_plugins = [
     "tests.fixtures.api_client",
+    "tests.fixtures.file_sqlite",
     "tests.fixtures.mocked_sqlite",
+    "tests.fixtures.query_counter",
 ]
@@ -0,0 +1,26 @@
+"""Pytest fixture for an app on a SQLite file, for tests that need several connections or threads."""
+
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from flask import Flask
+from quiz_api.config import Config, TestConfig
+from quiz_api.main import create_app
+from quiz_api.models.database import db
+
+
+@pytest.fixture
+def file_app(tmp_path: Path) -> Generator[Flask, None, None]:
+    """Create an app on a SQLite file with the production connection profile, where commits reach the disk."""
+    config = {key: getattr(TestConfig, key) for key in dir(TestConfig) if key.isupper()}
+    config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'quiz.db'}",
+        SQLALCHEMY_ENGINE_OPTIONS=Config.SQLALCHEMY_ENGINE_OPTIONS,
+    )
+    app = create_app(test_config=config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
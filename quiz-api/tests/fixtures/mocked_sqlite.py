@@ -15,7 +15,8 @@ from quiz_api.models.models import (
     Subject,
     User,
 )
-from quiz_api.utils.fts import setup_fts
+from quiz_api.utils.question_totals import refresh_question_totals
+from quiz_api.utils.search_backends import setup_search
 from werkzeug.security import generate_password_hash
 
 
@@ -26,7 +27,7 @@ def setup_database(client: FlaskClient):
     # db.session.remove()
     # db.drop_all()
     db.create_all()
-    setup_fts()
+    setup_search()
 
     yield db.session
 
@@ -87,7 +88,11 @@ def chapter(setup_database, subject: Subject) -> Chapter:
 def quiz(setup_database, chapter: Chapter) -> Quiz:
     """Create a test quiz."""
     quiz: Quiz = Quiz(
-        chapter_id=chapter.id, date_of_quiz=datetime.now(timezone.utc), time_duration="01:00", remarks="Test quiz"
+        chapter_id=chapter.id,
+        name="Test Quiz",
+        date_of_quiz=datetime.now(timezone.utc),
+        time_duration="01:00",
+        remarks="Test quiz",
     )
     setup_database.add(quiz)
     setup_database.commit()
@@ -108,6 +113,7 @@ def question(setup_database, quiz: Quiz) -> Question:
         points=2,
     )
     setup_database.add(question)
+    refresh_question_totals(quiz.id)
     setup_database.commit()
     return question
 
@@ -0,0 +1,41 @@
+"""Pytest fixture for counting the SQL statements issued by a block of code."""
+
+from contextlib import contextmanager
+from typing import Callable, ContextManager, List
+
+import pytest
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Collects the SQL statements executed while it is active."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        """Number of statements executed."""
+        return len(self.statements)
+
+
+@pytest.fixture
+def query_counter(client: FlaskClient) -> Callable[[], ContextManager[QueryCounter]]:
+    """Return a context manager that counts SQL statements executed on the app's engine."""
+
+    @contextmanager
+    def _count_queries():
+        counter = QueryCounter()
+
+        def _before_cursor_execute(conn, cursor, statement, *_):
+            counter.statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield counter
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _before_cursor_execute)
+
+    return _count_queries
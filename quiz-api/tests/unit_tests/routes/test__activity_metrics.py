@@ -0,0 +1,163 @@
+"""Tests for the admin activity metrics, served from the hourly and daily activity rollups."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, Quiz, SiteActivityRollup, User
+from quiz_api.utils.activity import record_activity
+from quiz_api.utils.grading import Grade, record_grade
+from sqlalchemy import select
+
+DAY = datetime(2024, 3, 1)
+
+
+def _add_question(quiz_id: int) -> int:
+    question = Question(
+        quiz_id=quiz_id,
+        question_statement="Question",
+        option1="A",
+        option2="B",
+        option3="C",
+        option4="D",
+        correct_option=1,
+    )
+    db.session.add(question)
+    db.session.commit()
+    return question.id
+
+
+def _add_quiz(chapter_id: int, name: str) -> int:
+    quiz = Quiz(chapter_id=chapter_id, name=name, date_of_quiz=DAY, time_duration="01:00")
+    db.session.add(quiz)
+    db.session.commit()
+    _add_question(quiz.id)
+    return quiz.id
+
+
+def _add_users(count: int) -> list[int]:
+    users = [
+        User(username=f"user{i}", password="x", full_name=f"User {i}", email=f"user{i}@test.com") for i in range(count)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def _submit(quiz_id: int, user_id: int, at: datetime, answers: int = 0) -> None:
+    question_id = db.session.scalar(select(Question.id).where(Question.quiz_id == quiz_id))
+    attempts = [{"question_id": question_id, "selected_option": 1, "is_correct": True}] * answers
+    record_grade(quiz_id, user_id, Grade(0, 0, attempts), at)
+    db.session.commit()
+
+
+def _activity(client: FlaskClient, admin_token: str, **params) -> dict:
+    response = client.get(
+        "/admin/metrics/activity", query_string=params, headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+    return response.json
+
+
+def test_activity_per_hour_and_day(client: FlaskClient, admin_token: str, chapter: Chapter, query_counter) -> None:
+    """Test that submissions and signups are counted in their buckets, each active user once per bucket."""
+    quiz_id = _add_quiz(chapter.id, "Exam")
+    first, second = _add_users(2)
+    record_activity(quiz_id, first, DAY + timedelta(hours=9, minutes=5), signups=1)
+    db.session.commit()
+    _submit(quiz_id, first, DAY + timedelta(hours=10, minutes=15), answers=3)
+    _submit(quiz_id, first, DAY + timedelta(hours=10, minutes=45), answers=2)
+    _submit(quiz_id, second, DAY + timedelta(hours=10, minutes=50))
+    _submit(quiz_id, second, DAY + timedelta(days=2, hours=8))
+
+    with query_counter() as counter:
+        daily = _activity(client, admin_token, **{"from": "2024-03-01T00:00:00", "to": "2024-03-03T23:59:59"})
+
+    assert not any("FROM scores" in statement or "FROM quiz_signups" in statement for statement in counter.statements)
+    assert daily["granularity"] == "day"
+    assert daily["buckets"] == [
+        {"start": "2024-03-01T00:00:00+00:00", "attempts": 3, "answers": 5, "signups": 1, "active_users": 2},
+        {"start": "2024-03-02T00:00:00+00:00", "attempts": 0, "answers": 0, "signups": 0, "active_users": 0},
+        {"start": "2024-03-03T00:00:00+00:00", "attempts": 1, "answers": 0, "signups": 0, "active_users": 1},
+    ]
+
+    hourly = _activity(
+        client, admin_token, granularity="hour", **{"from": "2024-03-01T09:30:00", "to": "2024-03-01T10:00:00"}
+    )
+    assert [(bucket["attempts"], bucket["signups"], bucket["active_users"]) for bucket in hourly["buckets"]] == [
+        (0, 1, 1),
+        (3, 0, 2),
+    ]
+
+
+def test_activity_of_one_quiz(client: FlaskClient, admin_token: str, chapter: Chapter) -> None:
+    """Test that the activity can be limited to a quiz, which has no active users."""
+    quiz_id = _add_quiz(chapter.id, "Exam")
+    other_quiz_id = _add_quiz(chapter.id, "Other")
+    (user_id,) = _add_users(1)
+    _submit(quiz_id, user_id, DAY + timedelta(hours=1))
+    _submit(other_quiz_id, user_id, DAY + timedelta(hours=2))
+    record_activity(other_quiz_id, user_id, DAY + timedelta(hours=3), signups=1)
+    db.session.commit()
+
+    activity = _activity(client, admin_token, quiz_id=other_quiz_id, **{"from": "2024-03-01", "to": "2024-03-01"})
+
+    assert activity["quiz_id"] == other_quiz_id
+    assert activity["buckets"] == [{"start": "2024-03-01T00:00:00+00:00", "attempts": 1, "answers": 0, "signups": 1}]
+
+
+def test_signup_is_counted(client: FlaskClient, user_token: str, admin_token: str, chapter: Chapter) -> None:
+    """Test that signing up through the API counts in the buckets of the signup's time."""
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Upcoming",
+        date_of_quiz=datetime.now(timezone.utc) + timedelta(days=1),
+        time_duration="01:00",
+        question_count=1,
+    )
+    db.session.add(quiz)
+    db.session.commit()
+    quiz_id = quiz.id
+    _add_question(quiz_id)
+
+    response = client.post(f"/quiz-registration/{quiz_id}/signup", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.CREATED
+
+    today = _activity(client, admin_token)["buckets"][-1]
+    assert (today["signups"], today["active_users"]) == (1, 1)
+
+
+def test_activity_errors(client: FlaskClient, admin_token: str, user_token: str) -> None:
+    """Test that inverted and too long ranges, unknown granularities and quizzes, and users are rejected."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for query, status in [
+        ("from=2024-03-02&to=2024-03-01", HTTPStatus.BAD_REQUEST),
+        ("granularity=hour&from=2020-01-01&to=2024-01-01", HTTPStatus.BAD_REQUEST),
+        ("granularity=week", HTTPStatus.BAD_REQUEST),
+        ("quiz_id=999", HTTPStatus.NOT_FOUND),
+    ]:
+        response = client.get(f"/admin/metrics/activity?{query}", headers=headers)
+        assert response.status_code == status, query
+
+    response = client.get("/admin/metrics/activity", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_rebuild_activity_rollups_command(client: FlaskClient, admin_token: str, chapter: Chapter) -> None:
+    """Test that rebuilding the rollups from scores gives the counts the submissions maintained."""
+    quiz_id = _add_quiz(chapter.id, "Exam")
+    first, second = _add_users(2)
+    _submit(quiz_id, first, DAY + timedelta(hours=1), answers=2)
+    _submit(quiz_id, second, DAY + timedelta(hours=1))
+    _submit(quiz_id, first, DAY + timedelta(days=1))
+    params = {"granularity": "hour", "from": "2024-03-01", "to": "2024-03-02T01:00:00"}
+    expected = _activity(client, admin_token, **params)
+
+    db.session.query(SiteActivityRollup).update({"attempts": 0, "active_users": 0})
+    db.session.commit()
+    result = client.application.test_cli_runner().invoke(args=["rebuild-activity-rollups"])
+
+    assert result.exit_code == 0
+    assert "Rebuilt activity rollups of 4 bucket(s)" in result.output
+    assert _activity(client, admin_token, **params) == expected
@@ -0,0 +1,154 @@
+"""Tests for the admin summary, served from the score rollups."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Quiz, QuizScoreRollup, Subject, User
+from quiz_api.utils.grading import Grade, record_grade
+
+
+def _add_quiz(chapter_id: int, name: str, total_points: int = 10) -> int:
+    quiz = Quiz(
+        chapter_id=chapter_id,
+        name=name,
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(days=1),
+        time_duration="01:00",
+        total_points=total_points,
+    )
+    db.session.add(quiz)
+    db.session.commit()
+    return quiz.id
+
+
+def _grade(quiz_id: int, user_id: int, *user_scores: int) -> None:
+    for user_score in user_scores:
+        record_grade(quiz_id, user_id, Grade(user_score, 0, []))
+    db.session.commit()
+
+
+def _summary(client: FlaskClient, admin_token: str, **params) -> dict:
+    response = client.get("/admin/summary", query_string=params, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.OK
+    return response.json
+
+
+def test_summary_of_subjects_chapters_and_quizzes(
+    client: FlaskClient, admin_token: str, regular_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that each level sums the scores of the quizzes under it, and empty ones have no statistics."""
+    other_chapter = Chapter(name="Other Chapter", description="d", subject_id=chapter.subject_id)
+    empty_subject = Subject(name="Empty Subject", description="d")
+    db.session.add_all([other_chapter, empty_subject])
+    db.session.commit()
+    first_quiz = _add_quiz(chapter.id, "First")
+    second_quiz = _add_quiz(other_chapter.id, "Second", total_points=4)
+    _grade(first_quiz, regular_user.id, 2, 4, 6, 8)
+    _grade(second_quiz, regular_user.id, 4)
+    subject_id, chapter_id, other_chapter_id = chapter.subject_id, chapter.id, other_chapter.id
+
+    with query_counter() as counter:
+        summary = _summary(client, admin_token)
+
+    assert not any("FROM scores" in statement for statement in counter.statements)
+    assert summary["pass_mark_percent"] == client.application.config["PASS_MARK_PERCENT"]
+    subjects = {row["name"]: row for row in summary["subjects"]}
+    assert subjects["Test Subject"] == {
+        "id": subject_id,
+        "name": "Test Subject",
+        "attempts": 5,
+        "average_score": 4.8,
+        "score_stddev": 2.04,
+        "max_score": 8,
+        "pass_rate": 60.0,
+    }
+    assert subjects["Empty Subject"]["attempts"] == 0
+    assert subjects["Empty Subject"]["average_score"] is None
+    chapters = {row["id"]: row for row in summary["chapters"]}
+    assert (chapters[chapter_id]["attempts"], chapters[chapter_id]["pass_rate"]) == (4, 50.0)
+    assert chapters[other_chapter_id]["subject_id"] == subject_id
+    quizzes = {row["id"]: row for row in summary["quizzes"]}
+    assert (quizzes[first_quiz]["average_score"], quizzes[first_quiz]["score_stddev"]) == (5.0, 2.24)
+    assert (quizzes[second_quiz]["max_score"], quizzes[second_quiz]["pass_rate"]) == (4, 100.0)
+
+
+def test_summary_of_one_subject(client: FlaskClient, admin_token: str, subject: Subject, chapter: Chapter) -> None:
+    """Test that the summary can be limited to a subject."""
+    db.session.add(Subject(name="Other Subject", description="d"))
+    db.session.commit()
+    _add_quiz(chapter.id, "First")
+
+    summary = _summary(client, admin_token, subject_id=subject.id)
+
+    assert [row["id"] for row in summary["subjects"]] == [subject.id]
+    assert len(summary["chapters"]) == len(summary["quizzes"]) == 1
+
+    response = client.get("/admin/summary?subject_id=999", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_summary_is_admin_only(client: FlaskClient, user_token: str) -> None:
+    """Test that users cannot see the summary."""
+    response = client.get("/admin/summary", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_deleting_a_quiz_updates_its_chapter_and_subject(
+    client: FlaskClient, admin_token: str, regular_user: User, subject: Subject, chapter: Chapter
+) -> None:
+    """Test that the totals of a deleted quiz are taken out of its chapter and subject."""
+    kept_quiz = _add_quiz(chapter.id, "Kept")
+    deleted_quiz = _add_quiz(chapter.id, "Deleted")
+    _grade(kept_quiz, regular_user.id, 3)
+    _grade(deleted_quiz, regular_user.id, 9, 7)
+
+    response = client.delete(f"/quizzes/{deleted_quiz}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+    summary = _summary(client, admin_token)
+    assert (summary["chapters"][0]["attempts"], summary["chapters"][0]["max_score"]) == (1, 3)
+    assert (summary["subjects"][0]["attempts"], summary["subjects"][0]["max_score"]) == (1, 3)
+
+
+def test_deleting_a_user_updates_the_rollups(
+    client: FlaskClient, admin_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that the scores of a deleted user are taken out of the rollups, as a rebuild from the scores would."""
+    other_user = User(username="other", password="x", full_name="Other User", email="other@test.com", role="user")
+    db.session.add(other_user)
+    db.session.commit()
+    first_quiz = _add_quiz(chapter.id, "First")
+    second_quiz = _add_quiz(chapter.id, "Second")
+    user_id, other_user_id = regular_user.id, other_user.id
+    _grade(first_quiz, user_id, 10, 9)
+    _grade(second_quiz, user_id, 8)
+    _grade(first_quiz, other_user_id, 2)
+
+    response = client.delete(f"/admin/users/{user_id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+    summary = _summary(client, admin_token)
+    assert (summary["subjects"][0]["attempts"], summary["subjects"][0]["max_score"]) == (1, 2)
+    quizzes = {row["id"]: row for row in summary["quizzes"]}
+    assert quizzes[second_quiz]["attempts"] == 0
+    result = client.application.test_cli_runner().invoke(args=["rebuild-score-rollups"])
+    assert result.exit_code == 0
+    assert _summary(client, admin_token) == summary
+
+
+def test_rebuild_score_rollups_command(
+    client: FlaskClient, admin_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that rebuilding the rollups from scores gives the totals the submissions maintained."""
+    quiz_id = _add_quiz(chapter.id, "First")
+    _grade(quiz_id, regular_user.id, 1, 5, 10)
+    expected = _summary(client, admin_token)
+
+    db.session.query(QuizScoreRollup).update({"attempts": 0, "score_sum": 0})
+    db.session.commit()
+    result = client.application.test_cli_runner().invoke(args=["rebuild-score-rollups"])
+
+    assert result.exit_code == 0
+    assert "Rebuilt score rollups of 1 quiz(zes)" in result.output
+    assert _summary(client, admin_token) == expected
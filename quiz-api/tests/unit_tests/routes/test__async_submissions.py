@@ -0,0 +1,249 @@
+"""Tests for queued quiz submissions, graded asynchronously."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+import pytest
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, QuestionAttempt, Quiz, QuizSignup, Score, Submission, User
+from quiz_api.utils.submissions import SUBMISSION_QUEUED, drain_submissions
+from werkzeug.security import generate_password_hash
+
+
+@pytest.fixture
+def async_client(client: FlaskClient) -> FlaskClient:
+    """Test client of an app that queues submissions; the tests drain the queue themselves."""
+    client.application.config["ASYNC_SUBMISSIONS"] = True
+    return client
+
+
+def _add_active_quiz(chapter: Chapter, user: User) -> tuple[int, list[int]]:
+    """Create a running quiz with two questions, both answered by option 1, and sign the user up."""
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Exam",
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(minutes=5),
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    questions = [
+        Question(
+            quiz_id=quiz.id,
+            question_statement=f"Question {i}",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1,
+            points=i + 1,
+        )
+        for i in range(2)
+    ]
+    db.session.add_all(questions)
+    db.session.add(QuizSignup(user_id=user.id, quiz_id=quiz.id))
+    db.session.commit()
+    return quiz.id, [question.id for question in questions]
+
+
+def test_submission_is_queued_then_graded(
+    async_client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that a submission is accepted without grading, and graded once the queue is drained."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    answers = {"answers": [{"question_id": question_ids[1], "selected_option": 1}]}
+
+    response = async_client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=headers)
+    assert response.status_code == HTTPStatus.ACCEPTED
+    submission_id = response.json["submission_id"]
+    assert response.json["status"] == SUBMISSION_QUEUED
+    assert response.json["status_url"] == f"/quiz/{quiz_id}/submissions/{submission_id}"
+    assert Score.query.count() == 0
+
+    response = async_client.get(response.json["status_url"], headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["status"] == "queued"
+    assert response.json["graded_at"] is None
+
+    assert drain_submissions(batch_size=10) == 1
+    response = async_client.get(f"/quiz/{quiz_id}/submissions/{submission_id}", headers=headers)
+    assert response.json["status"] == "graded"
+    assert response.json["graded_at"] is not None
+    assert "user_score" not in response.json
+
+    score = Score.query.one()
+    assert (score.user_id, score.user_score, score.number_of_correct_answers) == (regular_user.id, 2, 1)
+    assert QuestionAttempt.query.filter_by(score_id=score.id).count() == 1
+    assert Submission.query.one().score_id == score.id
+
+
+def test_submission_is_applied_exactly_once(
+    async_client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that retries with the same idempotency key are queued once, and that drained submissions stay applied."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    headers = {"Authorization": f"Bearer {user_token}", "Idempotency-Key": "attempt-1"}
+    answers = {"answers": [{"question_id": question_ids[0], "selected_option": 1}]}
+
+    first = async_client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=headers)
+    retry = async_client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=headers)
+    assert retry.status_code == HTTPStatus.ACCEPTED
+    assert retry.json["submission_id"] == first.json["submission_id"]
+    assert Submission.query.count() == 1
+
+    assert drain_submissions(batch_size=10) == 1
+    assert drain_submissions(batch_size=10) == 0
+
+    # A retry after grading returns the graded submission instead of queueing it again
+    retry = async_client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=headers)
+    assert retry.json["status"] == "graded"
+    assert drain_submissions(batch_size=10) == 0
+    assert Score.query.count() == 1
+
+
+def test_drain_grades_in_batches_oldest_first(
+    async_client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that each drain grades at most a batch of submissions, in the order they were queued."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    selected_options = (1, 2, 1)
+    batch_size = 2
+    for selected_option in selected_options:
+        answers = {"answers": [{"question_id": question_ids[0], "selected_option": selected_option}]}
+        async_client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=headers)
+
+    assert drain_submissions(batch_size=batch_size) == batch_size
+    assert Submission.query.filter_by(status=SUBMISSION_QUEUED).count() == 1
+    assert drain_submissions(batch_size=batch_size) == 1
+    assert [score.user_score for score in Score.query.order_by(Score.id)] == [1, 0, 1]
+
+
+def test_submission_status_of_other_user_is_not_found(
+    async_client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that the status of a submission is only shown to the user who submitted it, under its quiz."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    answers = {"answers": [{"question_id": question_ids[0], "selected_option": 1}]}
+    response = async_client.post(
+        f"/quiz/{quiz_id}/submit", json=answers, headers={"Authorization": f"Bearer {user_token}"}
+    )
+    submission_id = response.json["submission_id"]
+
+    db.session.add(
+        User(
+            username="other",
+            password=generate_password_hash("other123"),
+            full_name="Other User",
+            email="other@test.com",
+            role="user",
+        )
+    )
+    db.session.commit()
+    other_token = async_client.post("/auth/login", json={"email": "other@test.com", "password": "other123"}).json[
+        "access_token"
+    ]
+
+    response = async_client.get(
+        f"/quiz/{quiz_id}/submissions/{submission_id}", headers={"Authorization": f"Bearer {other_token}"}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = async_client.get(
+        f"/quiz/{quiz_id + 1}/submissions/{submission_id}", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_invalid_idempotency_key_is_rejected(
+    async_client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that an overlong idempotency key is rejected before anything is queued."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    response = async_client.post(
+        f"/quiz/{quiz_id}/submit",
+        json={"answers": [{"question_id": question_ids[0], "selected_option": 1}]},
+        headers={"Authorization": f"Bearer {user_token}", "Idempotency-Key": "k" * 65},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Submission.query.count() == 0
+
+
+def test_grade_submissions_command(
+    async_client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that the CLI command drains the whole queue."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    submissions = 3
+    for _ in range(submissions):
+        async_client.post(
+            f"/quiz/{quiz_id}/submit",
+            json={"answers": [{"question_id": question_ids[0], "selected_option": 1}]},
+            headers={"Authorization": f"Bearer {user_token}"},
+        )
+
+    result = async_client.application.test_cli_runner().invoke(args=["grade-submissions", "--batch-size", "2"])
+    assert result.exit_code == 0
+    assert f"Graded {submissions} submission(s)" in result.output
+    assert Score.query.count() == submissions
+
+
+def test_failed_submission_does_not_block_batch(
+    async_client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that a submission that cannot be graded is marked failed, and the rest of its batch is graded."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    db.session.add(
+        Submission(public_id="broken", quiz_id=quiz_id, user_id=regular_user.id, answers="not json", status="queued")
+    )
+    db.session.commit()
+    async_client.post(
+        f"/quiz/{quiz_id}/submit",
+        json={"answers": [{"question_id": question_ids[0], "selected_option": 1}]},
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+
+    assert drain_submissions(batch_size=10) == Submission.query.count()
+    response = async_client.get(
+        f"/quiz/{quiz_id}/submissions/broken", headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.json["status"] == "failed"
+    assert response.json["error"]
+    assert Score.query.count() == 1
+    assert Submission.query.filter_by(public_id="broken").one().score_id is None
+
+
+def test_submission_with_unknown_questions_is_not_queued(
+    async_client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that answers to questions outside the quiz are rejected before anything is queued."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    response = async_client.post(
+        f"/quiz/{quiz_id}/submit",
+        json={"answers": [{"question_id": question_ids[0], "selected_option": 1}, {"question_id": 99999}]},
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Submission.query.count() == 0
+
+
+def test_submission_answering_a_deleted_question_fails(
+    async_client: FlaskClient, user_token: str, admin_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that a queued submission is failed, not partly graded, if a question it answers is deleted meanwhile."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    answers = [{"question_id": question_id, "selected_option": 1} for question_id in question_ids]
+    response = async_client.post(f"/quiz/{quiz_id}/submit", json={"answers": answers}, headers=headers)
+    submission_id = response.json["submission_id"]
+
+    response = async_client.delete(f"/questions/{question_ids[1]}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.OK
+    drain_submissions(batch_size=10)
+
+    response = async_client.get(f"/quiz/{quiz_id}/submissions/{submission_id}", headers=headers)
+    assert response.json["status"] == "failed"
+    assert response.json["error"] == f"Questions not part of this quiz: {question_ids[1]}"
+    assert Score.query.count() == 0
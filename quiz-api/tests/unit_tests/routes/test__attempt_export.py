@@ -0,0 +1,115 @@
+"""Tests for the streaming CSV export of a user's quiz attempts."""
+
+import csv
+import io
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from flask_jwt_extended import decode_token
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Quiz, Score, User
+
+STARTED_AT = datetime(2024, 1, 1, 10, 0)
+
+
+def _add_quiz(chapter_id: int, name: str, remarks: str | None = None) -> int:
+    quiz = Quiz(
+        chapter_id=chapter_id,
+        name=name,
+        date_of_quiz=STARTED_AT,
+        time_duration="01:00",
+        remarks=remarks,
+        total_points=10,
+    )
+    db.session.add(quiz)
+    db.session.commit()
+    return quiz.id
+
+
+def _add_scores(quiz_id: int, user_id: int, *user_scores: int) -> None:
+    db.session.add_all(
+        Score(
+            quiz_id=quiz_id,
+            user_id=user_id,
+            user_score=user_score,
+            number_of_correct_answers=user_score // 2,
+            timestamp=STARTED_AT + timedelta(minutes=minutes),
+        )
+        for minutes, user_score in enumerate(user_scores)
+    )
+    db.session.commit()
+
+
+def test_export_streams_own_attempts(
+    client: FlaskClient, user_token: str, admin_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that the export holds the user's attempts, oldest first, streamed in batches."""
+    client.application.config["ATTEMPT_EXPORT_BATCH_SIZE"] = 2
+    user_id, admin_id, chapter_id = int(decode_token(user_token)["sub"]), admin_user.id, chapter.id
+    quiz_id = _add_quiz(chapter_id, "Exam", remarks='Mid-term, "closed" book')
+    other_quiz_id = _add_quiz(chapter_id, "Other")
+    _add_scores(quiz_id, user_id, 4, 8)
+    _add_scores(other_quiz_id, user_id, 6)
+    _add_scores(quiz_id, admin_id, 10)
+
+    with query_counter() as counter:
+        response = client.get(
+            "/quiz/attempts/export", headers={"Authorization": f"Bearer {user_token}"}, buffered=False
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.is_streamed
+        chunks = [chunk.decode() for chunk in response.iter_encoded()]
+
+    assert response.mimetype == "text/csv"
+    assert response.headers["Content-Disposition"] == "attachment; filename=quiz_attempts.csv"
+    # The header, then two batches of rows
+    assert len(chunks) == 1 + 2
+    # One query for all the rows, and no quiz loaded on its own
+    assert len([statement for statement in counter.statements if "FROM scores" in statement]) == 1
+    assert not [statement for statement in counter.statements if "FROM quizzes" in statement]
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == [
+        "quiz_id",
+        "chapter_id",
+        "quiz_name",
+        "date_of_quiz",
+        "attempted_at",
+        "score",
+        "total_points",
+        "number_of_correct_answers",
+        "remarks",
+    ]
+    assert rows[1:] == [
+        [str(quiz_id), str(chapter_id), "Exam", "2024-01-01T10:00:00", "2024-01-01T10:00:00", "4", "10", "2",
+         'Mid-term, "closed" book'],
+        [str(other_quiz_id), str(chapter_id), "Other", "2024-01-01T10:00:00", "2024-01-01T10:00:00", "6", "10", "3", ""],
+        [str(quiz_id), str(chapter_id), "Exam", "2024-01-01T10:00:00", "2024-01-01T10:01:00", "8", "10", "4",
+         'Mid-term, "closed" book'],
+    ]  # fmt: skip
+
+
+def test_export_time_range(client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter) -> None:
+    """Test that the export can be limited to the attempts of a time range."""
+    quiz_id = _add_quiz(chapter.id, "Exam")
+    _add_scores(quiz_id, regular_user.id, 1, 2, 3)
+
+    response = client.get(
+        "/quiz/attempts/export?from_date=2024-01-01T10:01:00&to_date=2024-01-01T10:02:00",
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["score"] for row in rows] == ["2"]
+
+
+def test_export_without_attempts(client: FlaskClient, user_token: str) -> None:
+    """Test that a user without attempts gets the header alone, and that the export needs a login."""
+    response = client.get("/quiz/attempts/export", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_data(as_text=True).splitlines() == [
+        "quiz_id,chapter_id,quiz_name,date_of_quiz,attempted_at,score,total_points,number_of_correct_answers,remarks"
+    ]
+
+    response = client.get("/quiz/attempts/export")
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,160 @@
+"""Tests for the opt-in cursor pagination of list and search endpoints."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, Quiz, Subject, User
+
+
+def _walk(client: FlaskClient, url: str, headers: dict | None = None, items_key: str = "items") -> list[list[int]]:
+    """Follow `next_cursor` from the first page and return the IDs of every page."""
+    pages = []
+    separator = "&" if "?" in url else "?"
+    cursor = ""
+    while cursor is not None:
+        response = client.get(f"{url}{separator}cursor={cursor}", headers=headers)
+        assert response.status_code == HTTPStatus.OK
+        pages.append([item["id"] for item in response.json[items_key]])
+        cursor = response.json["next_cursor"]
+    return pages
+
+
+def test_get_all_subjects_without_cursor_returns_full_list(client: FlaskClient) -> None:
+    """Test that old clients still get a plain list of every subject."""
+    db.session.add_all(Subject(name=f"Subject {i}", description=f"Description {i}") for i in range(3))
+    db.session.commit()
+
+    response = client.get("/subjects")
+
+    assert response.status_code == HTTPStatus.OK
+    assert isinstance(response.json, list)
+    assert len(response.json) == Subject.query.count()
+
+
+def test_get_all_subjects_with_cursor(client: FlaskClient) -> None:
+    """Test that following next_cursor returns every subject exactly once, in ID order."""
+    db.session.add_all(Subject(name=f"Subject {i}", description=f"Description {i}") for i in range(5))
+    db.session.commit()
+    subject_ids = [subject.id for subject in Subject.query.order_by(Subject.id)]
+
+    limit = 2
+    response = client.get(f"/subjects?limit={limit}")
+    assert response.json["limit"] == limit
+    assert [item["id"] for item in response.json["items"]] == subject_ids[:limit]
+
+    assert _walk(client, f"/subjects?limit={limit}") == [subject_ids[:2], subject_ids[2:4], subject_ids[4:]]
+
+
+def test_get_subject_chapters_with_cursor(client: FlaskClient, subject: Subject) -> None:
+    """Test cursor pagination of a subject's chapters."""
+    db.session.add_all(
+        Chapter(name=f"Chapter {i}", description=f"Description {i}", subject_id=subject.id) for i in range(3)
+    )
+    db.session.commit()
+    chapter_ids = [chapter.id for chapter in Chapter.query.order_by(Chapter.id)]
+
+    assert _walk(client, f"/subjects/{subject.id}/chapters?limit=2") == [chapter_ids[:2], chapter_ids[2:]]
+
+
+def test_get_chapter_quizzes_pages_by_date(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test that a chapter's quizzes are paged in (date_of_quiz, id) order."""
+    now = datetime.now(timezone.utc)
+    offsets = [3, 1, 2, 1]
+    quizzes = [
+        Quiz(chapter_id=chapter.id, name=f"Quiz {i}", date_of_quiz=now + timedelta(days=days), time_duration="01:00")
+        for i, days in enumerate(offsets)
+    ]
+    db.session.add_all(quizzes)
+    db.session.commit()
+    quiz_ids = [quiz.id for quiz in quizzes]
+
+    pages = _walk(client, f"/chapters/{chapter.id}/quizzes?limit=3", {"Authorization": f"Bearer {user_token}"})
+
+    assert pages == [[quiz_ids[1], quiz_ids[3], quiz_ids[2]], [quiz_ids[0]]]
+
+
+def test_get_all_users_with_cursor(client: FlaskClient, admin_token: str, regular_user) -> None:
+    """Test cursor pagination of the admin user list."""
+    pages = _walk(client, "/admin/users?limit=1", {"Authorization": f"Bearer {admin_token}"})
+
+    assert len(pages) == User.query.count()
+    assert pages[0][0] < pages[1][0]
+
+
+def test_get_quiz_questions_with_cursor(client: FlaskClient, admin_token: str, quiz: Quiz) -> None:
+    """Test cursor pagination of a quiz's questions keeps the quiz metadata on every page."""
+    db.session.add_all(
+        Question(
+            quiz_id=quiz.id,
+            question_statement=f"Question {i}",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1,
+        )
+        for i in range(3)
+    )
+    db.session.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    limit = 2
+
+    response = client.get(f"/quizzes/{quiz.id}/questions?limit={limit}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["quiz_name"] == "Test Quiz"
+    assert len(response.json["questions"]) == limit
+
+    pages = _walk(client, f"/quizzes/{quiz.id}/questions?limit={limit}", headers, items_key="questions")
+    assert [len(page) for page in pages] == [2, 1]
+
+
+def test_search_subjects_with_cursor(client: FlaskClient) -> None:
+    """Test that cursor pages of FTS results cover every match exactly once."""
+    matches = 7
+    db.session.add_all(
+        Subject(name=f"Mathematics {'advanced ' * (i % 3)}{i}", description=f"Study number {i}")
+        for i in range(matches)
+    )
+    db.session.add(Subject(name="Physics", description="Study of matter"))
+    db.session.commit()
+
+    response = client.get("/subjects/search?q=mathematics&limit=3")
+    assert response.json["next_cursor"] is None  # offset mode
+
+    pages = _walk(client, "/subjects/search?q=mathematics&limit=3")
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert len({subject_id for page in pages for subject_id in page}) == matches
+
+
+def test_search_chapters_filters_by_subject_before_paginating(client: FlaskClient, subject: Subject) -> None:
+    """Test that chapters of other subjects do not cut pages of a subject's search results short."""
+    other_subject = Subject(name="Other Subject", description="Other Description")
+    db.session.add(other_subject)
+    db.session.commit()
+    db.session.add_all(
+        Chapter(name=f"Algebra {i}", description="Algebra chapter", subject_id=other_subject.id) for i in range(3)
+    )
+    db.session.add_all(
+        Chapter(name=f"Algebra {i}", description="Algebra chapter", subject_id=subject.id) for i in range(3)
+    )
+    db.session.commit()
+
+    limit = 3
+    response = client.get(f"/subjects/{subject.id}/chapters/search?q=algebra&limit={limit}")
+
+    assert len(response.json["items"]) == limit
+    assert all(item["subject_id"] == subject.id for item in response.json["items"])
+
+
+def test_invalid_cursor(client: FlaskClient, subject: Subject) -> None:
+    """Test that malformed cursors and cursors from another ordering are rejected."""
+    response = client.get("/subjects?cursor=not-a-cursor")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json["message"] == "Invalid cursor"
+
+    # A (rank, id) cursor from a full-text search does not fit the ID ordering of the plain listing
+    response = client.get("/subjects/search?cursor=WzAuNSwxXQ")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,32 @@
+"""Tests for the admin database diagnostics endpoint."""
+
+import os
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+
+TEMP_STORE_MEMORY = 2  # `PRAGMA temp_store` reports MEMORY as 2
+
+
+def test_database_diagnostics(client: FlaskClient, admin_token: str) -> None:
+    """Test that the report has the effective PRAGMAs and pool stats of this worker's engine."""
+    response = client.get("/admin/diagnostics/database", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["worker"]["pid"] == os.getpid()
+    engine = response.json["engines"]["default"]
+    assert engine["dialect"] == "sqlite"
+    assert engine["pool"]["class"] == "StaticPool"
+    pragmas = client.application.config["SQLITE_PRAGMAS"]
+    assert engine["pragmas"]["busy_timeout"] == pragmas["busy_timeout"]
+    assert engine["pragmas"]["foreign_keys"] == 1
+    assert engine["pragmas"]["cache_size"] == pragmas["cache_size"]
+    assert engine["pragmas"]["temp_store"] == TEMP_STORE_MEMORY
+    assert engine["pragmas"]["query_only"] == 0
+
+
+def test_database_diagnostics_requires_admin(client: FlaskClient, user_token: str) -> None:
+    """Test that regular users cannot read the diagnostics."""
+    response = client.get("/admin/diagnostics/database", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
@@ -0,0 +1,197 @@
+"""Tests for quiz leaderboards."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, LeaderboardEntry, Quiz, Score, User
+from quiz_api.utils.grading import Grade, record_grade
+
+STARTED_AT = datetime(2024, 1, 1, 10, 0)
+
+
+def _add_past_quiz(chapter: Chapter) -> int:
+    """Create a quiz that has already ended."""
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Past Exam",
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(days=1),
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.commit()
+    return quiz.id
+
+
+def _add_users(count: int) -> list[int]:
+    """Create users named `user0`, `user1`, ..."""
+    users = [
+        User(username=f"user{i}", password="x", full_name=f"User {i}", email=f"user{i}@test.com") for i in range(count)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def _grade(quiz_id: int, user_id: int, user_score: int, minutes: int) -> int:
+    """Record a graded submission, `minutes` after the quiz started."""
+    score_id = record_grade(quiz_id, user_id, Grade(user_score, 0, []), STARTED_AT + timedelta(minutes=minutes))
+    db.session.commit()
+    return score_id
+
+
+def _leaderboard(client: FlaskClient, token: str, quiz_id: int, **params) -> dict:
+    response = client.get(
+        f"/quizzes/{quiz_id}/leaderboard", query_string=params, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+    return response.json
+
+
+def test_leaderboard_ranks_best_scores(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that each user is ranked by their best score, ties going to whoever reached it first."""
+    quiz_id = _add_past_quiz(chapter)
+    users = _add_users(3)
+    first, second, third = users
+    _grade(quiz_id, first, 5, minutes=3)
+    _grade(quiz_id, second, 8, minutes=2)
+    _grade(quiz_id, third, 5, minutes=1)
+    _grade(quiz_id, regular_user.id, 4, minutes=1)
+    # A worse retry does not replace the best score
+    _grade(quiz_id, second, 2, minutes=10)
+
+    leaderboard = _leaderboard(client, user_token, quiz_id, limit=3)
+
+    assert leaderboard["total_entries"] == len(users) + 1
+    assert [(entry["rank"], entry["username"], entry["user_score"]) for entry in leaderboard["entries"]] == [
+        (1, "user1", 8),
+        (2, "user2", 5),
+        (3, "user0", 5),
+    ]
+    assert leaderboard["entries"][0]["timestamp"] == (STARTED_AT + timedelta(minutes=2)).isoformat()
+    assert leaderboard["me"] == {"rank": 4, "user_score": 4, "percentile": 25.0}
+
+
+def test_leaderboard_percentile(client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter) -> None:
+    """Test that a sole entry is at the 100th percentile, and that tied users share a percentile whatever their rank."""
+    quiz_id = _add_past_quiz(chapter)
+    _grade(quiz_id, regular_user.id, 5, minutes=5)
+    assert _leaderboard(client, user_token, quiz_id)["me"] == {"rank": 1, "user_score": 5, "percentile": 100.0}
+
+    first, second, third = _add_users(3)
+    _grade(quiz_id, first, 8, minutes=1)
+    _grade(quiz_id, second, 5, minutes=1)
+    _grade(quiz_id, third, 2, minutes=1)
+
+    # Ranked after the tied user who reached 5 first, yet at or above three of the four entries like them
+    assert _leaderboard(client, user_token, quiz_id)["me"] == {"rank": 3, "user_score": 5, "percentile": 75.0}
+
+
+def test_leaderboard_without_own_score(client: FlaskClient, admin_token: str, chapter: Chapter) -> None:
+    """Test that a caller without a score gets the leaderboard and no rank."""
+    quiz_id = _add_past_quiz(chapter)
+    (user_id,) = _add_users(1)
+    _grade(quiz_id, user_id, 3, minutes=1)
+
+    leaderboard = _leaderboard(client, admin_token, quiz_id)
+
+    assert leaderboard["total_entries"] == 1
+    assert leaderboard["me"] is None
+
+
+def test_cached_ranking_reads_only_new_scores(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that a cached ranking is brought up to date with the entries changed since it was built."""
+    quiz_id = _add_past_quiz(chapter)
+    user_ids = _add_users(4)
+    for minutes, user_id in enumerate(user_ids):
+        _grade(quiz_id, user_id, 5, minutes=minutes)
+    _grade(quiz_id, regular_user.id, 1, minutes=0)
+    assert _leaderboard(client, user_token, quiz_id)["me"]["rank"] == len(user_ids) + 1
+
+    _grade(quiz_id, regular_user.id, 9, minutes=30)
+    with query_counter() as counter:
+        leaderboard = _leaderboard(client, user_token, quiz_id)
+
+    assert leaderboard["me"] == {"rank": 1, "user_score": 9, "percentile": 100.0}
+    assert leaderboard["entries"][0]["username"] == "testuser"
+    leaderboard_reads = [statement for statement in counter.statements if "FROM leaderboard_entries" in statement]
+    assert len(leaderboard_reads) == 1
+    assert "leaderboard_entries.version >" in leaderboard_reads[0]
+
+    # Nothing was written since, so the ranking is served without reading any entry
+    with query_counter() as counter:
+        assert _leaderboard(client, user_token, quiz_id)["me"]["rank"] == 1
+    assert not any("FROM leaderboard_entries" in statement for statement in counter.statements)
+
+    stats = client.application.extensions["leaderboard_cache"].stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_cached_ranking_drops_deleted_users(client: FlaskClient, admin_token: str, chapter: Chapter) -> None:
+    """Test that a cached ranking is rebuilt once a ranked user is deleted, which removes their entry."""
+    quiz_id = _add_past_quiz(chapter)
+    first, second = _add_users(2)
+    _grade(quiz_id, first, 9, minutes=1)
+    _grade(quiz_id, second, 5, minutes=1)
+    assert _leaderboard(client, admin_token, quiz_id)["total_entries"] == len((first, second))
+
+    response = client.delete(f"/admin/users/{first}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+    leaderboard = _leaderboard(client, admin_token, quiz_id)
+    assert leaderboard["total_entries"] == 1
+    assert [(entry["rank"], entry["username"]) for entry in leaderboard["entries"]] == [(1, "user1")]
+    stats = client.application.extensions["leaderboard_cache"].stats()
+    assert (stats["hits"], stats["misses"]) == (0, len((first, second)))
+
+
+def test_leaderboard_of_active_quiz_is_hidden_from_users(
+    client: FlaskClient, user_token: str, admin_token: str, quiz: Quiz
+) -> None:
+    """Test that users cannot see the leaderboard of a running quiz, while admins can."""
+    response = client.get(f"/quizzes/{quiz.id}/leaderboard", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json["message"] == "Quiz is still active"
+
+    response = client.get(f"/quizzes/{quiz.id}/leaderboard", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_leaderboard_errors(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test that unknown quizzes and out of range limits are rejected."""
+    quiz_id = _add_past_quiz(chapter)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = client.get(f"/quizzes/{quiz_id + 1}/leaderboard", headers=headers)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    response = client.get(f"/quizzes/{quiz_id}/leaderboard?limit=0", headers=headers)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_rebuild_leaderboards_command(client: FlaskClient, admin_token: str, chapter: Chapter) -> None:
+    """Test that leaderboards are rebuilt from the recorded scores."""
+    quiz_id = _add_past_quiz(chapter)
+    first, second = _add_users(2)
+    _grade(quiz_id, first, 2, minutes=1)
+    _grade(quiz_id, first, 6, minutes=2)
+    # Scores recorded without `record_grade` are only picked up by a rebuild
+    db.session.add(
+        Score(quiz_id=quiz_id, user_id=second, user_score=7, number_of_correct_answers=0, timestamp=STARTED_AT)
+    )
+    db.session.query(LeaderboardEntry).delete()
+    db.session.commit()
+
+    result = client.application.test_cli_runner().invoke(args=["rebuild-leaderboards", "--quiz-id", str(quiz_id)])
+    assert result.exit_code == 0
+    assert "Rebuilt leaderboards with 2 entry(ies)" in result.output
+
+    leaderboard = _leaderboard(client, admin_token, quiz_id)
+    assert [(entry["username"], entry["user_score"]) for entry in leaderboard["entries"]] == [
+        ("user1", 7),
+        ("user0", 6),
+    ]
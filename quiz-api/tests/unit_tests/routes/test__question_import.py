@@ -0,0 +1,149 @@
+"""Tests for the streaming question import endpoint."""
+
+import io
+import json
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Question, Quiz
+
+CSV_HEADER = "question_statement,option1,option2,option3,option4,correct_option,points\n"
+
+
+def _import(client: FlaskClient, quiz_id: int, token: str, body: str, content_type: str):
+    return client.post(
+        f"/quizzes/{quiz_id}/questions/import",
+        data=body.encode(),
+        content_type=content_type,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def test_import_csv(client: FlaskClient, admin_token: str, quiz: Quiz) -> None:
+    """Test that CSV rows are imported in batches and the quiz totals are refreshed."""
+    client.application.config["QUESTION_IMPORT_BATCH_SIZE"] = 2
+    quiz_id = quiz.id
+    rows = "".join(f"Question {i},A,B,C,D,{i % 4 + 1},{i}\n" for i in range(1, 6))
+
+    response = _import(client, quiz_id, admin_token, CSV_HEADER + rows, "text/csv")
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json == {"message": "Questions imported", "imported": 5, "duplicates": [], "errors": []}
+    quiz = db.session.get(Quiz, quiz_id)
+    assert (quiz.question_count, quiz.total_points) == (5, 15)
+    question = Question.query.filter_by(quiz_id=quiz_id, question_statement="Question 3").one()
+    assert (question.correct_option, question.points) == (4, 3)
+
+
+def test_import_ndjson_file_upload(client: FlaskClient, admin_token: str, quiz: Quiz) -> None:
+    """Test a multipart NDJSON upload, with points falling back to their default."""
+    quiz_id = quiz.id
+    lines = "\n".join(
+        json.dumps(
+            {
+                "question_statement": f"Question {i}",
+                "option1": "A",
+                "option2": "B",
+                "option3": "C",
+                "option4": "D",
+                "correct_option": 1,
+            }
+        )
+        for i in range(3)
+    )
+
+    response = client.post(
+        f"/quizzes/{quiz_id}/questions/import",
+        data={"file": (io.BytesIO(lines.encode()), "questions.ndjson")},
+        content_type="multipart/form-data",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    quiz = db.session.get(Quiz, quiz_id)
+    assert (response.json["imported"], quiz.total_points) == (3, 3)
+
+
+def test_import_reports_errors_per_row(client: FlaskClient, admin_token: str, quiz: Quiz) -> None:
+    """Test that invalid rows are reported by line while the valid rows are imported."""
+    body = "\n".join(
+        [
+            '{"question_statement": "Valid", "option1": "A", "option2": "B", "option3": "C", "option4": "D", '
+            '"correct_option": 2}',
+            '{"question_statement": "Bad option", "option1": "A", "option2": "B", "option3": "C", "option4": "D", '
+            '"correct_option": 5}',
+            "not json",
+            "",
+            "[1, 2]",
+        ]
+    )
+
+    response = _import(client, quiz.id, admin_token, body, "application/x-ndjson")
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json["imported"] == 1
+    errors = {error["line"]: error["details"] for error in response.json["errors"]}
+    assert set(errors) == {2, 3, 5}
+    assert errors[2][0]["field"] == "correct_option"
+    assert errors[3] == [{"msg": "Invalid JSON"}]
+
+
+def test_import_skips_duplicates(client: FlaskClient, admin_token: str, question: Question) -> None:
+    """Test that statements already in the quiz, or repeated in the upload, are skipped whatever their spacing."""
+    quiz_id = question.quiz_id
+    rows = "test  QUESTION statement,A,B,C,D,1,1\nNew question,A,B,C,D,1,1\nNew question ,A,B,C,D,2,1\n"
+
+    response = _import(client, quiz_id, admin_token, CSV_HEADER + rows, "text/csv")
+
+    assert response.json["imported"] == 1
+    assert response.json["duplicates"] == [2, 4]
+    assert [question.question_statement for question in Question.query.filter_by(quiz_id=quiz_id).order_by(Question.id)] == [
+        "Test question statement",
+        "New question",
+    ]
+
+
+def test_import_requires_supported_format(client: FlaskClient, admin_token: str, quiz: Quiz) -> None:
+    """Test that the format must be CSV or NDJSON, and can be given explicitly."""
+    response = _import(client, quiz.id, admin_token, CSV_HEADER, "application/octet-stream")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    response = client.post(
+        f"/quizzes/{quiz.id}/questions/import?format=csv",
+        data=CSV_HEADER.encode(),
+        content_type="application/octet-stream",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["imported"] == 0
+
+
+def test_import_rejects_non_utf8(client: FlaskClient, admin_token: str, quiz: Quiz) -> None:
+    """Test that a non UTF-8 upload is rejected without importing any row."""
+    quiz_id = quiz.id
+    body = (CSV_HEADER + "Première,A,B,C,D,1,1\n").encode("latin-1")
+
+    response = client.post(
+        f"/quizzes/{quiz_id}/questions/import",
+        data=body,
+        content_type="text/csv",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Question.query.filter_by(quiz_id=quiz_id).count() == 0
+
+
+def test_import_requires_admin(client: FlaskClient, user_token: str, quiz: Quiz) -> None:
+    """Test that regular users cannot import questions."""
+    response = _import(client, quiz.id, user_token, CSV_HEADER, "text/csv")
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_import_into_missing_quiz(client: FlaskClient, admin_token: str) -> None:
+    """Test importing into a quiz that does not exist."""
+    response = _import(client, 999, admin_token, CSV_HEADER, "text/csv")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
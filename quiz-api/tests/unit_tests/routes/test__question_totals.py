@@ -0,0 +1,49 @@
+"""Tests for the question totals stored on quizzes."""
+
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Question, Quiz
+
+
+def _question(quiz_id: int, points: int) -> dict:
+    return {
+        "quiz_id": quiz_id,
+        "question_statement": f"Worth {points}",
+        "option1": "A",
+        "option2": "B",
+        "option3": "C",
+        "option4": "D",
+        "correct_option": 1,
+        "points": points,
+    }
+
+
+def _totals(quiz_id: int) -> tuple[int, int]:
+    quiz = db.session.get(Quiz, quiz_id)
+    db.session.refresh(quiz)
+    return quiz.question_count, quiz.total_points
+
+
+def test_question_writes_maintain_quiz_totals(client: FlaskClient, admin_token: str, quiz: Quiz) -> None:
+    """Test that creating, updating and deleting questions keeps the quiz totals correct."""
+    quiz_id = quiz.id
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.post(
+        f"/quizzes/{quiz_id}/questions",
+        headers=headers,
+        json={"questions": [_question(quiz_id, 1), _question(quiz_id, 2), _question(quiz_id, 3)]},
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert _totals(quiz_id) == (3, 6)
+
+    question_id = db.session.query(Question.id).filter_by(quiz_id=quiz_id, points=3).scalar()
+    response = client.patch(f"/questions/{question_id}", headers=headers, json={"points": 5})
+    assert response.status_code == HTTPStatus.OK
+    assert _totals(quiz_id) == (3, 8)
+
+    response = client.delete(f"/questions/{question_id}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert _totals(quiz_id) == (2, 3)
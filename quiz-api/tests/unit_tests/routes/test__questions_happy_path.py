@@ -3,10 +3,15 @@
 from http import HTTPStatus
 
 from flask.testing import FlaskClient
+from quiz_api.models.database import db
 from quiz_api.models.models import (
     Question,
+    QuestionAttempt,
     Quiz,
+    Score,
+    User,
 )
+from quiz_api.utils.grading import Grade, record_grade
 
 
 def test_create_question_as_admin(client: FlaskClient, admin_token: str, quiz: Quiz) -> None:
@@ -69,3 +74,21 @@ def test_delete_question_as_admin(client: FlaskClient, admin_token: str, questio
 
     assert response.status_code == HTTPStatus.OK
     assert response.json["message"] == "Question deleted successfully"
+
+
+def test_delete_answered_question(
+    client: FlaskClient, admin_token: str, regular_user: User, question: Question
+) -> None:
+    """Test that deleting a question deletes the answers given to it, and keeps the scores they were graded into."""
+    question_id = question.id
+    attempt = {"question_id": question_id, "selected_option": 1, "is_correct": True}
+    grade = Grade(2, 1, [attempt])
+    score_id = record_grade(question.quiz_id, regular_user.id, grade)
+    db.session.commit()
+
+    response = client.delete(f"/questions/{question_id}", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert db.session.get(Question, question_id) is None
+    assert not QuestionAttempt.query.filter_by(question_id=question_id).count()
+    assert db.session.get(Score, score_id).user_score == grade.user_score
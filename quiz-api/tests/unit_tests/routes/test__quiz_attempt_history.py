@@ -0,0 +1,90 @@
+"""Tests for the paginated quiz attempt history."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Question, Quiz, Score, User
+
+
+def _add_attempts(quiz: Quiz, user: User, count: int) -> None:
+    """Add `count` attempts, one hour apart, the newest one hour ago."""
+    now = datetime.now(timezone.utc)
+    db.session.add_all(
+        Score(
+            quiz_id=quiz.id,
+            user_id=user.id,
+            user_score=i,
+            number_of_correct_answers=i,
+            timestamp=now - timedelta(hours=i + 1),
+        )
+        for i in range(count)
+    )
+    db.session.commit()
+
+
+def test_history_pages_with_cursor(
+    client: FlaskClient, user_token: str, regular_user: User, quiz: Quiz, question: Question
+) -> None:
+    """Test that following next_cursor walks every attempt exactly once, newest first."""
+    _add_attempts(quiz, regular_user, 5)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    response = client.get("/quiz/attempts/history?limit=2", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    first_page = response.json
+    assert [item["user_score"] for item in first_page["items"]] == [0, 1]
+    assert first_page["items"][0]["quiz_name"] == "Test Quiz"
+    assert (first_page["items"][0]["total_quiz_score"], first_page["items"][0]["total_questions"]) == (2, 1)
+    assert first_page["next_cursor"]
+
+    response = client.get(f"/quiz/attempts/history?limit=2&cursor={first_page['next_cursor']}", headers=headers)
+    assert [item["user_score"] for item in response.json["items"]] == [2, 3]
+
+    response = client.get(f"/quiz/attempts/history?limit=2&cursor={response.json['next_cursor']}", headers=headers)
+    assert [item["user_score"] for item in response.json["items"]] == [4]
+    assert response.json["next_cursor"] is None
+
+
+def test_history_date_filters(client: FlaskClient, user_token: str, regular_user: User, quiz: Quiz) -> None:
+    """Test filtering the history to a time range."""
+    _add_attempts(quiz, regular_user, 5)
+    now = datetime.now(timezone.utc)
+    from_date = (now - timedelta(hours=4, minutes=30)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    to_date = (now - timedelta(hours=1, minutes=30)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    response = client.get(
+        f"/quiz/attempts/history?from_date={from_date}&to_date={to_date}",
+        headers={"Authorization": f"Bearer {user_token}"},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [item["user_score"] for item in response.json["items"]] == [1, 2, 3]
+
+
+def test_history_invalid_cursor(client: FlaskClient, user_token: str) -> None:
+    """Test that a malformed cursor is rejected."""
+    response = client.get(
+        "/quiz/attempts/history?cursor=not-a-cursor", headers={"Authorization": f"Bearer {user_token}"}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json["message"] == "Invalid cursor"
+
+
+def test_history_query_count_is_constant(
+    client: FlaskClient, user_token: str, regular_user: User, question: Question, query_counter
+) -> None:
+    """Test that a history page is one query regardless of the number of attempts."""
+    attempts = 50
+    _add_attempts(question.quiz, regular_user, attempts)
+
+    with query_counter() as counter:
+        response = client.get(
+            f"/quiz/attempts/history?limit={attempts}", headers={"Authorization": f"Bearer {user_token}"}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json["items"]) == attempts
+    assert counter.count == 1
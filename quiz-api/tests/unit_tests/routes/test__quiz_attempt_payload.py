@@ -0,0 +1,105 @@
+"""Tests for the cached, ETag'd payload of starting a quiz attempt."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, Quiz, QuizSignup, User
+
+
+def _add_active_quiz(chapter: Chapter, user: User | None) -> tuple[int, int]:
+    """Create a running quiz with one question, and sign the user up if given."""
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Exam",
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(minutes=5),
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    question = Question(
+        quiz_id=quiz.id,
+        question_statement="What is 2 + 2?",
+        option1="4",
+        option2="5",
+        option3="6",
+        option4="7",
+        correct_option=1,
+        points=3,
+    )
+    db.session.add(question)
+    if user is not None:
+        db.session.add(QuizSignup(user_id=user.id, quiz_id=quiz.id))
+    db.session.commit()
+    return quiz.id, question.id
+
+
+def test_start_quiz_attempt_serves_etag_and_not_modified(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that the payload has a strong ETag, and a reload with it gets a 304 without reading the questions."""
+    quiz_id, question_id = _add_active_quiz(chapter, regular_user)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    response = client.get(f"/quiz/{quiz_id}/attempt", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["questions"] == [
+        {
+            "id": question_id,
+            "question_statement": "What is 2 + 2?",
+            "option1": "4",
+            "option2": "5",
+            "option3": "6",
+            "option4": "7",
+            "points": 3,
+        }
+    ]
+    etag, is_weak = response.get_etag()
+    assert etag and not is_weak
+    assert "private" in response.headers["Cache-Control"]
+
+    with query_counter() as counter:
+        response = client.get(f"/quiz/{quiz_id}/attempt", headers={**headers, "If-None-Match": f'"{etag}"'})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.data
+    assert not any("FROM questions" in statement for statement in counter.statements)
+
+
+def test_start_quiz_attempt_payload_changes_with_questions(
+    client: FlaskClient, user_token: str, admin_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that editing a question changes the payload and its ETag."""
+    quiz_id, question_id = _add_active_quiz(chapter, regular_user)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    etag = client.get(f"/quiz/{quiz_id}/attempt", headers=headers).get_etag()[0]
+    response = client.patch(
+        f"/questions/{question_id}", json={"points": 5}, headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get(f"/quiz/{quiz_id}/attempt", headers={**headers, "If-None-Match": f'"{etag}"'})
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_etag()[0] != etag
+    assert (response.json["questions"][0]["points"], response.json["total_quiz_score"]) == (5, 5)
+
+
+def test_start_quiz_attempt_checks_signup_before_cache(
+    client: FlaskClient, user_token: str, admin_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that a cached payload, or its ETag, is never served to a user who is not signed up."""
+    quiz_id, _ = _add_active_quiz(chapter, regular_user)
+    etag = client.get(f"/quiz/{quiz_id}/attempt", headers={"Authorization": f"Bearer {user_token}"}).get_etag()[0]
+
+    QuizSignup.query.filter_by(quiz_id=quiz_id).delete()
+    db.session.commit()
+
+    response = client.get(
+        f"/quiz/{quiz_id}/attempt", headers={"Authorization": f"Bearer {user_token}", "If-None-Match": f'"{etag}"'}
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert "ETag" not in response.headers
+
+    response = client.get("/admin/diagnostics/caches", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.json["caches"]["quiz_attempt_payloads"] == {"size": 1, "hits": 0, "misses": 1, "hit_rate": 0.0}
@@ -0,0 +1,99 @@
+"""Tests for viewing the results of a quiz attempt."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, QuestionAttempt, Quiz, QuizSignup, Score, User
+from quiz_api.utils.question_totals import refresh_question_totals
+
+# User, quiz signup, latest score and the joined attempts
+MAX_RESULTS_QUERIES = 4
+
+
+def _add_attempted_quiz(chapter: Chapter, user: User, number_of_questions: int, starts_in: timedelta) -> Quiz:
+    """Create a one hour quiz, sign the user up and record an attempt answering every other question."""
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Exam",
+        date_of_quiz=datetime.now(timezone.utc) + starts_in,
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    questions = [
+        Question(
+            quiz_id=quiz.id,
+            question_statement=f"Question {i}",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1,
+        )
+        for i in range(number_of_questions)
+    ]
+    db.session.add_all(questions)
+    db.session.add(QuizSignup(user_id=user.id, quiz_id=quiz.id))
+    db.session.flush()
+
+    correct = len(questions[::2])
+    score = Score(quiz_id=quiz.id, user_id=user.id, user_score=correct, number_of_correct_answers=correct)
+    db.session.add(score)
+    db.session.flush()
+    db.session.add_all(
+        QuestionAttempt(
+            score_id=score.id,
+            question_id=question.id,
+            selected_option=1 if i % 2 == 0 else 0,
+            is_correct=i % 2 == 0,
+        )
+        for i, question in enumerate(questions)
+    )
+    refresh_question_totals(quiz.id)
+    db.session.commit()
+    return quiz
+
+
+def test_results_include_questions_and_answers(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that results list every question with the user's answer."""
+    quiz = _add_attempted_quiz(chapter, regular_user, 3, starts_in=-timedelta(days=1))
+
+    response = client.get(f"/quiz/{quiz.id}/results", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert (response.json["total_quiz_score"], response.json["user_score"]) == (3, 2)
+    assert [q["question_statement"] for q in response.json["questions"]] == ["Question 0", "Question 1", "Question 2"]
+    assert [q["user_answer"] for q in response.json["questions"]] == [1, None, 1]
+    assert response.json["questions"][0]["option4"] == "D"
+
+
+def test_results_hidden_while_quiz_is_active(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that results are not available while the quiz is running."""
+    quiz = _add_attempted_quiz(chapter, regular_user, 1, starts_in=-timedelta(minutes=5))
+
+    response = client.get(f"/quiz/{quiz.id}/results", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json["message"] == "Quiz is still active"
+
+
+def test_results_query_count_is_capped(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that results of a 100 question exam do not issue a query per question."""
+    number_of_questions = 100
+    quiz = _add_attempted_quiz(chapter, regular_user, number_of_questions, starts_in=-timedelta(days=1))
+    quiz_id = quiz.id
+
+    with query_counter() as counter:
+        response = client.get(f"/quiz/{quiz_id}/results", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json["questions"]) == number_of_questions
+    assert counter.count <= MAX_RESULTS_QUERIES
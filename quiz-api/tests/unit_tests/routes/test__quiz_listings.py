@@ -0,0 +1,240 @@
+"""Tests for the upcoming, ongoing and past quiz listings."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, Quiz
+from quiz_api.utils.question_totals import refresh_question_totals
+
+# One query for the current user, one for the listing
+MAX_LISTING_QUERIES = 2
+
+
+def _add_quiz(chapter: Chapter, name: str, starts_in: timedelta, number_of_questions: int = 1) -> Quiz:
+    """Create a one hour quiz starting `starts_in` from now with some questions."""
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name=name,
+        date_of_quiz=datetime.now(timezone.utc) + starts_in,
+        time_duration="01:00",
+        remarks=f"{name} remarks",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    db.session.add_all(
+        Question(
+            quiz_id=quiz.id,
+            question_statement=f"{name} question {i}",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1,
+        )
+        for i in range(number_of_questions)
+    )
+    refresh_question_totals(quiz.id)
+    db.session.commit()
+    return quiz
+
+
+def _add_quizzes_in_every_state(chapter: Chapter) -> None:
+    _add_quiz(chapter, "Past", starts_in=-timedelta(hours=3))
+    _add_quiz(chapter, "Older Past", starts_in=-timedelta(days=2))
+    _add_quiz(chapter, "Ongoing", starts_in=-timedelta(minutes=10))
+    _add_quiz(chapter, "Upcoming", starts_in=timedelta(days=1))
+    _add_quiz(chapter, "Empty Upcoming", starts_in=timedelta(days=2), number_of_questions=0)
+
+
+def test_upcoming_quizzes(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test that only upcoming quizzes with questions are listed for users."""
+    subject_id = chapter.subject_id
+    _add_quizzes_in_every_state(chapter)
+
+    response = client.get("/quizzes/upcoming", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [quiz["name"] for quiz in response.json] == ["Upcoming"]
+    assert response.json[0]["chapter_name"] == "Test Chapter"
+    assert response.json[0]["subject_name"] == "Test Subject"
+    assert response.json[0]["subject_id"] == subject_id
+    assert response.json[0]["time_duration"] == "01:00"
+
+
+def test_upcoming_quizzes_include_empty_quizzes_for_admin(
+    client: FlaskClient, admin_token: str, chapter: Chapter
+) -> None:
+    """Test that admins also see upcoming quizzes without questions."""
+    _add_quizzes_in_every_state(chapter)
+
+    response = client.get("/quizzes/upcoming", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [quiz["name"] for quiz in response.json] == ["Upcoming", "Empty Upcoming"]
+
+
+def test_ongoing_quizzes(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test that only quizzes within their time window are ongoing."""
+    _add_quizzes_in_every_state(chapter)
+
+    response = client.get("/quizzes/ongoing", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [quiz["name"] for quiz in response.json] == ["Ongoing"]
+
+
+def test_past_quizzes_are_most_recent_first(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test that ended quizzes are listed, most recent first."""
+    _add_quizzes_in_every_state(chapter)
+
+    response = client.get("/quizzes/past", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [quiz["name"] for quiz in response.json] == ["Past", "Older Past"]
+
+
+def test_past_quizzes_pagination(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test that limit and offset page through past quizzes."""
+    for day in range(1, 6):
+        _add_quiz(chapter, f"Past {day}", starts_in=-timedelta(days=day))
+
+    response = client.get("/quizzes/past?limit=2&offset=2", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [quiz["name"] for quiz in response.json] == ["Past 3", "Past 4"]
+
+
+def test_no_ongoing_quizzes(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test that an empty listing is reported as not found."""
+    _add_quiz(chapter, "Upcoming", starts_in=timedelta(days=1))
+
+    response = client.get("/quizzes/ongoing", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json["message"] == "No ongoing quizzes found"
+
+
+def test_quiz_listings_query_count_is_bounded(
+    client: FlaskClient, user_token: str, chapter: Chapter, query_counter
+) -> None:
+    """Test that listing many quizzes does not issue a query per quiz."""
+    days = 20
+    for day in range(1, days + 1):
+        _add_quiz(chapter, f"Past {day}", starts_in=-timedelta(days=day), number_of_questions=3)
+        _add_quiz(chapter, f"Upcoming {day}", starts_in=timedelta(days=day), number_of_questions=3)
+
+    for endpoint in ("/quizzes/past", "/quizzes/upcoming"):
+        with query_counter() as counter:
+            response = client.get(endpoint, headers={"Authorization": f"Bearer {user_token}"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json) == days
+        assert counter.count <= MAX_LISTING_QUERIES
+
+
+def test_quiz_listings_do_not_load_questions(
+    client: FlaskClient, user_token: str, chapter: Chapter, query_counter
+) -> None:
+    """Test that question totals are read from the quiz rather than by loading the questions."""
+    _add_quiz(chapter, "Short", starts_in=timedelta(days=1), number_of_questions=2)
+    _add_quiz(chapter, "Long", starts_in=timedelta(days=2), number_of_questions=5)
+
+    with query_counter() as counter:
+        response = client.get("/quizzes/upcoming", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [(q["name"], q["number_of_questions"], q["total_quiz_score"]) for q in response.json] == [
+        ("Short", 2, 2),
+        ("Long", 5, 5),
+    ]
+    assert not any(statement.lstrip().startswith("SELECT questions.") for statement in counter.statements)
+
+
+def test_chapter_quizzes_include_question_totals(
+    client: FlaskClient, user_token: str, chapter: Chapter, query_counter
+) -> None:
+    """Test that the chapter quiz list reports question totals without loading questions."""
+    chapter_id = chapter.id
+    _add_quiz(chapter, "Empty", starts_in=timedelta(days=1), number_of_questions=0)
+    _add_quiz(chapter, "Full", starts_in=timedelta(days=2), number_of_questions=3)
+
+    with query_counter() as counter:
+        response = client.get(f"/chapters/{chapter_id}/quizzes", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [(q["name"], q["number_of_questions"], q["total_quiz_score"]) for q in response.json] == [
+        ("Empty", 0, 0),
+        ("Full", 3, 3),
+    ]
+    assert not any(statement.lstrip().startswith("SELECT questions.") for statement in counter.statements)
+
+
+def test_quiz_aggregates_filter_and_sort_in_sql(client: FlaskClient, chapter: Chapter) -> None:
+    """Test that the quiz aggregate hybrids can be used in WHERE and ORDER BY clauses."""
+    _add_quiz(chapter, "Empty", starts_in=timedelta(days=1), number_of_questions=0)
+    _add_quiz(chapter, "Two", starts_in=timedelta(days=1), number_of_questions=2)
+    _add_quiz(chapter, "Four", starts_in=timedelta(days=1), number_of_questions=4)
+    _add_quiz(chapter, "Running", starts_in=-timedelta(minutes=5), number_of_questions=1)
+
+    names = [
+        name
+        for (name,) in db.session.query(Quiz.name)
+        .filter(Quiz.number_of_questions > 0, Quiz.is_upcoming)
+        .order_by(Quiz.total_quiz_score.desc())
+    ]
+    active = [name for (name,) in db.session.query(Quiz.name).filter(Quiz.is_active)]
+
+    assert names == ["Four", "Two"]
+    assert active == ["Running"]
+
+
+def test_quiz_schedule_columns_follow_updates(client: FlaskClient, admin_token: str, chapter: Chapter) -> None:
+    """Test that duration_minutes and ends_at stay in sync when a quiz is created and updated."""
+    chapter_id = chapter.id
+    response = client.post(
+        f"/chapters/{chapter_id}/quizzes",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"name": "Scheduled", "date_of_quiz": "2030-01-01T10:00:00Z", "time_duration": "01:30"},
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json["quiz"]["time_duration"] == "01:30"
+
+    quiz = db.session.query(Quiz).filter_by(name="Scheduled").one()
+    assert (quiz.duration_minutes, quiz.end_time) == (90, datetime(2030, 1, 1, 11, 30, tzinfo=timezone.utc))
+    quiz_id = quiz.id
+
+    response = client.patch(
+        f"/quizzes/{quiz_id}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"date_of_quiz": "2030-01-02T10:00:00Z", "time_duration": "00:45"},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get(f"/quizzes/{quiz_id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.json["time_duration"] == "00:45"
+    assert response.json["end_time"] == "2030-01-02T10:45:00+00:00"
+
+
+def test_upcoming_quizzes_starting_within_hours(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test filtering upcoming quizzes to those starting soon."""
+    _add_quiz(chapter, "Soon", starts_in=timedelta(hours=2))
+    _add_quiz(chapter, "Later", starts_in=timedelta(days=3))
+
+    response = client.get("/quizzes/upcoming?starts_within_hours=6", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [quiz["name"] for quiz in response.json] == ["Soon"]
+
+
+def test_past_quizzes_ended_since(client: FlaskClient, user_token: str, chapter: Chapter) -> None:
+    """Test filtering past quizzes to those that ended after a given time."""
+    _add_quiz(chapter, "Yesterday", starts_in=-timedelta(days=1))
+    _add_quiz(chapter, "Last Week", starts_in=-timedelta(days=7))
+    since = (datetime.now(timezone.utc) - timedelta(days=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    response = client.get(f"/quizzes/past?ended_since={since}", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [quiz["name"] for quiz in response.json] == ["Yesterday"]
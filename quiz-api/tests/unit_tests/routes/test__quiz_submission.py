@@ -0,0 +1,179 @@
+"""Tests for submitting a quiz attempt."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, LeaderboardEntry, Question, QuestionAttempt, Quiz, QuizSignup, Score, User
+
+
+def _add_active_quiz(chapter: Chapter, user: User, number_of_questions: int) -> tuple[int, list[int]]:
+    """Create a running quiz whose questions are all answered by option 1, and sign the user up."""
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Exam",
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(minutes=5),
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    questions = [
+        Question(
+            quiz_id=quiz.id,
+            question_statement=f"Question {i}",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1,
+            points=i + 1,
+        )
+        for i in range(number_of_questions)
+    ]
+    db.session.add_all(questions)
+    db.session.add(QuizSignup(user_id=user.id, quiz_id=quiz.id))
+    db.session.commit()
+    return quiz.id, [question.id for question in questions]
+
+
+def test_submit_quiz_records_score_and_attempts(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that a submission is graded and stored with one INSERT for the score and one for the attempts."""
+    user_id = regular_user.id
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user, 3)
+    answers = [
+        {"question_id": question_ids[0], "selected_option": 1},
+        {"question_id": question_ids[1], "selected_option": 2},
+        {"question_id": question_ids[2], "selected_option": 1},
+    ]
+
+    with query_counter() as counter:
+        response = client.post(
+            f"/quiz/{quiz_id}/submit", json={"answers": answers}, headers={"Authorization": f"Bearer {user_token}"}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [statement.split()[2] for statement in counter.statements if statement.startswith("INSERT")] == [
+        "scores",
+        "question_attempts",
+        "leaderboard_entries",
+        "quiz_score_rollups",
+        "chapter_score_rollups",
+        "subject_score_rollups",
+        "user_stats",
+        # Marks and counts of the hour, then of the day
+        "active_user_buckets",
+        "active_user_buckets",
+        "site_activity_rollups",
+        "quiz_activity_rollups",
+        "site_activity_rollups",
+        "quiz_activity_rollups",
+    ]
+
+    score = Score.query.filter_by(quiz_id=quiz_id, user_id=user_id).one()
+    assert (score.user_score, score.number_of_correct_answers) == (4, 2)
+    attempts = QuestionAttempt.query.filter_by(score_id=score.id).order_by(QuestionAttempt.question_id).all()
+    assert [(attempt.selected_option, attempt.is_correct) for attempt in attempts] == [
+        (1, True),
+        (2, False),
+        (1, True),
+    ]
+
+
+def test_submit_quiz_rejects_questions_of_other_quizzes(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that a submission answering questions outside the quiz is rejected, and nothing of it is stored."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user, 1)
+    answers = [{"question_id": question_ids[0], "selected_option": None}, {"question_id": 99999, "selected_option": 1}]
+
+    response = client.post(
+        f"/quiz/{quiz_id}/submit", json={"answers": answers}, headers={"Authorization": f"Bearer {user_token}"}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json["message"] == "Questions not part of this quiz: 99999"
+    assert not Score.query.filter_by(quiz_id=quiz_id).count()
+    assert not QuestionAttempt.query.count()
+
+
+def test_submit_quiz_requires_signup_and_running_quiz(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that submissions without a signup, or once the quiz ended and its answers are public, are rejected."""
+    user_id = regular_user.id
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user, 1)
+    answers = {"answers": [{"question_id": question_ids[0], "selected_option": 1}]}
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    db.session.query(QuizSignup).filter_by(quiz_id=quiz_id).delete()
+    db.session.commit()
+    response = client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=headers)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json["message"] == "User has not signed up for this quiz"
+
+    quiz = db.session.get(Quiz, quiz_id)
+    quiz.date_of_quiz = datetime.now(timezone.utc) - timedelta(hours=2)
+    db.session.add(QuizSignup(user_id=user_id, quiz_id=quiz_id))
+    db.session.commit()
+    response = client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=headers)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json["message"] == "Quiz is not active"
+
+    assert not Score.query.count()
+    assert not LeaderboardEntry.query.count()
+
+
+def test_submit_quiz_rejects_repeated_answers(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that answering a question more than once is rejected instead of scoring it each time."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user, 1)
+    answers = [{"question_id": question_ids[0], "selected_option": 1}] * 50
+
+    response = client.post(
+        f"/quiz/{quiz_id}/submit", json={"answers": answers}, headers={"Authorization": f"Bearer {user_token}"}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json["details"][0]["msg"] == "Value error, Each question can only be answered once"
+    assert not Score.query.filter_by(quiz_id=quiz_id).count()
+
+
+def test_submit_quiz_caches_answer_key(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that later submissions grade without reading the questions."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user, 2)
+    answers = {"answers": [{"question_id": question_ids[0], "selected_option": 1}]}
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+
+    client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=user_headers)
+    with query_counter() as counter:
+        client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=user_headers)
+    assert not any("FROM questions" in statement for statement in counter.statements)
+
+
+def test_editing_a_question_invalidates_answer_key(
+    client: FlaskClient, user_token: str, admin_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that a cached answer key is replaced once a question of its quiz changes."""
+    quiz_id, question_ids = _add_active_quiz(chapter, regular_user, 2)
+    answers = {"answers": [{"question_id": question_ids[0], "selected_option": 1}]}
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=user_headers)
+    client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=user_headers)
+
+    # Making the first question worth more invalidates the cached key
+    response = client.patch(f"/questions/{question_ids[0]}", json={"points": 5}, headers=admin_headers)
+    assert response.status_code == HTTPStatus.OK
+    client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=user_headers)
+
+    scores = Score.query.filter_by(quiz_id=quiz_id).order_by(Score.id).all()
+    assert [score.user_score for score in scores] == [1, 1, 5]
+
+    response = client.get("/admin/diagnostics/caches", headers=admin_headers)
+    assert response.json["caches"]["answer_keys"] == {"size": 1, "hits": 1, "misses": 2, "hit_rate": 1 / 3}
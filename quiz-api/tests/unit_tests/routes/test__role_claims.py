@@ -0,0 +1,132 @@
+"""Tests for role claims in access tokens and token revocation on role changes."""
+
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from flask_jwt_extended import create_access_token, decode_token
+from quiz_api.models.database import db
+from quiz_api.models.models import TokenRevocation, User
+from quiz_api.utils.auth import get_token_revocation_cache
+
+
+def test_login_token_carries_role(client: FlaskClient, user_token: str, admin_token: str) -> None:
+    """Test that login puts the user's role in the token claims."""
+    assert decode_token(user_token)["role"] == "user"
+    assert decode_token(admin_token)["role"] == "admin"
+
+
+def test_admin_route_authorizes_from_claims(client: FlaskClient, admin_token: str, query_counter) -> None:
+    """Test that admin routes do not load the calling user to check their role."""
+    with query_counter() as counter:
+        response = client.get("/admin/users/1", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert counter.count == 1  # Only the requested user
+
+
+def test_admin_route_rejects_user_role(client: FlaskClient, user_token: str) -> None:
+    """Test that a regular user's token cannot call admin routes."""
+    response = client.get("/admin/users", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json["message"] == "Unauthorized"
+
+
+def test_token_without_role_claim_falls_back_to_user_lookup(client: FlaskClient, admin_user: User) -> None:
+    """Test that tokens issued before role claims existed keep working."""
+    token = create_access_token(identity=str(admin_user.id))
+
+    response = client.get("/admin/users", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_role_change_revokes_tokens(
+    client: FlaskClient, admin_token: str, user_token: str, regular_user: User
+) -> None:
+    """Test that changing a user's role revokes their tokens and a new login carries the new role."""
+    user_id = int(decode_token(user_token)["sub"])
+
+    response = client.patch(
+        f"/admin/users/{user_id}", json={"role": "admin"}, headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    response = client.post("/auth/login", json={"email": "test@test.com", "password": "test123"})
+    new_token = response.json["access_token"]
+    assert decode_token(new_token)["role"] == "admin"
+    response = client.get("/admin/users", headers={"Authorization": f"Bearer {new_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+    # Other users' tokens are unaffected
+    response = client.get("/admin/users", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_update_without_role_change_keeps_tokens(
+    client: FlaskClient, admin_token: str, user_token: str, regular_user: User
+) -> None:
+    """Test that updating other fields does not revoke the user's tokens."""
+    response = client.patch(
+        f"/admin/users/{decode_token(user_token)['sub']}",
+        json={"full_name": "Renamed User", "role": "user"},
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_user_deletion_revokes_tokens(
+    client: FlaskClient, admin_token: str, user_token: str, regular_user: User
+) -> None:
+    """Test that a deleted user's tokens stop working."""
+    response = client.delete(
+        f"/admin/users/{decode_token(user_token)['sub']}", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get("/quizzes/upcoming", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_revocation_is_stored_in_database(
+    client: FlaskClient, admin_token: str, user_token: str, regular_user: User
+) -> None:
+    """Test that revocations are stored in the database, and that is where every worker reads them from."""
+    user_id = int(decode_token(user_token)["sub"])
+    response = client.patch(
+        f"/admin/users/{user_id}", json={"role": "admin"}, headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert db.session.get(TokenRevocation, user_id) is not None
+
+    # The worker's copy is only read again from the database once it is `max_age` old
+    cache = get_token_revocation_cache()
+    db.session.delete(db.session.get(TokenRevocation, user_id))
+    db.session.commit()
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    cache.max_age = 0
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_revocation_by_another_worker(client: FlaskClient, admin_token: str, admin_user: User, query_counter) -> None:
+    """Test that a revocation committed by another worker applies once the revocations are read again."""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    db.session.add(TokenRevocation(user_id=admin_user.id, revoked_at=datetime.now(timezone.utc)))
+    db.session.commit()
+    assert client.get("/admin/users", headers=headers).status_code == HTTPStatus.OK
+
+    get_token_revocation_cache().max_age = 0
+    with query_counter() as counter:
+        response = client.get("/admin/users", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert ["FROM token_revocations" in statement for statement in counter.statements] == [True]
@@ -0,0 +1,102 @@
+"""Tests for the match totals of the search endpoints."""
+
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, Quiz, Subject
+from quiz_api.utils.question_totals import refresh_question_totals
+
+
+def _add_subjects(count: int, name: str = "Mathematics") -> None:
+    db.session.add_all(Subject(name=f"{name} {i}", description=f"Description {i}") for i in range(count))
+    db.session.commit()
+
+
+def test_search_total_counts_every_match(client: FlaskClient) -> None:
+    """Test that the total is the number of matches, not the size of the page."""
+    _add_subjects(7)
+    _add_subjects(2, name="Physics")
+
+    response = client.get("/subjects/search?q=mathematics&limit=3")
+
+    assert response.status_code == HTTPStatus.OK
+    assert (len(response.json["items"]), response.json["total"]) == (3, 7)
+    assert response.json["total_is_approximate"] is False
+
+    response = client.get("/subjects/search?limit=3")
+    assert response.json["total"] == Subject.query.count()
+
+
+def test_search_total_respects_filters(client: FlaskClient, subject: Subject) -> None:
+    """Test that the total only counts chapters of the searched subject."""
+    other_subject = Subject(name="Other Subject", description="Other Description")
+    db.session.add(other_subject)
+    db.session.commit()
+    matches = 2
+    db.session.add_all(
+        Chapter(name=f"Algebra {i}", description="Algebra", subject_id=subject.id) for i in range(matches)
+    )
+    db.session.add_all(
+        Chapter(name=f"Algebra {i}", description="Algebra", subject_id=other_subject.id) for i in range(3)
+    )
+    db.session.commit()
+
+    response = client.get(f"/subjects/{subject.id}/chapters/search?q=algebra&limit=1")
+
+    assert response.json["total"] == matches
+
+
+def test_search_total_is_cached_until_the_index_changes(client: FlaskClient, query_counter) -> None:
+    """Test that repeated searches reuse the cached count, and that writes invalidate it."""
+    _add_subjects(3)
+    client.get("/subjects/search?q=mathematics")
+
+    with query_counter() as counter:
+        response = client.get("/subjects/search?q=%20mathematics%20")
+    assert response.json["total"] == Subject.query.count()
+    assert not any("count(*)" in statement.lower() for statement in counter.statements)
+
+    _add_subjects(1)
+    with query_counter() as counter:
+        response = client.get("/subjects/search?q=mathematics")
+    assert response.json["total"] == Subject.query.count()
+    assert any("count(*)" in statement.lower() for statement in counter.statements)
+
+
+def test_search_total_survives_writes_to_unindexed_columns(
+    client: FlaskClient, question: Question, query_counter
+) -> None:
+    """Test that refreshing a quiz's question totals keeps its cached count, and renaming it does not."""
+    quiz_id = question.quiz_id
+    url = f"/chapters/{question.quiz.chapter_id}/quizzes/search?q=renamed"
+    assert client.get(url).json["total"] == 0
+
+    refresh_question_totals(quiz_id)
+    db.session.commit()
+    with query_counter() as counter:
+        response = client.get(url)
+    assert response.json["total"] == 0
+    assert not any("count(*)" in statement.lower() for statement in counter.statements)
+
+    db.session.get(Quiz, quiz_id).name = "Renamed Quiz"
+    db.session.commit()
+    with query_counter() as counter:
+        response = client.get(url)
+    assert response.json["total"] == 1
+    assert any("count(*)" in statement.lower() for statement in counter.statements)
+
+
+def test_search_approximate_total(client: FlaskClient) -> None:
+    """Test that an approximate total stops counting at the configured cap."""
+    cap = 5
+    client.application.config["SEARCH_APPROXIMATE_COUNT_CAP"] = cap
+    _add_subjects(8)
+
+    response = client.get("/subjects/search?q=m&limit=2&approximate_total=true")
+    assert response.json["total"] == cap
+    assert response.json["total_is_approximate"] is True
+
+    response = client.get("/subjects/search?q=mathematics%206&approximate_total=true")
+    assert response.json["total"] == 1
+    assert response.json["total_is_approximate"] is False
@@ -0,0 +1,115 @@
+"""Tests for listing the current user's quiz signups."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, Quiz, QuizSignup, Score, User
+from quiz_api.utils.question_totals import refresh_question_totals
+
+
+def _add_signed_up_quiz(chapter: Chapter, user: User, name: str, starts_in: timedelta) -> Quiz:
+    """Create a one hour quiz with two questions and sign the user up for it."""
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name=name,
+        date_of_quiz=datetime.now(timezone.utc) + starts_in,
+        time_duration="01:00",
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    db.session.add_all(
+        Question(
+            quiz_id=quiz.id,
+            question_statement=f"{name} question {i}",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1,
+            points=2,
+        )
+        for i in range(2)
+    )
+    db.session.add(QuizSignup(user_id=user.id, quiz_id=quiz.id))
+    refresh_question_totals(quiz.id)
+    db.session.commit()
+    return quiz
+
+
+def test_signups_report_latest_score(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that each signup carries the score of the user's latest attempt."""
+    past = _add_signed_up_quiz(chapter, regular_user, "Past", starts_in=-timedelta(days=1))
+    upcoming = _add_signed_up_quiz(chapter, regular_user, "Upcoming", starts_in=timedelta(days=1))
+    now = datetime.now(timezone.utc)
+    db.session.add_all(
+        [
+            Score(
+                quiz_id=past.id,
+                user_id=regular_user.id,
+                user_score=2,
+                number_of_correct_answers=1,
+                timestamp=now - timedelta(hours=20),
+            ),
+            Score(
+                quiz_id=past.id,
+                user_id=regular_user.id,
+                user_score=4,
+                number_of_correct_answers=2,
+                timestamp=now - timedelta(hours=23),
+            ),
+        ]
+    )
+    db.session.commit()
+    past_id, upcoming_id = past.id, upcoming.id
+
+    response = client.get("/users/quizzes/signups", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    quizzes = {quiz["id"]: quiz for quiz in response.json}
+    past, upcoming = quizzes[past_id], quizzes[upcoming_id]
+    assert past["status"] == "completed"
+    assert (past["user_score"], past["number_of_correct_answers"]) == (2, 1)
+    assert (past["total_quiz_score"], past["total_questions"]) == (4, 2)
+    assert past["chapter_name"] == "Test Chapter"
+    assert past["subject_name"] == "Test Subject"
+    assert upcoming["status"] == "upcoming"
+    assert upcoming["user_score"] == "?"
+    assert upcoming["number_of_correct_answers"] == "?"
+
+
+def test_signups_pagination(client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter) -> None:
+    """Test that signups are paginated newest quiz first."""
+    for day in range(1, 6):
+        _add_signed_up_quiz(chapter, regular_user, f"Quiz {day}", starts_in=timedelta(days=day))
+
+    response = client.get("/users/quizzes/signups?limit=2&offset=1", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [quiz["name"] for quiz in response.json] == ["Quiz 4", "Quiz 3"]
+
+
+def test_signups_query_count_is_constant(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that the signups listing is served by a single query however many signups there are."""
+    signups, attempts = 30, 3
+    for day in range(1, signups + 1):
+        quiz = _add_signed_up_quiz(chapter, regular_user, f"Quiz {day}", starts_in=-timedelta(days=day))
+        db.session.add_all(
+            Score(quiz_id=quiz.id, user_id=regular_user.id, user_score=attempt, number_of_correct_answers=attempt)
+            for attempt in range(attempts)
+        )
+    db.session.commit()
+
+    with query_counter() as counter:
+        response = client.get("/users/quizzes/signups", headers={"Authorization": f"Bearer {user_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json) == signups
+    # Each signup carries the last of its attempts
+    assert all(quiz["user_score"] == attempts - 1 for quiz in response.json)
+    assert counter.count == 1
@@ -0,0 +1,153 @@
+"""Tests for the users' summaries, served from their precomputed stats."""
+
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Quiz, Subject, User, UserStat
+from quiz_api.utils.grading import Grade, record_grade
+
+STARTED_AT = datetime(2024, 1, 1, 10, 0)
+
+
+def _add_quiz(chapter_id: int, name: str, total_points: int = 10) -> int:
+    quiz = Quiz(
+        chapter_id=chapter_id,
+        name=name,
+        date_of_quiz=datetime.now(timezone.utc) - timedelta(days=1),
+        time_duration="01:00",
+        total_points=total_points,
+    )
+    db.session.add(quiz)
+    db.session.commit()
+    return quiz.id
+
+
+def _grade(quiz_id: int, user_id: int, user_score: int, minutes: int) -> None:
+    """Record a graded submission, `minutes` after the quizzes started."""
+    record_grade(quiz_id, user_id, Grade(user_score, 0, []), STARTED_AT + timedelta(minutes=minutes))
+    db.session.commit()
+
+
+def _summary(client: FlaskClient, token: str) -> dict:
+    response = client.get("/users/me/summary", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == HTTPStatus.OK
+    return response.json
+
+
+def test_summary_per_subject_and_overall(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter, query_counter
+) -> None:
+    """Test that the summary totals the user's scores per subject and overall, without reading their scores."""
+    other_subject = Subject(name="Other Subject", description="d")
+    db.session.add(other_subject)
+    db.session.commit()
+    other_chapter = Chapter(name="Other Chapter", description="d", subject_id=other_subject.id)
+    db.session.add(other_chapter)
+    db.session.commit()
+    first_quiz = _add_quiz(chapter.id, "First")
+    second_quiz = _add_quiz(chapter.id, "Second", total_points=4)
+    other_quiz = _add_quiz(other_chapter.id, "Other", total_points=20)
+    user_id, subject_id, other_subject_id = regular_user.id, chapter.subject_id, other_subject.id
+    _grade(first_quiz, user_id, 8, minutes=1)
+    _grade(second_quiz, user_id, 1, minutes=5)
+    # Submitted after the others were recorded, but earlier, so it is not the latest
+    _grade(first_quiz, user_id, 3, minutes=2)
+    _grade(other_quiz, user_id, 15, minutes=3)
+
+    with query_counter() as counter:
+        summary = _summary(client, user_token)
+
+    assert not any("FROM scores" in statement for statement in counter.statements)
+    subjects = {row["subject_id"]: row for row in summary["subjects"]}
+    assert subjects[subject_id] == {
+        "subject_id": subject_id,
+        "subject_name": "Test Subject",
+        "attempts": 3,
+        "total_score": 12,
+        "average_percentage": 45.0,
+        "best_percentage": 80.0,
+        "latest_attempt_at": (STARTED_AT + timedelta(minutes=5)).isoformat(),
+        "latest_quiz_id": second_quiz,
+        "latest_quiz_name": "Second",
+        "latest_percentage": 25.0,
+    }
+    assert (subjects[other_subject_id]["attempts"], subjects[other_subject_id]["latest_percentage"]) == (1, 75.0)
+    assert (summary["attempts"], summary["total_score"]) == (4, 27)
+    assert (summary["average_percentage"], summary["best_percentage"]) == (52.5, 80.0)
+    assert summary["latest"] == {"quiz_id": second_quiz, "quiz_name": "Second", "percentage": 25.0}
+    assert db.session.get(User, user_id).total_score_across_all_quizzes == summary["total_score"]
+
+
+def test_summary_without_scores(client: FlaskClient, user_token: str) -> None:
+    """Test that a user who has not scored yet gets an empty summary."""
+    assert _summary(client, user_token) == {
+        "attempts": 0,
+        "total_score": 0,
+        "average_percentage": None,
+        "best_percentage": None,
+        "latest_attempt_at": None,
+        "latest": None,
+        "subjects": [],
+    }
+
+
+def test_admin_user_listing_includes_stats(
+    client: FlaskClient, admin_token: str, regular_user: User, admin_user: User, chapter: Chapter
+) -> None:
+    """Test that each listed user carries their totals, paginated or not."""
+    quiz_id = _add_quiz(chapter.id, "First")
+    user_id, admin_id = regular_user.id, admin_user.id
+    _grade(quiz_id, user_id, 6, minutes=1)
+    _grade(quiz_id, user_id, 10, minutes=2)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    users = {user["id"]: user for user in client.get("/admin/users", headers=headers).json}
+    assert users[user_id]["stats"] == {
+        "attempts": 2,
+        "total_score": 16,
+        "average_percentage": 80.0,
+        "best_percentage": 100.0,
+        "latest_attempt_at": (STARTED_AT + timedelta(minutes=2)).isoformat(),
+    }
+    assert users[admin_id]["stats"]["attempts"] == 0
+
+    page = client.get("/admin/users?limit=10", headers=headers).json
+    assert {user["id"]: user["stats"] for user in page["items"]}[user_id] == users[user_id]["stats"]
+
+
+def test_deleting_a_quiz_updates_user_stats(
+    client: FlaskClient, admin_token: str, user_token: str, chapter: Chapter
+) -> None:
+    """Test that the scores of a deleted quiz are taken out of the users' stats."""
+    # Both logins have ended the session of the user fixture, so the user is looked up again
+    user_id = User.query.filter_by(username="testuser").one().id
+    kept_quiz = _add_quiz(chapter.id, "Kept")
+    deleted_quiz = _add_quiz(chapter.id, "Deleted")
+    _grade(kept_quiz, user_id, 5, minutes=1)
+    _grade(deleted_quiz, user_id, 10, minutes=2)
+
+    response = client.delete(f"/quizzes/{deleted_quiz}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == HTTPStatus.OK
+
+    summary = _summary(client, user_token)
+    assert (summary["attempts"], summary["best_percentage"]) == (1, 50.0)
+    assert summary["latest"] == {"quiz_id": kept_quiz, "quiz_name": "Kept", "percentage": 50.0}
+
+
+def test_rebuild_score_rollups_rebuilds_user_stats(
+    client: FlaskClient, user_token: str, regular_user: User, chapter: Chapter
+) -> None:
+    """Test that rebuilding from scores gives the stats the submissions maintained."""
+    quiz_id = _add_quiz(chapter.id, "First")
+    _grade(quiz_id, regular_user.id, 4, minutes=2)
+    _grade(quiz_id, regular_user.id, 7, minutes=1)
+    expected = _summary(client, user_token)
+
+    db.session.query(UserStat).delete()
+    db.session.commit()
+    result = client.application.test_cli_runner().invoke(args=["rebuild-score-rollups"])
+
+    assert result.exit_code == 0
+    assert _summary(client, user_token) == expected
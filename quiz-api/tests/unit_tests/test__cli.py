@@ -0,0 +1,22 @@
+"""Tests for the Flask CLI commands."""
+
+from flask import Flask
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Question, Quiz
+
+
+def test_recompute_question_totals_command_fixes_drift(client: FlaskClient, quiz: Quiz, question: Question) -> None:
+    """Test that the CLI command recomputes totals that drifted from the questions."""
+    quiz_id = quiz.id
+    db.session.query(Quiz).filter_by(id=quiz_id).update({"question_count": 42, "total_points": 99})
+    db.session.commit()
+
+    app: Flask = client.application
+    result = app.test_cli_runner().invoke(args=["recompute-question-totals"])
+
+    assert result.exit_code == 0
+    assert "Recomputed question totals for 1 quiz(zes)" in result.output
+    quiz = db.session.get(Quiz, quiz_id)
+    db.session.refresh(quiz)
+    assert (quiz.question_count, quiz.total_points) == (1, 2)
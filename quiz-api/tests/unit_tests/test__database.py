@@ -0,0 +1,128 @@
+"""Tests for the request-scoped session, the SQLite connection profile and the read/write engine routing."""
+
+from http import HTTPStatus
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from quiz_api.config import Config, TestConfig
+from quiz_api.main import create_app
+from quiz_api.models.database import READ_BIND_KEY, db
+from quiz_api.models.models import Question, QuizSignup, Submission, User
+from quiz_api.utils.diagnostics import pool_stats, sqlite_pragmas
+from quiz_api.utils.grading import Grade, record_grade
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+
+@pytest.fixture
+def routed_app(tmp_path: Path) -> Generator[Flask, None, None]:
+    """Create an app on a SQLite file, with GET requests reading through a query_only engine on the same file."""
+    database_uri = f"sqlite:///{tmp_path / 'quiz.db'}"
+    config = {key: getattr(TestConfig, key) for key in dir(TestConfig) if key.isupper()}
+    config.update(
+        SQLALCHEMY_DATABASE_URI=database_uri,
+        SQLALCHEMY_READ_DATABASE_URI=database_uri,
+        SQLALCHEMY_ENGINE_OPTIONS=Config.SQLALCHEMY_ENGINE_OPTIONS,
+    )
+    app = create_app(test_config=config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _count_statements(engine) -> list[str]:
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_get_requests_read_from_read_engine(routed_app: Flask) -> None:
+    """Test that GET requests use the read engine and writes use the primary."""
+    read_statements = _count_statements(db.engines[READ_BIND_KEY])
+    primary_statements = _count_statements(db.engines[None])
+    client = routed_app.test_client()
+
+    response = client.post(
+        "/auth/register",
+        json={
+            "username": "reader",
+            "password": "reader123",
+            "full_name": "Reader",
+            "email": "reader@test.com",
+            "role": "user",
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert primary_statements
+    assert not read_statements
+
+    primary_statements.clear()
+    response = client.get("/subjects")
+    assert response.status_code == HTTPStatus.OK
+    assert read_statements
+    assert not primary_statements
+
+
+def test_read_engine_is_query_only(routed_app: Flask) -> None:
+    """Test that the SQLite read engine refuses writes."""
+    with db.engines[READ_BIND_KEY].connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM subjects")).scalar_one() == 0
+        with pytest.raises(OperationalError, match="readonly"):
+            connection.execute(text("INSERT INTO subjects (name, description) VALUES ('Name', 'Description')"))
+
+
+def test_without_read_uri_everything_uses_primary(client: FlaskClient) -> None:
+    """Test that read routing is off unless a read database is configured."""
+    assert READ_BIND_KEY not in db.engines
+
+    response = client.get("/subjects")
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_sqlite_pragmas_are_applied_on_connect(routed_app: Flask) -> None:
+    """Test that connections of a file database get the configured profile, which the URL cannot set."""
+    pragmas = sqlite_pragmas(db.engines[None], ["journal_mode", "synchronous", "mmap_size", "foreign_keys"])
+
+    assert pragmas == {"journal_mode": "wal", "synchronous": 1, "mmap_size": 268435456, "foreign_keys": 1}
+    assert sqlite_pragmas(db.engines[READ_BIND_KEY], ["query_only"]) == {"query_only": 1}
+
+
+@pytest.mark.parametrize("target", ["questions", "quizzes", "chapters", "subjects", "admin/users"])
+def test_deletes_with_foreign_keys_enforced(
+    client: FlaskClient, admin_token: str, regular_user: User, question: Question, target: str
+) -> None:
+    """Test that the admin deletes remove what refers to an answered question, now that SQLite enforces foreign keys."""
+    quiz = question.quiz
+    ids = {
+        "questions": question.id,
+        "quizzes": quiz.id,
+        "chapters": quiz.chapter_id,
+        "subjects": quiz.chapter.subject_id,
+        "admin/users": regular_user.id,
+    }
+    db.session.add(QuizSignup(quiz_id=quiz.id, user_id=regular_user.id))
+    attempt = {"question_id": question.id, "selected_option": 1, "is_correct": True}
+    score_id = record_grade(quiz.id, regular_user.id, Grade(2, 1, [attempt]))
+    db.session.add(
+        Submission(public_id="s1", quiz_id=quiz.id, user_id=regular_user.id, answers="{}", score_id=score_id)
+    )
+    db.session.commit()
+
+    response = client.delete(f"/{target}/{ids[target]}", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert db.session.execute(text("PRAGMA foreign_key_check")).all() == []
+
+
+def test_file_database_uses_configured_pool(routed_app: Flask) -> None:
+    """Test that file databases use a queue pool sized from the config."""
+    stats = pool_stats(db.engines[None])
+
+    assert stats["class"] == "QueuePool"
+    assert stats["size"] == Config.SQLALCHEMY_ENGINE_OPTIONS["pool_size"]
@@ -0,0 +1,59 @@
+"""Tests for grading quiz submissions."""
+
+import pytest
+from quiz_api.models.schemas import QuizAnswerSchema
+from quiz_api.utils.grading import UNANSWERED_OPTION, AnswerKey, Grade, InvalidAnswersError, grade_answers
+
+ANSWER_KEY = AnswerKey(0, [(3, 1, 2), (1, 2, 1), (2, 4, 3)])
+
+
+def _answers(*pairs: tuple[int, int | None]) -> list[QuizAnswerSchema]:
+    return [QuizAnswerSchema(question_id=question_id, selected_option=option) for question_id, option in pairs]
+
+
+def test_grade_answers() -> None:
+    """Test that points are summed over the correct answers and every answer gets an attempt row."""
+    grade = grade_answers(ANSWER_KEY, _answers((1, 2), (2, 4), (3, 3)))
+
+    assert grade == Grade(
+        user_score=4,
+        number_of_correct_answers=2,
+        attempts=[
+            {"question_id": 1, "selected_option": 2, "is_correct": True},
+            {"question_id": 2, "selected_option": 4, "is_correct": True},
+            {"question_id": 3, "selected_option": 3, "is_correct": False},
+        ],
+    )
+
+
+def test_grade_unanswered_questions() -> None:
+    """Test that unanswered questions score nothing and are stored with the unanswered option."""
+    grade = grade_answers(ANSWER_KEY, _answers((1, None)))
+
+    assert grade.user_score == 0
+    assert grade.attempts == [{"question_id": 1, "selected_option": UNANSWERED_OPTION, "is_correct": False}]
+
+
+def test_grade_rejects_unknown_questions() -> None:
+    """Test that answers to questions of other quizzes are rejected instead of being dropped."""
+    with pytest.raises(InvalidAnswersError, match="Questions not part of this quiz: 4, 99"):
+        grade_answers(ANSWER_KEY, _answers((1, None), (99, 1), (4, 2), (99, 2)))
+
+
+def test_grade_rejects_repeated_answers() -> None:
+    """Test that a question answered more than once is rejected instead of being graded on one of its answers."""
+    with pytest.raises(InvalidAnswersError, match="Each question can only be answered once"):
+        grade_answers(ANSWER_KEY, _answers((3, 1), (1, 1), (3, 2)))
+
+
+def test_grade_empty_submission() -> None:
+    """Test grading a submission without answers."""
+    assert grade_answers(ANSWER_KEY, []) == Grade(0, 0, [])
+
+
+def test_answer_key_lookup() -> None:
+    """Test that the answer key finds questions by ID in its sorted arrays."""
+    assert (len(ANSWER_KEY), list(ANSWER_KEY.question_ids)) == (3, [1, 2, 3])
+    assert ANSWER_KEY.lookup(2) == (4, 3)
+    assert ANSWER_KEY.lookup(0) is None
+    assert ANSWER_KEY.lookup(4) is None
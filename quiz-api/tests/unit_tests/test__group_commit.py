@@ -0,0 +1,127 @@
+"""Tests for the group commit writer."""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+import pytest
+from flask import Flask
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Question, Quiz, QuizSignup, Subject, User
+from quiz_api.utils.group_commit import GroupCommitWriter
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+NUMBER_OF_WRITERS = 16
+
+
+def _run_concurrently(writer: GroupCommitWriter, writes: list) -> list:
+    """Submit each write from its own thread at the same time, and return each result or error."""
+    outcomes = [None] * len(writes)
+    barrier = threading.Barrier(len(writes))
+
+    def submit(index: int) -> None:
+        barrier.wait()
+        try:
+            outcomes[index] = writer.submit(writes[index])
+        except Exception as exc:
+            outcomes[index] = exc
+
+    threads = [threading.Thread(target=submit, args=(index,)) for index in range(len(writes))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def _insert_subject(name: str):
+    return lambda: db.session.execute(insert(Subject).values(name=name, description="d")).inserted_primary_key[0]
+
+
+def test_concurrent_writes_share_transactions(file_app: Flask) -> None:
+    """Test that concurrent writes are committed in fewer transactions, and each caller gets its own result."""
+    writer = GroupCommitWriter(file_app, max_delay=0.05, max_batch=64)
+
+    ids = _run_concurrently(writer, [_insert_subject(f"Subject {i}") for i in range(NUMBER_OF_WRITERS)])
+
+    assert sorted(ids) == list(range(1, NUMBER_OF_WRITERS + 1))
+    assert db.session.query(Subject).count() == NUMBER_OF_WRITERS
+    stats = writer.stats()
+    assert stats["writes"] == NUMBER_OF_WRITERS
+    assert stats["batches"] < NUMBER_OF_WRITERS
+
+
+def test_failed_write_is_raised_to_its_caller_only(file_app: Flask) -> None:
+    """Test that a failing write of a batch does not undo the other writes of its transaction."""
+    writer = GroupCommitWriter(file_app, max_delay=0.2, max_batch=64)
+    db.session.add(Subject(id=1000, name="Existing", description="d"))
+    db.session.commit()
+
+    def insert_duplicate() -> None:
+        db.session.add(Subject(id=1000, name="Duplicate", description="d"))
+
+    outcomes = _run_concurrently(writer, [_insert_subject("First"), insert_duplicate, _insert_subject("Second")])
+
+    assert isinstance(outcomes[1], IntegrityError)
+    assert isinstance(outcomes[0], int) and isinstance(outcomes[2], int)
+    assert writer.stats()["batches"] == 1
+    db.session.expire_all()
+    assert sorted(subject.name for subject in db.session.query(Subject)) == ["Existing", "First", "Second"]
+
+
+@pytest.mark.parametrize("group_commit", [False, True])
+def test_signup_through_group_commit(file_app: Flask, group_commit: bool) -> None:
+    """Test that quiz signups behave the same with and without the group commit writer."""
+    file_app.config["GROUP_COMMIT"] = group_commit
+    subject = Subject(name="Subject", description="d")
+    db.session.add_all(
+        [
+            subject,
+            User(
+                username="student",
+                password=generate_password_hash("student123"),
+                full_name="Student",
+                email="student@test.com",
+            ),
+        ]
+    )
+    db.session.flush()
+    chapter = Chapter(name="Chapter", description="d", subject_id=subject.id)
+    db.session.add(chapter)
+    db.session.flush()
+    quiz = Quiz(
+        chapter_id=chapter.id,
+        name="Exam",
+        date_of_quiz=datetime.now(timezone.utc) + timedelta(days=1),
+        time_duration="01:00",
+        question_count=1,
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    db.session.add(
+        Question(
+            quiz_id=quiz.id,
+            question_statement="Question",
+            option1="A",
+            option2="B",
+            option3="C",
+            option4="D",
+            correct_option=1,
+        )
+    )
+    db.session.commit()
+    quiz_id = quiz.id
+
+    client = file_app.test_client()
+    token = client.post("/auth/login", json={"email": "student@test.com", "password": "student123"}).json[
+        "access_token"
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.post(f"/quiz-registration/{quiz_id}/signup", headers=headers)
+    assert response.status_code == HTTPStatus.CREATED
+    response = client.post(f"/quiz-registration/{quiz_id}/signup", headers=headers)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert db.session.query(QuizSignup).count() == 1
@@ -0,0 +1,152 @@
+"""Tests for the pluggable full-text search backends."""
+
+from http import HTTPStatus
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from quiz_api.models.database import db
+from quiz_api.models.models import Chapter, Subject, User
+from quiz_api.utils.search_backends import (
+    FTS5SearchBackend,
+    InMemorySearchBackend,
+    InvertedIndex,
+    PostgresSearchBackend,
+    get_search_backend,
+    init_search,
+    query_terms,
+)
+
+
+@pytest.fixture(params=["fts5", "memory"])
+def search_backend(request: pytest.FixtureRequest, client: FlaskClient, setup_database) -> str:
+    """Run a test with the FTS5 backend and with the in-memory backend."""
+    if request.param == "memory":
+        backend = InMemorySearchBackend()
+        client.application.extensions["search_backend"] = backend
+        backend.setup()
+    return request.param
+
+
+def _search_ids(client: FlaskClient, url: str) -> list[int]:
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return [item["id"] for item in response.json["items"]]
+
+
+def test_query_terms() -> None:
+    """Test that queries split into lowercase words, ignoring punctuation."""
+    assert query_terms("  Linear-Algebra: part_2 ") == ["linear", "algebra", "part", "2"]
+    assert query_terms('"*) OR (') == ["or"]
+
+
+def test_inverted_index_matches_every_term_and_last_as_prefix() -> None:
+    """Test that every term must match, the last one as a prefix, ranked by term occurrences."""
+    index = InvertedIndex([(1, "Linear algebra"), (2, "Linear linear algorithms"), (3, "Abstract algebra")])
+
+    assert index.search(["linear", "alg"]) == {1: -2.0, 2: -3.0}
+    assert index.search(["alg"]) == {1: -1.0, 2: -1.0, 3: -1.0}
+    assert index.search(["algebra", "linear"]) == {1: -2.0}
+    assert index.search(["calculus"]) == {}
+
+
+def test_search_subjects(client: FlaskClient, search_backend: str) -> None:
+    """Test that both backends find, rank, count and page subjects alike."""
+    subjects = [
+        Subject(name="Linear Algebra", description="Vectors and linear maps"),
+        Subject(name="Abstract Algebra", description="Groups and rings"),
+        Subject(name="Calculus", description="Limits"),
+    ]
+    db.session.add_all(subjects)
+    db.session.commit()
+    linear_id, abstract_id = subjects[0].id, subjects[1].id
+
+    response = client.get("/subjects/search?q=algeb")
+    assert {item["id"] for item in response.json["items"]} == {linear_id, abstract_id}
+    assert response.json["total"] == len(response.json["items"])
+
+    assert _search_ids(client, "/subjects/search?q=linear%20alg") == [linear_id]
+    first, second = (
+        _search_ids(client, "/subjects/search?q=algebra&limit=1"),
+        _search_ids(client, "/subjects/search?q=algebra&limit=1&offset=1"),
+    )
+    assert {*first, *second} == {linear_id, abstract_id}
+    assert _search_ids(client, "/subjects/search?q=%22)%20OR") == []
+
+
+def test_search_chapters_with_filter(client: FlaskClient, search_backend: str, subject: Subject) -> None:
+    """Test that both backends filter chapters by subject before paging."""
+    other_subject = Subject(name="Other Subject", description="Other Description")
+    db.session.add(other_subject)
+    db.session.commit()
+    chapters = [Chapter(name=f"Algebra {i}", description="Algebra", subject_id=other_subject.id) for i in range(2)]
+    chapters.append(Chapter(name="Algebra basics", description="Algebra", subject_id=subject.id))
+    db.session.add_all(chapters)
+    db.session.commit()
+    subject_id, chapter_id = subject.id, chapters[2].id
+
+    response = client.get(f"/subjects/{subject_id}/chapters/search?q=algebra&limit=1")
+
+    assert response.json["total"] == 1
+    assert [item["id"] for item in response.json["items"]] == [chapter_id]
+
+
+def test_search_users_with_punctuation(
+    client: FlaskClient, search_backend: str, admin_token: str, regular_user: User
+) -> None:
+    """Test that punctuation in a query does not break the search."""
+    response = client.get("/admin/users/search?q=(test%20user!", headers={"Authorization": f"Bearer {admin_token}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [item["username"] for item in response.json["items"]] == ["testuser"]
+
+
+@pytest.mark.parametrize("search_backend", ["memory"], indirect=True)
+def test_memory_search_reflects_updates(client: FlaskClient, search_backend: str, subject: Subject) -> None:
+    """Test that the in-memory index drops a table's postings when the ORM writes to it."""
+    subject_id = subject.id
+    assert client.get("/subjects/search?q=test").json["total"] == 1
+
+    renamed = db.session.get(Subject, subject_id)
+    renamed.name = "Geometry"
+    renamed.description = "Shapes"
+    db.session.commit()
+
+    assert client.get("/subjects/search?q=test").json["total"] == 0
+    assert _search_ids(client, "/subjects/search?q=geometry") == [subject_id]
+
+
+def test_postgres_match_builds_prefix_tsquery() -> None:
+    """Test that the PostgreSQL backend ANDs the terms and matches the last one as a prefix."""
+    statement = PostgresSearchBackend().match("subjects", ["linear", "alg"])
+
+    assert statement.compile().params == {"query": "linear & alg:*"}
+    assert "search_vector @@ query" in str(statement)
+
+
+@pytest.mark.parametrize(
+    ("database_uri", "configured", "expected"),
+    [
+        ("sqlite:///:memory:", None, FTS5SearchBackend),
+        ("postgresql://localhost/quiz", None, PostgresSearchBackend),
+        ("mysql://localhost/quiz", None, InMemorySearchBackend),
+        ("postgresql://localhost/quiz", "memory", InMemorySearchBackend),
+    ],
+)
+def test_init_search_selects_backend(database_uri: str, configured: str | None, expected: type) -> None:
+    """Test that the backend follows `SEARCH_BACKEND`, or else the database dialect."""
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=database_uri, SEARCH_BACKEND=configured)
+    init_search(app)
+
+    with app.app_context():
+        assert isinstance(get_search_backend(), expected)
+
+
+def test_init_search_rejects_unknown_backend() -> None:
+    """Test that a misspelled backend fails at startup rather than on the first search."""
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite:///:memory:", SEARCH_BACKEND="elastic")
+
+    with pytest.raises(ValueError, match="Unknown search backend"):
+        init_search(app)
@@ -0,0 +1,131 @@
+"""Tests for request coalescing."""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from quiz_api.utils.single_flight import SingleFlight
+
+
+def _start(target, *args) -> threading.Thread:
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def _wait_until(condition) -> None:
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_computation() -> None:
+    """Test that callers of a key in flight wait for its result instead of computing it again."""
+    single_flight = SingleFlight(None, wait_timeout=5)
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def compute() -> bytes:
+        calls.append(1)
+        release.wait()
+        return b"result"
+
+    threads = [_start(lambda: results.append(single_flight.do("key", compute)))]
+    _wait_until(lambda: calls)
+    waiters = 3
+    threads += [_start(lambda: results.append(single_flight.do("key", compute))) for _ in range(waiters)]
+    _wait_until(lambda: single_flight.stats()["coalesced"] == waiters)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [b"result"] * (1 + waiters)
+    assert single_flight.stats() == {"computed": 1, "coalesced": waiters, "stale": 0, "in_flight": 0}
+
+    # Once the flight has landed, the key is computed again
+    single_flight.do("key", compute)
+    assert calls == [1, 1]
+
+
+def test_callers_with_stale_result_do_not_wait() -> None:
+    """Test that a caller with an outdated result gets it back while the key is in flight."""
+    single_flight = SingleFlight(None, wait_timeout=5)
+    release = threading.Event()
+    leader = _start(single_flight.do, "key", lambda: release.wait() and b"fresh")
+    _wait_until(lambda: single_flight.stats()["in_flight"])
+
+    assert single_flight.do("key", lambda: b"unused", stale=b"stale") == b"stale"
+    release.set()
+    leader.join()
+    assert single_flight.stats()["stale"] == 1
+
+
+def test_error_is_raised_to_every_caller() -> None:
+    """Test that callers waiting on a failed computation get its exception."""
+    single_flight = SingleFlight(None, wait_timeout=5)
+    release = threading.Event()
+    errors = []
+
+    def compute() -> bytes:
+        release.wait()
+        raise ValueError("boom")
+
+    def call() -> None:
+        try:
+            single_flight.do("key", compute)
+        except ValueError as exc:
+            errors.append(exc)
+
+    threads = [_start(call)]
+    _wait_until(lambda: single_flight.stats()["in_flight"])
+    threads.append(_start(call))
+    _wait_until(lambda: single_flight.stats()["coalesced"])
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [str(error) for error in errors] == ["boom", "boom"]
+
+
+@pytest.mark.parametrize("stale", [None, b"stale"])
+def test_workers_share_result_through_lock_file(tmp_path: Path, stale: bytes | None) -> None:
+    """Test that a worker waiting on another worker's lock reads its result, or returns its stale result."""
+    # Each instance stands for a worker; flock locks of separately opened files conflict within a process too
+    worker1 = SingleFlight(str(tmp_path), wait_timeout=5)
+    worker2 = SingleFlight(str(tmp_path), wait_timeout=5)
+    release = threading.Event()
+    results = []
+
+    leader = _start(worker1.do, "key", lambda: release.wait() and b"from worker 1")
+    _wait_until(lambda: worker1.stats()["computed"])
+    follower = _start(lambda: results.append(worker2.do("key", lambda: b"from worker 2", stale=stale)))
+    if stale is None:
+        time.sleep(0.05)
+    else:
+        follower.join()
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert results == [stale or b"from worker 1"]
+    assert worker2.stats()["computed"] == 0
+
+    # A later flight computes the key again
+    assert worker2.do("key", lambda: b"from worker 2") == b"from worker 2"
+
+
+def test_worker_computes_after_wait_timeout(tmp_path: Path) -> None:
+    """Test that a worker stops waiting on another worker's lock after the timeout."""
+    worker1 = SingleFlight(str(tmp_path), wait_timeout=5)
+    worker2 = SingleFlight(str(tmp_path), wait_timeout=0.05)
+    release = threading.Event()
+
+    leader = _start(worker1.do, "key", lambda: release.wait() and b"from worker 1")
+    _wait_until(lambda: worker1.stats()["computed"])
+    assert worker2.do("key", lambda: b"from worker 2") == b"from worker 2"
+    release.set()
+    leader.join()
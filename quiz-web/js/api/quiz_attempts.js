@@ -91,12 +91,18 @@ export async function getQuizScore(quizId) {
 }
 
 /**
- * Get user's quiz attempt history
- * @returns {Promise<Array>} - Array of quiz attempt history
+ * Get a page of the user's quiz attempt history, newest first
+ * @param {string|null} cursor - The `next_cursor` of the previous page, or null for the first page
+ * @param {number} limit - Maximum number of attempts to return
+ * @returns {Promise<Object>} - Page of quiz attempt history ({ items, next_cursor, limit })
  */
-export async function getQuizAttemptsHistory() {
+export async function getQuizAttemptsHistory(cursor = null, limit = 20) {
     try {
-        const response = await fetch(`${API_BASE_URL}/quiz/attempts/history`, {
+        const params = new URLSearchParams({ limit });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        const response = await fetch(`${API_BASE_URL}/quiz/attempts/history?${params}`, {
             method: 'GET',
             headers: {
                 'Authorization': `Bearer ${localStorage.getItem('token')}`